@@ -8,38 +8,65 @@ Este script permite criar, editar e excluir usuários do sistema
 diretamente no banco de dados MySQL.
 """
 
-import mysql.connector
 from mysql.connector import Error
 import os
 import sys
+import csv
+import gzip
+import json
+import time
+import argparse
+import subprocess
 import bcrypt
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 from getpass import getpass
 
+import db
+
 # Carrega variáveis de ambiente
 load_dotenv()
 
-# Configurações do banco de dados
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'port': int(os.getenv('DB_PORT', 3306)),
-    'user': os.getenv('DB_USER', 'acore'),
-    'password': os.getenv('DB_PASSWORD', 'acore'),
-    'database': os.getenv('DB_NAME', 'knowledge_base'),
-}
+# Importação em lote: usuários por transação (executemany)
+IMPORT_CHUNK_SIZE = 500
+
+# Processos para gerar hashes bcrypt em lote (0 = núcleos - 1).
+# Limite em servidores que também rodam o MySQL para não saturar a CPU.
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', '0'))
+
+# Custo do bcrypt (calibrado com: python app.py calibrar-bcrypt)
+BCRYPT_COST = int(os.getenv('BCRYPT_COST') or 12)
+BCRYPT_MIN_COST = 10
+BCRYPT_MAX_COST = 16
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+# Listagem de usuários (paginação por chave)
+LIST_PAGE_SIZE = 50
+USER_SORT_COLUMNS = {'id': 'u.id', 'nome': 'u.nome', 'email': 'u.email', 'criado': 'u.created_at'}
+USER_PERMISSIONS = ('cadastrar', 'batepapo')
+
+# Desligamento em lote (python app.py desligar)
+OFFBOARD_BATCH_SIZE = 1000  # Linhas por DELETE (uma transação curta cada)
+OFFBOARD_USERS_PER_STEP = 50
+OFFBOARD_CONVERSATIONS_PER_STEP = 200
+OFFBOARD_TABLES = ('chat_conversations', 'chat_messages', 'chat_feedback', 'knowledge_base')
+
+# Exportação (python app.py exportar)
+EXPORT_FETCH_SIZE = 1000  # Linhas lidas do servidor por vez
+EXPORT_COLUMNS = ('id', 'nome', 'email', 'grupo', 'ativo', 'cadastrar', 'batepapo', 'modulos', 'criado_em')
 
 def get_connection():
-    """Cria conexão com o banco de dados"""
+    """Obtém uma conexão do pool compartilhado (db.py)"""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = db.get_connection()
         return conn
     except Error as e:
         print(f"❌ Erro ao conectar ao banco de dados: {e}")
         return None
 
 def hash_password(password):
-    """Gera hash da senha usando bcrypt"""
-    salt = bcrypt.gensalt()
+    """Gera hash da senha usando bcrypt (custo BCRYPT_COST)"""
+    salt = bcrypt.gensalt(rounds=BCRYPT_COST)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 def verify_password(password, hashed):
@@ -57,34 +84,171 @@ def print_header():
     print("=" * 60)
     print()
 
-def list_users(cursor):
-    """Lista todos os usuários do sistema"""
-    cursor.execute("""
-        SELECT u.id, u.nome, u.email, u.grupo, 
-               COALESCE(p.cadastrar, 0) as cadastrar,
-               COALESCE(p.batepapo, 0) as batepapo,
-               u.created_at
-        FROM users u
-        LEFT JOIN permissions p ON u.id = p.user_id
-        ORDER BY u.id
-    """)
-    users = cursor.fetchall()
+def build_user_filters(email_prefix=None, grupo=None, permissao=None, modulo=None):
+    """Monta as condições WHERE da listagem; retorna (cláusulas, parâmetros)"""
+    clauses = []
+    params = []
     
-    if not users:
-        print("Nenhum usuário cadastrado.")
-        return
+    if email_prefix:
+        # Prefixo usa o índice UNIQUE de email
+        escaped = email_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        clauses.append("u.email LIKE %s")
+        params.append(escaped + '%')
+    if grupo:
+        clauses.append("u.grupo = %s")
+        params.append(grupo)
+    if permissao in USER_PERMISSIONS:
+        clauses.append(f"p.{permissao} = 1")
+    if modulo:
+        module_column = 'm.id' if str(modulo).isdigit() else 'm.nome'
+        clauses.append(f"""EXISTS (
+            SELECT 1 FROM module_access ma
+            INNER JOIN modules m ON m.id = ma.module_id
+            WHERE ma.user_id = u.id AND {module_column} = %s
+        )""")
+        params.append(modulo)
     
-    print("\n" + "-" * 100)
-    print(f"{'ID':<5} {'Nome':<25} {'Email':<30} {'Grupo':<10} {'Cadastrar':<10} {'Bate-papo':<10}")
-    print("-" * 100)
+    return clauses, params
+
+def iter_user_pages(cursor, filters=None, order='id', descending=False, page_size=LIST_PAGE_SIZE):
+    """
+    Gera páginas de usuários com paginação por chave (keyset): cada página
+    continua a partir da última linha da anterior, sem OFFSET. As linhas são
+    lidas do cursor não bufferizado (padrão do mysql.connector) conforme
+    chegam, sem carregar a tabela inteira no cliente.
+    """
+    clauses, params = filters or ([], [])
+    column = USER_SORT_COLUMNS[order]
+    sort_index = {'id': 0, 'nome': 1, 'email': 2, 'criado': 6}[order]
+    direction = 'DESC' if descending else 'ASC'
+    operator = '<' if descending else '>'
+    last_row = None
     
-    for user in users:
+    while True:
+        page_clauses = list(clauses)
+        page_params = list(params)
+        if last_row is not None:
+            if order == 'id':
+                page_clauses.append(f"u.id {operator} %s")
+                page_params.append(last_row[0])
+            else:
+                page_clauses.append(f"({column} {operator} %s OR ({column} = %s AND u.id {operator} %s))")
+                page_params += [last_row[sort_index], last_row[sort_index], last_row[0]]
+        
+        where_sql = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+        cursor.execute(f"""
+            SELECT u.id, u.nome, u.email, u.grupo,
+                   COALESCE(p.cadastrar, 0) as cadastrar,
+                   COALESCE(p.batepapo, 0) as batepapo,
+                   u.created_at
+            FROM users u
+            LEFT JOIN permissions p ON u.id = p.user_id
+            {where_sql}
+            ORDER BY {column} {direction}, u.id {direction}
+            LIMIT %s
+        """, page_params + [page_size])
+        
+        page = [row for row in cursor]
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        last_row = page[-1]
+
+def print_user_rows(rows, header=True):
+    """Imprime linhas de usuários em formato de tabela"""
+    if header:
+        print("\n" + "-" * 100)
+        print(f"{'ID':<5} {'Nome':<25} {'Email':<30} {'Grupo':<10} {'Cadastrar':<10} {'Bate-papo':<10}")
+        print("-" * 100)
+    
+    for user in rows:
         cadastrar = "✓" if user[4] else "✗"
         batepapo = "✓" if user[5] else "✗"
         print(f"{user[0]:<5} {user[1]:<25} {user[2]:<30} {user[3]:<10} {cadastrar:<10} {batepapo:<10}")
+
+def list_users(cursor, filters=None, order='id', descending=False, page_size=LIST_PAGE_SIZE, interactive=True):
+    """
+    Lista os usuários página a página. No modo interativo pergunta antes de
+    buscar a próxima página; caso contrário imprime todas em sequência.
+    """
+    total = 0
+    for page_number, page in enumerate(iter_user_pages(cursor, filters, order, descending, page_size), start=1):
+        print_user_rows(page, header=(page_number == 1))
+        total += len(page)
+        
+        if interactive and len(page) == page_size:
+            print(f"-- Página {page_number} ({total} usuário(s) até agora) --")
+            if input("Enter para a próxima página, 'q' para parar: ").strip().lower() == 'q':
+                break
+    
+    if not total:
+        print("Nenhum usuário encontrado.")
+        return
     
     print("-" * 100)
-    print(f"Total: {len(users)} usuário(s)")
+    print(f"Total exibido: {total} usuário(s)")
+
+def list_users_menu(cursor):
+    """Pergunta filtros e ordenação e lista os usuários"""
+    print("\n--- LISTAR USUÁRIOS ---")
+    print("Filtros opcionais (Enter para ignorar)\n")
+    email_prefix = input("Email começa com: ").strip()
+    grupo = input("Grupo [adm/user]: ").strip().lower()
+    permissao = input("Com permissão [cadastrar/batepapo]: ").strip().lower()
+    modulo = input("Com acesso ao módulo (nome ou ID): ").strip()
+    order = input(f"Ordenar por [{'/'.join(USER_SORT_COLUMNS)}] (padrão id): ").strip().lower()
+    
+    if grupo not in ('', 'adm', 'user'):
+        print("❌ Grupo inválido!")
+        return
+    if permissao not in ('',) + USER_PERMISSIONS:
+        print("❌ Permissão inválida!")
+        return
+    
+    descending = order.startswith('-')
+    order = order.lstrip('-') or 'id'
+    if order not in USER_SORT_COLUMNS:
+        print("❌ Ordenação inválida!")
+        return
+    
+    filters = build_user_filters(email_prefix, grupo, permissao, modulo)
+    list_users(cursor, filters, order, descending)
+
+def find_user(cursor, term):
+    """Busca um usuário por ID ou email; retorna (id, nome, email) ou None"""
+    if term.isdigit():
+        cursor.execute("SELECT id, nome, email FROM users WHERE id = %s", (int(term),))
+    else:
+        cursor.execute("SELECT id, nome, email FROM users WHERE email = %s", (term,))
+    rows = cursor.fetchall()
+    return rows[0] if rows else None
+
+def select_user(cursor, action):
+    """
+    Pergunta o usuário alvo por ID ou email (sem listar todos).
+    '?' abre a listagem filtrada. Retorna o ID ou None se cancelado.
+    """
+    while True:
+        term = input(f"\nDigite o ID ou email do usuário para {action} ('?' para listar, 0 para cancelar): ").strip()
+        if term in ('', '0'):
+            return None
+        if term == '?':
+            list_users_menu(cursor)
+            continue
+        
+        user = find_user(cursor, term)
+        if user:
+            return user[0]
+        
+        print("❌ Usuário não encontrado!")
+        if not term.isdigit():
+            # Sugere emails com o mesmo prefixo
+            suggestions = next(iter_user_pages(cursor, build_user_filters(email_prefix=term), page_size=10), [])
+            if suggestions:
+                print("Você quis dizer:")
+                print_user_rows(suggestions)
 
 def create_user(cursor, conn):
     """Cria um novo usuário"""
@@ -158,21 +322,13 @@ def edit_user(cursor, conn):
     """Edita um usuário existente"""
     print("\n--- EDITAR USUÁRIO ---\n")
     
-    list_users(cursor)
-    
-    user_id = input("\nDigite o ID do usuário para editar (0 para cancelar): ").strip()
-    if user_id == '0':
-        return
-    
-    try:
-        user_id = int(user_id)
-    except ValueError:
-        print("❌ ID inválido!")
+    user_id = select_user(cursor, "editar")
+    if not user_id:
         return
     
     # Busca o usuário
     cursor.execute("""
-        SELECT u.*, p.cadastrar, p.batepapo
+        SELECT u.id, u.nome, u.email, u.grupo, p.cadastrar, p.batepapo
         FROM users u
         LEFT JOIN permissions p ON u.id = p.user_id
         WHERE u.id = %s
@@ -216,7 +372,7 @@ def edit_user(cursor, conn):
         nova_senha_hash = hash_password(alterar_senha)
     
     # Grupo
-    print(f"\nGrupo atual: {user[4]}")
+    print(f"\nGrupo atual: {user[3]}")
     print("1. Administrador (adm)")
     print("2. Usuário comum (user)")
     print("3. Manter atual")
@@ -227,11 +383,11 @@ def edit_user(cursor, conn):
     elif tipo == '2':
         novo_grupo = 'user'
     else:
-        novo_grupo = user[4]
+        novo_grupo = user[3]
     
     # Permissões
-    cadastrar = user[7] if user[7] is not None else False
-    batepapo = user[8] if user[8] is not None else False
+    cadastrar = user[4] if user[4] is not None else False
+    batepapo = user[5] if user[5] is not None else False
     
     if novo_grupo == 'user':
         print(f"\nPermissões atuais: Cadastrar={'✓' if cadastrar else '✗'}, Bate-papo={'✓' if batepapo else '✗'}")
@@ -277,16 +433,8 @@ def delete_user(cursor, conn):
     """Exclui um usuário"""
     print("\n--- EXCLUIR USUÁRIO ---\n")
     
-    list_users(cursor)
-    
-    user_id = input("\nDigite o ID do usuário para excluir (0 para cancelar): ").strip()
-    if user_id == '0':
-        return
-    
-    try:
-        user_id = int(user_id)
-    except ValueError:
-        print("❌ ID inválido!")
+    user_id = select_user(cursor, "excluir")
+    if not user_id:
         return
     
     # Busca o usuário
@@ -327,16 +475,8 @@ def reset_password(cursor, conn):
     """Reseta a senha de um usuário"""
     print("\n--- RESETAR SENHA ---\n")
     
-    list_users(cursor)
-    
-    user_id = input("\nDigite o ID do usuário (0 para cancelar): ").strip()
-    if user_id == '0':
-        return
-    
-    try:
-        user_id = int(user_id)
-    except ValueError:
-        print("❌ ID inválido!")
+    user_id = select_user(cursor, "resetar a senha")
+    if not user_id:
         return
     
     # Busca o usuário
@@ -369,6 +509,1073 @@ def reset_password(cursor, conn):
         conn.rollback()
         print(f"❌ Erro ao resetar senha: {e}")
 
+def measure_bcrypt_ms(cost, samples=3):
+    """Tempo médio (ms) de um hash bcrypt com o custo informado neste host"""
+    salt = bcrypt.gensalt(rounds=cost)
+    durations = []
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        bcrypt.hashpw(b'calibracao-askforge', salt)
+        durations.append((time.perf_counter() - started_at) * 1000)
+    return min(durations)
+
+def measure_bcryptjs_ms(cost, samples=3):
+    """
+    Mesmo teste com o bcryptjs do Next.js (é ele que verifica o login).
+    Retorna None se o Node ou o node_modules não estiverem disponíveis.
+    """
+    script = (
+        "const b=require('bcryptjs');const s=b.genSaltSync(%d);let m=Infinity;"
+        "for(let i=0;i<%d;i++){const t=process.hrtime.bigint();b.hashSync('calibracao-askforge',s);"
+        "m=Math.min(m,Number(process.hrtime.bigint()-t)/1e6);}console.log(m);"
+    ) % (cost, samples)
+    try:
+        result = subprocess.run(
+            ['node', '-e', script],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            timeout=120
+        )
+        if result.returncode != 0:
+            return None
+        return float(result.stdout.strip())
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
+
+def save_env_value(key, value, path=ENV_FILE):
+    """Grava (ou atualiza) uma variável no arquivo .env"""
+    lines = []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    
+    for i, line in enumerate(lines):
+        if line.split('=', 1)[0].strip() == key:
+            lines[i] = f"{key}={value}"
+            break
+    else:
+        lines.append(f"{key}={value}")
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+
+def calibrate_bcrypt(target_ms=250, save=True):
+    """
+    Mede o tempo de hash para custos crescentes e escolhe o maior custo que
+    fica dentro do orçamento de latência. Considera o bcryptjs do servidor
+    Next.js quando disponível (o login é verificado por ele).
+    """
+    print(f"\n--- CALIBRAR BCRYPT (orçamento: {target_ms} ms por hash) ---\n")
+    print(f"{'Custo':<8}{'Python (ms)':>14}{'Node (ms)':>14}")
+    
+    chosen = None
+    for cost in range(BCRYPT_MIN_COST, BCRYPT_MAX_COST + 1):
+        python_ms = measure_bcrypt_ms(cost)
+        node_ms = measure_bcryptjs_ms(cost)
+        node_text = f"{node_ms:.1f}" if node_ms is not None else "-"
+        print(f"{cost:<8}{python_ms:>14.1f}{node_text:>14}")
+        
+        slowest_ms = max(python_ms, node_ms or 0)
+        if slowest_ms > target_ms:
+            break
+        chosen = cost
+    
+    if chosen is None:
+        chosen = BCRYPT_MIN_COST
+        print(f"\n⚠️  Nem o custo mínimo ({BCRYPT_MIN_COST}) cabe no orçamento; usando {chosen}.")
+    
+    print(f"\n✅ Custo escolhido: {chosen} (atual: {os.getenv('BCRYPT_COST') or 'padrão'})")
+    if save:
+        save_env_value('BCRYPT_COST', chosen)
+        print(f"   Gravado em {ENV_FILE} como BCRYPT_COST={chosen}")
+        print("   Reinicie o servidor Next.js; hashes antigos são atualizados no próximo login.")
+    return chosen
+
+def parse_bool(value):
+    """Converte valores de CSV/JSONL (1, s, sim, true, x...) para booleano"""
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('1', 's', 'sim', 'y', 'yes', 'true', 'x')
+
+def file_format(path):
+    """'jsonl' para *.jsonl/*.ndjson (com ou sem .gz), senão 'csv'"""
+    name = path.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return 'jsonl' if name.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+def open_text(path, mode='r', **kwargs):
+    """Abre um arquivo texto, com gzip transparente para *.gz"""
+    if path.lower().endswith('.gz'):
+        return gzip.open(path, mode + 't', **kwargs)
+    return open(path, mode, **kwargs)
+
+def iter_import_rows(path):
+    """
+    Lê usuários de um arquivo CSV ou JSONL sem carregar tudo em memória.
+    Gera tuplas (linha, dados). Colunas: nome, email, senha, grupo,
+    cadastrar, batepapo, modulos (nomes ou IDs separados por ';').
+    """
+    if file_format(path) == 'jsonl':
+        with open_text(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, {'_erro': f"JSON inválido: {e}"}
+    else:
+        with open_text(path, 'r', encoding='utf-8-sig', newline='') as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            # Linha 1 é o cabeçalho
+            for line_number, row in enumerate(csv.DictReader(f, dialect=dialect), start=2):
+                yield line_number, row
+
+def load_module_lookup(cursor):
+    """Mapeia nome (minúsculo) e ID (texto) de cada módulo para o ID"""
+    cursor.execute("SELECT id, nome FROM modules")
+    lookup = {}
+    for module_id, nome in cursor.fetchall():
+        lookup[nome.strip().lower()] = module_id
+        lookup[str(module_id)] = module_id
+    return lookup
+
+def validate_import_row(data, module_lookup, seen_emails):
+    """Normaliza uma linha de importação; retorna (usuario, erro)"""
+    if data.get('_erro'):
+        return None, data['_erro']
+    
+    nome = str(data.get('nome') or '').strip()
+    email = str(data.get('email') or '').strip().lower()
+    senha = str(data.get('senha') or '')
+    grupo = str(data.get('grupo') or 'user').strip().lower()
+    
+    if not nome:
+        return None, "Nome é obrigatório"
+    if not email or '@' not in email:
+        return None, "Email inválido"
+    if email in seen_emails:
+        return None, "Email repetido no arquivo"
+    if len(senha) < 6:
+        return None, "A senha deve ter pelo menos 6 caracteres"
+    if grupo not in ('adm', 'user'):
+        return None, f"Grupo inválido: {grupo}"
+    
+    modulos = data.get('modulos') or []
+    if isinstance(modulos, str):
+        modulos = [m for m in modulos.split(';') if m.strip()]
+    module_ids = []
+    for modulo in modulos:
+        module_id = module_lookup.get(str(modulo).strip().lower())
+        if module_id is None:
+            return None, f"Módulo não encontrado: {modulo}"
+        if module_id not in module_ids:
+            module_ids.append(module_id)
+    
+    seen_emails.add(email)
+    return {
+        'nome': nome,
+        'email': email,
+        'senha': senha,
+        'grupo': grupo,
+        'cadastrar': parse_bool(data.get('cadastrar')),
+        'batepapo': parse_bool(data.get('batepapo')),
+        'module_ids': module_ids
+    }, None
+
+def insert_user_chunk(cursor, conn, users):
+    """
+    Insere um lote de usuários (já com 'senha_hash') em uma única transação:
+    users, permissions e module_access via executemany. Retorna o número de
+    usuários inseridos; em caso de erro faz rollback e propaga a exceção.
+    """
+    try:
+        cursor.executemany(
+            "INSERT INTO users (nome, email, senha, grupo) VALUES (%s, %s, %s, %s)",
+            [(u['nome'], u['email'], u['senha_hash'], u['grupo']) for u in users]
+        )
+        
+        # IDs gerados (não dependemos de auto_increment consecutivo)
+        placeholders = ', '.join(['%s'] * len(users))
+        cursor.execute(
+            f"SELECT id, email FROM users WHERE email IN ({placeholders})",
+            [u['email'] for u in users]
+        )
+        ids = {email.lower(): user_id for user_id, email in cursor.fetchall()}
+        
+        cursor.executemany(
+            "INSERT INTO permissions (user_id, cadastrar, batepapo) VALUES (%s, %s, %s)",
+            [(ids[u['email']], u['cadastrar'], u['batepapo']) for u in users]
+        )
+        
+        access_rows = [(ids[u['email']], module_id) for u in users for module_id in u['module_ids']]
+        if access_rows:
+            cursor.executemany(
+                "INSERT INTO module_access (user_id, module_id) VALUES (%s, %s)",
+                access_rows
+            )
+        
+        conn.commit()
+        return len(users)
+    except Error:
+        conn.rollback()
+        raise
+
+class Progress:
+    """Barra de progresso simples no terminal"""
+    
+    def __init__(self, total, label):
+        self.total = max(total, 1)
+        self.label = label
+        self.done = 0
+        self.started_at = time.perf_counter()
+    
+    def advance(self, count=1):
+        self.done += count
+        if self.done % 25 and self.done < self.total:
+            return
+        elapsed = time.perf_counter() - self.started_at
+        filled = int(30 * min(self.done, self.total) / self.total)
+        rate = self.done / elapsed if elapsed else 0
+        print(f"\r  {self.label} [{'#' * filled}{'-' * (30 - filled)}] "
+              f"{self.done}/{self.total} ({rate:.1f}/s)", end='', flush=True)
+    
+    def finish(self):
+        print()
+
+def resolve_hash_workers(workers):
+    """Número de processos de hashing (0 = núcleos - 1, mínimo 1)"""
+    if workers and workers > 0:
+        return workers
+    return max(1, (os.cpu_count() or 2) - 1)
+
+def create_hash_pool(workers):
+    """Pool de processos para bcrypt; None quando há apenas 1 worker"""
+    workers = resolve_hash_workers(workers)
+    return ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+def start_hashing(pool, passwords):
+    """
+    Envia as senhas para o pool e retorna um iterador com os hashes, na mesma
+    ordem. Os processos continuam trabalhando enquanto o lote anterior é
+    gravado no banco.
+    """
+    if pool is None:
+        return (hash_password(password) for password in passwords)
+    return pool.map(hash_password, passwords, chunksize=max(1, len(passwords) // 32))
+
+def filter_existing_emails(cursor, rows, errors, progress, keep_existing=False):
+    """
+    Separa as linhas cujo email já está (ou, com keep_existing, não está)
+    cadastrado; as descartadas entram em errors.
+    """
+    placeholders = ', '.join(['%s'] * len(rows))
+    cursor.execute(
+        f"SELECT email FROM users WHERE email IN ({placeholders})",
+        [row['email'] for _, row in rows]
+    )
+    existing = {email.lower() for (email,) in cursor.fetchall()}
+    
+    kept = []
+    for line_number, row in rows:
+        if (row['email'] in existing) == keep_existing:
+            kept.append((line_number, row))
+        else:
+            errors.append((line_number, row['email'], "Email não cadastrado" if keep_existing else "Email já cadastrado"))
+            progress.advance()
+    return kept
+
+def write_import_chunk(cursor, conn, pending, hashes, errors, progress):
+    """
+    Aguarda os hashes do lote e grava. Se o lote falhar, regrava linha a
+    linha para isolar os erros sem perder o restante.
+    """
+    for (_, user), senha_hash in zip(pending, hashes):
+        user['senha_hash'] = senha_hash
+        progress.advance()
+    if not pending:
+        return 0
+    
+    try:
+        return insert_user_chunk(cursor, conn, [user for _, user in pending])
+    except Error:
+        inserted = 0
+        for line_number, user in pending:
+            try:
+                inserted += insert_user_chunk(cursor, conn, [user])
+            except Error as e:
+                errors.append((line_number, user['email'], str(e)))
+        return inserted
+
+def write_import_errors(path, errors):
+    """Grava os erros por linha em CSV (linha, email, erro)"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['linha', 'email', 'erro'])
+        writer.writerows(errors)
+
+def print_row_errors(errors, errors_path=None):
+    """Lista os erros por linha (e grava o relatório completo, se pedido)"""
+    if not errors:
+        return
+    errors.sort(key=lambda error: error[0])
+    print(f"❌ {len(errors)} linha(s) com erro:")
+    for line_number, email, error in errors[:20]:
+        print(f"   Linha {line_number} ({email or '-'}): {error}")
+    if len(errors) > 20:
+        print(f"   ... e mais {len(errors) - 20}")
+    if errors_path:
+        write_import_errors(errors_path, errors)
+        print(f"   Relatório completo em: {errors_path}")
+
+def import_users(cursor, conn, path, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False, errors_path=None,
+                 workers=HASH_WORKERS):
+    """
+    Importa usuários de CSV/JSONL em lotes. Os hashes bcrypt são gerados em
+    um pool de processos enquanto o lote anterior é gravado. Erros de uma
+    linha não abortam a importação: são listados no final (e opcionalmente
+    gravados em CSV).
+    """
+    if not os.path.exists(path):
+        print(f"❌ Arquivo não encontrado: {path}")
+        return False
+    
+    print(f"\n--- IMPORTAR USUÁRIOS: {path} ---\n")
+    total = sum(1 for _ in iter_import_rows(path))
+    module_lookup = load_module_lookup(cursor)
+    seen_emails = set()
+    errors = []
+    chunk = []
+    inserted = 0
+    in_flight = None  # Lote com hashes em andamento: (linhas, iterador de hashes)
+    progress = Progress(total, "Validando" if dry_run else "Importando")
+    pool = None if dry_run else create_hash_pool(workers)
+    
+    def flush():
+        nonlocal in_flight, inserted
+        pending = filter_existing_emails(cursor, chunk, errors, progress) if chunk else []
+        hashes = start_hashing(pool, [user['senha'] for _, user in pending])
+        if in_flight:
+            inserted += write_import_chunk(cursor, conn, *in_flight, errors, progress)
+        in_flight = (pending, hashes)
+        chunk.clear()
+    
+    try:
+        for line_number, data in iter_import_rows(path):
+            user, error = validate_import_row(data, module_lookup, seen_emails)
+            if error:
+                errors.append((line_number, str(data.get('email') or ''), error))
+                progress.advance()
+                continue
+            if dry_run:
+                progress.advance()
+                continue
+            chunk.append((line_number, user))
+            if len(chunk) >= chunk_size:
+                flush()
+        if not dry_run:
+            flush()
+            inserted += write_import_chunk(cursor, conn, *in_flight, errors, progress)
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+    progress.finish()
+    
+    elapsed = time.perf_counter() - progress.started_at
+    print()
+    if dry_run:
+        print(f"✓ Simulação: {total - len(errors)} de {total} linha(s) válida(s)")
+    else:
+        print(f"✅ {inserted} usuário(s) importado(s) de {total} linha(s) em {elapsed:.1f}s "
+              f"({inserted / elapsed if elapsed else 0:.1f} usuários/s, "
+              f"{resolve_hash_workers(workers)} processo(s) de hash)")
+    
+    print_row_errors(errors, errors_path)
+    return not errors
+
+def reset_passwords_bulk(cursor, conn, path, chunk_size=IMPORT_CHUNK_SIZE, errors_path=None,
+                         workers=HASH_WORKERS):
+    """
+    Redefine senhas em massa a partir de CSV/JSONL com colunas email e senha.
+    Mesmo pipeline da importação: hashes no pool de processos e UPDATE em
+    lote (executemany) por transação.
+    """
+    if not os.path.exists(path):
+        print(f"❌ Arquivo não encontrado: {path}")
+        return False
+    
+    print(f"\n--- RESETAR SENHAS EM LOTE: {path} ---\n")
+    total = sum(1 for _ in iter_import_rows(path))
+    errors = []
+    chunk = []
+    updated = 0
+    progress = Progress(total, "Resetando")
+    pool = create_hash_pool(workers)
+    
+    def write(pending, hashes):
+        rows = []
+        for (_, row), senha_hash in zip(pending, hashes):
+            rows.append((senha_hash, row['email']))
+            progress.advance()
+        if not rows:
+            return 0
+        try:
+            cursor.executemany("UPDATE users SET senha = %s WHERE email = %s", rows)
+            conn.commit()
+            return len(rows)
+        except Error as e:
+            conn.rollback()
+            errors.extend((line_number, row['email'], str(e)) for line_number, row in pending)
+            return 0
+    
+    in_flight = None
+    
+    def flush():
+        nonlocal in_flight, updated
+        pending = filter_existing_emails(cursor, chunk, errors, progress, keep_existing=True) if chunk else []
+        hashes = start_hashing(pool, [row['senha'] for _, row in pending])
+        if in_flight:
+            updated += write(*in_flight)
+        in_flight = (pending, hashes)
+        chunk.clear()
+    
+    try:
+        for line_number, data in iter_import_rows(path):
+            email = str(data.get('email') or '').strip().lower()
+            senha = str(data.get('senha') or '')
+            if data.get('_erro') or not email or len(senha) < 6:
+                errors.append((line_number, email, data.get('_erro') or "Email ou senha inválidos (mínimo 6 caracteres)"))
+                progress.advance()
+                continue
+            chunk.append((line_number, {'email': email, 'senha': senha}))
+            if len(chunk) >= chunk_size:
+                flush()
+        flush()
+        updated += write(*in_flight)
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+    progress.finish()
+    
+    elapsed = time.perf_counter() - progress.started_at
+    print(f"\n✅ {updated} senha(s) redefinida(s) de {total} linha(s) em {elapsed:.1f}s "
+          f"({updated / elapsed if elapsed else 0:.1f}/s)")
+    print_row_errors(errors, errors_path)
+    return not errors
+
+def parse_optional_bool(value):
+    """Como parse_bool, mas vazio/ausente vira None (manter valor atual)"""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return parse_bool(value)
+
+def iter_query_rows(cursor, sql):
+    """Executa um SELECT de estado desejado e gera (linha, dados) como dicts"""
+    cursor.execute(sql)
+    columns = [column[0] for column in cursor.description]
+    for line_number, row in enumerate(cursor.fetchall(), start=1):
+        yield line_number, dict(zip(columns, row))
+
+def sync_access(cursor, conn, rows, mode='substituir', dry_run=False, errors_path=None):
+    """
+    Sincroniza permissions e module_access com um estado desejado.
+    Cada linha traz email, cadastrar, batepapo e modulos. Permissões vazias
+    mantêm o valor atual. No modo 'substituir' os módulos do usuário passam a
+    ser exatamente os da linha (coluna modulos vazia remove todos); no modo
+    'adicionar' apenas concede. Usuários fora do arquivo não são alterados.
+
+    O estado desejado vai para tabelas temporárias e a diferença é aplicada
+    com poucos comandos set-based em uma única transação.
+    """
+    cursor.execute("SHOW INDEX FROM permissions WHERE Key_name = 'unique_user_permission'")
+    if not cursor.fetchall():
+        print("❌ A tabela 'permissions' não tem o índice único por usuário.")
+        print("   Execute antes: python migrate.py")
+        return False
+    
+    module_lookup = load_module_lookup(cursor)
+    errors = []
+    desired = {}
+    lines = {}
+    module_rows = []
+    
+    for line_number, data in rows:
+        email = str(data.get('email') or '').strip().lower()
+        if data.get('_erro') or not email:
+            errors.append((line_number, email, data.get('_erro') or "Email é obrigatório"))
+            continue
+        if email in desired:
+            errors.append((line_number, email, "Email repetido"))
+            continue
+        
+        modulos = data.get('modulos')
+        replace_modules = mode == 'substituir' and modulos is not None
+        if isinstance(modulos, str):
+            modulos = [m for m in modulos.split(';') if m.strip()]
+        
+        module_ids = set()
+        unknown = [m for m in (modulos or []) if str(m).strip().lower() not in module_lookup]
+        if unknown:
+            errors.append((line_number, email, f"Módulo não encontrado: {', '.join(map(str, unknown))}"))
+            continue
+        for modulo in modulos or []:
+            module_ids.add(module_lookup[str(modulo).strip().lower()])
+        
+        lines[email] = line_number
+        desired[email] = (
+            email,
+            parse_optional_bool(data.get('cadastrar')),
+            parse_optional_bool(data.get('batepapo')),
+            replace_modules
+        )
+        module_rows.extend((email, module_id) for module_id in module_ids)
+    
+    started_at = time.perf_counter()
+    try:
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS sync_users")
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS sync_modules")
+        cursor.execute("""
+            CREATE TEMPORARY TABLE sync_users (
+                email VARCHAR(255) PRIMARY KEY,
+                cadastrar BOOLEAN NULL,
+                batepapo BOOLEAN NULL,
+                replace_modules BOOLEAN NOT NULL
+            ) DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+        cursor.execute("""
+            CREATE TEMPORARY TABLE sync_modules (
+                email VARCHAR(255) NOT NULL,
+                module_id INT NOT NULL,
+                PRIMARY KEY (email, module_id)
+            ) DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+        
+        desired_rows = list(desired.values())
+        for start in range(0, len(desired_rows), IMPORT_CHUNK_SIZE):
+            cursor.executemany(
+                "INSERT INTO sync_users (email, cadastrar, batepapo, replace_modules) VALUES (%s, %s, %s, %s)",
+                desired_rows[start:start + IMPORT_CHUNK_SIZE]
+            )
+        for start in range(0, len(module_rows), IMPORT_CHUNK_SIZE):
+            cursor.executemany(
+                "INSERT INTO sync_modules (email, module_id) VALUES (%s, %s)",
+                module_rows[start:start + IMPORT_CHUNK_SIZE]
+            )
+        
+        # Emails que não existem em users
+        cursor.execute("""
+            SELECT s.email FROM sync_users s
+            LEFT JOIN users u ON u.email = s.email
+            WHERE u.id IS NULL
+        """)
+        for (email,) in cursor.fetchall():
+            errors.append((lines[email], email, "Email não cadastrado"))
+        
+        # Diferença em relação ao estado atual
+        cursor.execute("""
+            SELECT COUNT(*) FROM sync_users s
+            INNER JOIN users u ON u.email = s.email
+            LEFT JOIN permissions p ON p.user_id = u.id
+            WHERE p.id IS NULL
+               OR (s.cadastrar IS NOT NULL AND s.cadastrar <> p.cadastrar)
+               OR (s.batepapo IS NOT NULL AND s.batepapo <> p.batepapo)
+        """)
+        permission_changes = cursor.fetchall()[0][0]
+        
+        cursor.execute("""
+            SELECT COUNT(*) FROM sync_modules sm
+            INNER JOIN users u ON u.email = sm.email
+            LEFT JOIN module_access ma ON ma.user_id = u.id AND ma.module_id = sm.module_id
+            WHERE ma.id IS NULL
+        """)
+        grants = cursor.fetchall()[0][0]
+        
+        cursor.execute("""
+            SELECT COUNT(*) FROM module_access ma
+            INNER JOIN users u ON u.id = ma.user_id
+            INNER JOIN sync_users s ON s.email = u.email AND s.replace_modules
+            LEFT JOIN sync_modules sm ON sm.email = s.email AND sm.module_id = ma.module_id
+            WHERE sm.email IS NULL
+        """)
+        revokes = cursor.fetchall()[0][0]
+        
+        if not dry_run:
+            # SELECTs em tabela derivada evitam a ambiguidade JOIN ... ON / ON DUPLICATE KEY
+            cursor.execute("""
+                INSERT INTO permissions (user_id, cadastrar, batepapo)
+                SELECT user_id, COALESCE(novo_cadastrar, FALSE), COALESCE(novo_batepapo, FALSE) FROM (
+                    SELECT u.id AS user_id, s.cadastrar AS novo_cadastrar, s.batepapo AS novo_batepapo
+                    FROM sync_users s
+                    INNER JOIN users u ON u.email = s.email
+                ) AS desejado
+                ON DUPLICATE KEY UPDATE
+                    cadastrar = COALESCE(desejado.novo_cadastrar, permissions.cadastrar),
+                    batepapo = COALESCE(desejado.novo_batepapo, permissions.batepapo)
+            """)
+            cursor.execute("""
+                INSERT INTO module_access (user_id, module_id)
+                SELECT * FROM (
+                    SELECT u.id AS user_id, sm.module_id
+                    FROM sync_modules sm
+                    INNER JOIN users u ON u.email = sm.email
+                ) AS desejado
+                ON DUPLICATE KEY UPDATE module_id = module_access.module_id
+            """)
+            if mode == 'substituir':
+                cursor.execute("""
+                    DELETE ma FROM module_access ma
+                    INNER JOIN users u ON u.id = ma.user_id
+                    INNER JOIN sync_users s ON s.email = u.email AND s.replace_modules
+                    LEFT JOIN sync_modules sm ON sm.email = s.email AND sm.module_id = ma.module_id
+                    WHERE sm.email IS NULL
+                """)
+            conn.commit()
+        else:
+            conn.rollback()
+    except Error as e:
+        conn.rollback()
+        print(f"❌ Erro ao sincronizar acessos: {e}")
+        return False
+    finally:
+        try:
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS sync_users")
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS sync_modules")
+        except Error:
+            pass
+    
+    elapsed = time.perf_counter() - started_at
+    prefix = "Simulação" if dry_run else "✅ Sincronizado"
+    print(f"\n{prefix}: {len(desired)} usuário(s) no estado desejado em {elapsed:.2f}s")
+    print(f"   Permissões alteradas/criadas: {permission_changes}")
+    print(f"   Acessos a módulos concedidos: {grants}")
+    print(f"   Acessos a módulos removidos:  {revokes if mode == 'substituir' else 0}")
+    print_row_errors(errors, errors_path)
+    return not errors
+
+def run_batched(cursor, conn, sql, params, batch_size=OFFBOARD_BATCH_SIZE, pause=0):
+    """
+    Repete um DELETE/UPDATE com LIMIT em transações curtas até afetar menos
+    que batch_size linhas. Deadlock, lock wait e conexão perdida repetem só o
+    lote atual. Retorna o total de linhas afetadas.
+    """
+    total = 0
+    while True:
+        for attempt in range(db.MAX_RETRIES + 1):
+            try:
+                cursor.execute(f"{sql} LIMIT %s", (*params, batch_size))
+                affected = cursor.rowcount
+                conn.commit()
+                break
+            except Error as e:
+                if attempt >= db.MAX_RETRIES or not db.is_transient(e):
+                    conn.rollback()
+                    raise
+                conn.ping(reconnect=True, attempts=2, delay=db.RETRY_DELAY)
+                time.sleep(db.RETRY_DELAY * 2 ** attempt)
+        total += affected
+        if affected < batch_size:
+            return total
+        if pause:
+            time.sleep(pause)
+
+def has_active_column(cursor):
+    """True se a coluna users.ativo já existe (migração 0004)"""
+    cursor.execute("SHOW COLUMNS FROM users LIKE 'ativo'")
+    return bool(cursor.fetchall())
+
+def resolve_offboard_users(cursor, rows, errors):
+    """Busca (id, email, grupo) dos emails informados; desconhecidos entram em errors"""
+    wanted = {}
+    for line_number, data in rows:
+        email = str(data.get('email') or '').strip().lower()
+        if data.get('_erro') or not email:
+            errors.append((line_number, email, data.get('_erro') or "Email é obrigatório"))
+        elif email not in wanted:
+            wanted[email] = line_number
+    
+    users = []
+    emails = list(wanted)
+    for start in range(0, len(emails), IMPORT_CHUNK_SIZE):
+        chunk = emails[start:start + IMPORT_CHUNK_SIZE]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"SELECT id, email, grupo FROM users WHERE email IN ({placeholders})", chunk)
+        for user_id, email, grupo in cursor.fetchall():
+            users.append((user_id, email, grupo))
+            wanted.pop(email.lower(), None)
+    
+    for email, line_number in wanted.items():
+        errors.append((line_number, email, "Email não cadastrado"))
+    return users
+
+def has_message_archive(cursor):
+    """True se a tabela chat_messages_archive já existe (migração 0011)"""
+    cursor.execute("SHOW TABLES LIKE 'chat_messages_archive'")
+    return bool(cursor.fetchall())
+
+def count_offboard_rows(cursor, user_ids):
+    """Quantidade de linhas dependentes por tabela (para simulação/confirmação)"""
+    counts = dict.fromkeys(OFFBOARD_TABLES, 0)
+    with_archive = has_message_archive(cursor)
+    for start in range(0, len(user_ids), IMPORT_CHUNK_SIZE):
+        chunk = user_ids[start:start + IMPORT_CHUNK_SIZE]
+        ids = ', '.join(['%s'] * len(chunk))
+        # Mensagens arquivadas (python archive.py) contam junto com as da tabela ativa
+        archived = f"""
+                + (SELECT COUNT(*) FROM chat_messages_archive m
+                   INNER JOIN chat_conversations c ON c.id = m.conversation_id
+                   WHERE c.user_id IN ({ids}))""" if with_archive else ""
+        cursor.execute(f"""
+            SELECT
+                (SELECT COUNT(*) FROM chat_conversations WHERE user_id IN ({ids})),
+                (SELECT COUNT(*) FROM chat_messages m
+                 INNER JOIN chat_conversations c ON c.id = m.conversation_id
+                 WHERE c.user_id IN ({ids})){archived},
+                (SELECT COUNT(*) FROM chat_feedback WHERE user_id IN ({ids})),
+                (SELECT COUNT(*) FROM knowledge_base WHERE created_by IN ({ids}))
+        """, chunk * (5 if with_archive else 4))
+        for table, count in zip(OFFBOARD_TABLES, cursor.fetchone()):
+            counts[table] += count or 0
+    return counts
+
+def disable_users(cursor, conn, user_ids):
+    """Desativa (bloqueia o login) em lotes curtos"""
+    disabled = 0
+    for start in range(0, len(user_ids), IMPORT_CHUNK_SIZE):
+        chunk = user_ids[start:start + IMPORT_CHUNK_SIZE]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"UPDATE users SET ativo = FALSE WHERE id IN ({placeholders})", chunk)
+        disabled += cursor.rowcount
+        conn.commit()
+    return disabled
+
+def delete_user_data(cursor, conn, user_ids, totals, transfer_to=None, batch_size=OFFBOARD_BATCH_SIZE, pause=0):
+    """
+    Remove os dados de um grupo de usuários, da folha para a raiz, em lotes:
+    mensagens (também as arquivadas) e feedbacks de cada bloco de conversas, as conversas, os
+    feedbacks restantes, a base de conhecimento (ou transfere a autoria) e por
+    fim os próprios usuários. Nenhum comando deixa o CASCADE apagar muitas
+    linhas de uma vez.
+    """
+    ids = ', '.join(['%s'] * len(user_ids))
+    message_tables = ['chat_messages', 'chat_messages_archive'] if has_message_archive(cursor) else ['chat_messages']
+    
+    last_id = 0
+    while True:
+        cursor.execute(
+            f"SELECT id FROM chat_conversations WHERE user_id IN ({ids}) AND id > %s ORDER BY id LIMIT %s",
+            (*user_ids, last_id, OFFBOARD_CONVERSATIONS_PER_STEP)
+        )
+        conversation_ids = [row[0] for row in cursor.fetchall()]
+        conn.commit()
+        if not conversation_ids:
+            break
+        last_id = conversation_ids[-1]
+        conversations = ', '.join(['%s'] * len(conversation_ids))
+        
+        for table in message_tables:
+            totals['chat_messages'] += run_batched(
+                cursor, conn, f"DELETE FROM {table} WHERE conversation_id IN ({conversations})",
+                conversation_ids, batch_size, pause
+            )
+        totals['chat_feedback'] += run_batched(
+            cursor, conn, f"DELETE FROM chat_feedback WHERE conversation_id IN ({conversations})",
+            conversation_ids, batch_size, pause
+        )
+        totals['chat_conversations'] += run_batched(
+            cursor, conn, f"DELETE FROM chat_conversations WHERE id IN ({conversations})",
+            conversation_ids, batch_size, pause
+        )
+    
+    totals['chat_feedback'] += run_batched(
+        cursor, conn, f"DELETE FROM chat_feedback WHERE user_id IN ({ids})", user_ids, batch_size, pause
+    )
+    
+    if transfer_to:
+        totals['knowledge_base'] += run_batched(
+            cursor, conn, f"UPDATE knowledge_base SET created_by = %s WHERE created_by IN ({ids})",
+            (transfer_to, *user_ids), batch_size, pause
+        )
+    else:
+        totals['attachments'] += run_batched(
+            cursor, conn,
+            f"DELETE FROM attachments WHERE knowledge_id IN (SELECT id FROM knowledge_base WHERE created_by IN ({ids}))",
+            user_ids, batch_size, pause
+        )
+        totals['knowledge_base'] += run_batched(
+            cursor, conn, f"DELETE FROM knowledge_base WHERE created_by IN ({ids})", user_ids, batch_size, pause
+        )
+    
+    # permissions e module_access (poucas linhas por usuário) saem pelo CASCADE
+    totals['users'] += run_batched(cursor, conn, f"DELETE FROM users WHERE id IN ({ids})", user_ids, batch_size, pause)
+
+def offboard_users(cursor, conn, rows=None, only_inactive=False, disable_only=False, disable_first=True,
+                   batch_size=OFFBOARD_BATCH_SIZE, pause=0, transfer_email=None, dry_run=False,
+                   confirm=True, errors_path=None):
+    """
+    Desligamento em lote. Os usuários (linhas com email, ou todos os já
+    desativados com only_inactive) são primeiro desativados, o que bloqueia o
+    login na hora. Em seguida, a menos que disable_only, seus dados são
+    apagados em lotes de batch_size linhas com commit a cada lote, sem
+    transações longas que travem os outros usuários do banco.
+    """
+    errors = []
+    active_column = has_active_column(cursor)
+    if (only_inactive or disable_only) and not active_column:
+        print("❌ A tabela 'users' não tem a coluna 'ativo'.")
+        print("   Execute antes: python migrate.py")
+        return False
+    
+    if only_inactive:
+        cursor.execute("SELECT id, email, grupo FROM users WHERE ativo = FALSE ORDER BY id")
+        users = cursor.fetchall()
+    else:
+        users = resolve_offboard_users(cursor, rows, errors)
+    print_row_errors(errors, errors_path)
+    
+    if not users:
+        print("Nenhum usuário para desligar.")
+        return not errors
+    
+    user_ids = [user[0] for user in users]
+    target_ids = set(user_ids)
+    
+    transfer_to = None
+    if transfer_email:
+        cursor.execute("SELECT id FROM users WHERE email = %s", (transfer_email.strip().lower(),))
+        row = cursor.fetchone()
+        if not row or row[0] in target_ids:
+            print(f"❌ Usuário para receber a base de conhecimento inválido: {transfer_email}")
+            return False
+        transfer_to = row[0]
+    
+    cursor.execute("SELECT COUNT(*) FROM users WHERE grupo = 'adm'")
+    admins = cursor.fetchone()[0]
+    if admins and sum(1 for user in users if user[2] == 'adm') >= admins:
+        print("❌ A operação removeria todos os administradores. Operação cancelada.")
+        return False
+    
+    counts = count_offboard_rows(cursor, user_ids)
+    conn.commit()
+    print(f"\n{len(users)} usuário(s) selecionado(s):")
+    for table, count in counts.items():
+        print(f"   {table:<20} {count}")
+    if not transfer_to and counts['knowledge_base']:
+        print("   ⚠️  A base de conhecimento criada por eles será excluída (use --transferir-conhecimento)")
+    
+    if dry_run:
+        print("\n✓ Simulação concluída. Nenhuma alteração foi gravada.")
+        return not errors
+    
+    if confirm:
+        action = 'DESATIVAR' if disable_only else 'EXCLUIR'
+        if input(f"\nDigite '{action}' para confirmar: ").strip() != action:
+            print("Operação cancelada.")
+            return False
+    
+    started_at = time.perf_counter()
+    if active_column and not only_inactive and (disable_first or disable_only):
+        print(f"✓ {disable_users(cursor, conn, user_ids)} usuário(s) desativado(s)")
+    if disable_only:
+        print("  Para excluir depois (fora do horário de pico): python app.py desligar --inativos")
+        return not errors
+    
+    totals = dict.fromkeys(OFFBOARD_TABLES + ('attachments', 'users'), 0)
+    progress = Progress(len(user_ids), "Excluindo")
+    for start in range(0, len(user_ids), OFFBOARD_USERS_PER_STEP):
+        chunk = user_ids[start:start + OFFBOARD_USERS_PER_STEP]
+        delete_user_data(cursor, conn, chunk, totals, transfer_to, batch_size, pause)
+        progress.advance(len(chunk))
+    progress.finish()
+    
+    elapsed = time.perf_counter() - started_at
+    print(f"\n✅ Desligamento concluído em {elapsed:.1f}s:")
+    for table, count in totals.items():
+        label = 'transferidos' if table == 'knowledge_base' and transfer_to else 'removidos'
+        print(f"   {table:<20} {count} {label}")
+    return not errors
+
+def offboard_users_menu(cursor, conn):
+    """Desligamento em lote a partir do menu interativo"""
+    print("\n--- DESLIGAR USUÁRIOS EM LOTE ---\n")
+    print("Arquivo CSV/JSONL com a coluna email (vazio = excluir os já desativados)\n")
+    path = input("Caminho do arquivo: ").strip().strip('"')
+    if path and not os.path.exists(path):
+        print(f"❌ Arquivo não encontrado: {path}")
+        return
+    disable_only = bool(path) and input("Apenas desativar agora e excluir depois? (s/N): ").strip().lower() == 's'
+    transfer_email = input("Transferir a base de conhecimento para o email (vazio = excluir): ").strip() or None
+    offboard_users(
+        cursor, conn,
+        rows=iter_import_rows(path) if path else None,
+        only_inactive=not path,
+        disable_only=disable_only,
+        transfer_email=transfer_email
+    )
+
+def last_exported_id(path, fmt):
+    """
+    Último id gravado em um export sem compressão. Uma linha final
+    incompleta (export interrompido) é descartada do arquivo.
+    """
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 65536))
+        tail = f.read()
+        complete = tail.rfind(b'\n') + 1
+        if complete < len(tail):
+            f.truncate(size - len(tail) + complete)
+    
+    lines = tail[:complete].decode('utf-8', errors='ignore').splitlines()
+    if not lines:
+        return None
+    try:
+        if fmt == 'jsonl':
+            return int(json.loads(lines[-1])['id'])
+        return int(next(csv.reader([lines[-1]]))[0])
+    except (ValueError, KeyError, IndexError, StopIteration):
+        return None  # Só o cabeçalho
+
+def iter_export_rows(cursor, filters=None, after_id=0, fetch_size=EXPORT_FETCH_SIZE):
+    """
+    Gera lotes de usuários com permissões e módulos em ordem de id, de uma
+    única consulta lida com fetchmany do cursor não bufferizado: o MySQL
+    envia as linhas conforme são consumidas e a memória fica constante.
+    """
+    clauses, params = filters or ([], [])
+    clauses = list(clauses) + ["u.id > %s"]
+    active = "u.ativo" if has_active_column(cursor) else "1"
+    
+    cursor.execute("SET SESSION group_concat_max_len = 1048576")
+    cursor.execute(f"""
+        SELECT u.id, u.nome, u.email, u.grupo, {active} as ativo,
+               COALESCE(p.cadastrar, 0) as cadastrar,
+               COALESCE(p.batepapo, 0) as batepapo,
+               (SELECT GROUP_CONCAT(m.nome ORDER BY m.nome SEPARATOR ';')
+                FROM module_access ma
+                INNER JOIN modules m ON m.id = ma.module_id
+                WHERE ma.user_id = u.id) as modulos,
+               u.created_at
+        FROM users u
+        LEFT JOIN permissions p ON u.id = p.user_id
+        WHERE {' AND '.join(clauses)}
+        ORDER BY u.id
+    """, list(params) + [after_id])
+    
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            return
+        yield rows
+
+def export_users(cursor, path, filters=None, after_id=0, resume=False, fmt=None):
+    """
+    Exporta usuários, permissões e módulos para CSV ou JSONL (gzip quando o
+    arquivo termina em .gz). As colunas são as mesmas aceitas por
+    sincronizar-acessos. Com resume, continua um export sem compressão a
+    partir do último id gravado.
+    """
+    fmt = fmt or file_format(path)
+    append = False
+    if resume and os.path.exists(path):
+        if path.lower().endswith('.gz'):
+            print("❌ --continuar não funciona com .gz; use --a-partir-de com o último id exibido")
+            return False
+        last_id = last_exported_id(path, fmt)
+        append = True
+        after_id = max(after_id, last_id or 0)
+        print(f"Continuando {path} após o id {after_id}")
+    
+    clauses, params = filters or ([], [])
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM users u
+        LEFT JOIN permissions p ON u.id = p.user_id
+        WHERE {' AND '.join(list(clauses) + ['u.id > %s'])}
+    """, list(params) + [after_id])
+    total = cursor.fetchone()[0]
+    
+    progress = Progress(total, "Exportando")
+    exported = 0
+    last_id = after_id
+    try:
+        with open_text(path, 'a' if append else 'w', encoding='utf-8', newline='') as f:
+            writer = None
+            if fmt == 'csv':
+                writer = csv.writer(f)
+                if not append:
+                    writer.writerow(EXPORT_COLUMNS)
+            
+            for rows in iter_export_rows(cursor, filters, after_id):
+                for row in rows:
+                    user_id, nome, email, grupo, ativo, cadastrar, batepapo, modulos, created_at = row
+                    created_at = created_at.isoformat() if hasattr(created_at, 'isoformat') else created_at
+                    if writer:
+                        writer.writerow([user_id, nome, email, grupo, int(bool(ativo)), int(bool(cadastrar)),
+                                         int(bool(batepapo)), modulos or '', created_at])
+                    else:
+                        f.write(json.dumps({
+                            'id': user_id, 'nome': nome, 'email': email, 'grupo': grupo,
+                            'ativo': bool(ativo), 'cadastrar': bool(cadastrar), 'batepapo': bool(batepapo),
+                            'modulos': modulos.split(';') if modulos else [], 'criado_em': created_at
+                        }, ensure_ascii=False) + "\n")
+                f.flush()
+                exported += len(rows)
+                last_id = rows[-1][0]
+                progress.advance(len(rows))
+    except KeyboardInterrupt:
+        progress.finish()
+        print(f"\n⚠️  Export interrompido após o id {last_id} ({exported} usuário(s) gravados).")
+        print("   Para continuar: --continuar (sem .gz) ou --a-partir-de", last_id)
+        return False
+    progress.finish()
+    
+    print(f"\n✅ {exported} usuário(s) exportado(s) para {path} (último id: {last_id})")
+    return True
+
+def export_users_menu(cursor, conn):
+    """Exportação a partir do menu interativo"""
+    print("\n--- EXPORTAR USUÁRIOS (CSV/JSONL) ---\n")
+    path = input("Arquivo de saída (.csv, .jsonl, opcionalmente .gz): ").strip().strip('"')
+    if not path:
+        return
+    export_users(cursor, path, resume=os.path.exists(path) and not path.lower().endswith('.gz')
+                 and input("Arquivo já existe. Continuar de onde parou? (s/N): ").strip().lower() == 's')
+
+def import_users_menu(cursor, conn):
+    """Importação em lote a partir do menu interativo"""
+    print("\n--- IMPORTAR USUÁRIOS (CSV/JSONL) ---\n")
+    print("Colunas: nome, email, senha, grupo, cadastrar, batepapo, modulos (separados por ';')\n")
+    path = input("Caminho do arquivo: ").strip().strip('"')
+    if not path:
+        return
+    import_users(cursor, conn, path)
+
+def run_menu_action(action, with_conn=True):
+    """
+    Executa uma ação do menu com uma conexão do pool, já testada com ping.
+    A conexão é devolvida ao pool ao final, então o menu pode ficar ocioso
+    por horas sem esbarrar no wait_timeout do MySQL.
+    """
+    try:
+        with db.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                if with_conn:
+                    action(cursor, conn)
+                else:
+                    action(cursor)
+            finally:
+                cursor.close()
+    except Error as e:
+        print(f"❌ Erro de banco de dados: {e}")
+
 def main_menu():
     """Menu principal do aplicativo"""
     conn = get_connection()
@@ -376,8 +1583,18 @@ def main_menu():
         print("Não foi possível conectar ao banco de dados.")
         print("Verifique as configurações no arquivo .env")
         sys.exit(1)
+    conn.close()
     
-    cursor = conn.cursor()
+    actions = {
+        '1': (list_users_menu, False),
+        '2': (create_user, True),
+        '3': (edit_user, True),
+        '4': (delete_user, True),
+        '5': (reset_password, True),
+        '6': (import_users_menu, True),
+        '7': (offboard_users_menu, True),
+        '8': (export_users_menu, True),
+    }
     
     while True:
         clear_screen()
@@ -390,39 +1607,18 @@ def main_menu():
         print("3. Editar usuário")
         print("4. Excluir usuário")
         print("5. Resetar senha")
+        print("6. Importar usuários (CSV/JSONL)")
+        print("7. Desligar usuários em lote")
+        print("8. Exportar usuários (CSV/JSONL)")
         print("0. Sair")
         print("-" * 30)
         
         opcao = input("\nEscolha uma opção: ").strip()
         
-        if opcao == '1':
-            clear_screen()
-            print_header()
-            list_users(cursor)
-            input("\nPressione Enter para continuar...")
-            
-        elif opcao == '2':
+        if opcao in actions:
             clear_screen()
             print_header()
-            create_user(cursor, conn)
-            input("\nPressione Enter para continuar...")
-            
-        elif opcao == '3':
-            clear_screen()
-            print_header()
-            edit_user(cursor, conn)
-            input("\nPressione Enter para continuar...")
-            
-        elif opcao == '4':
-            clear_screen()
-            print_header()
-            delete_user(cursor, conn)
-            input("\nPressione Enter para continuar...")
-            
-        elif opcao == '5':
-            clear_screen()
-            print_header()
-            reset_password(cursor, conn)
+            run_menu_action(*actions[opcao])
             input("\nPressione Enter para continuar...")
             
         elif opcao == '0':
@@ -432,12 +1628,140 @@ def main_menu():
         else:
             print("\n❌ Opção inválida!")
             input("Pressione Enter para continuar...")
+
+def run_cli(argv):
+    """Modo não interativo (ex.: python app.py importar usuarios.csv)"""
+    parser = argparse.ArgumentParser(description="Gerenciador de usuários da Base de Conhecimento")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
     
-    cursor.close()
-    conn.close()
+    importar = subparsers.add_parser('importar', help="Importa usuários de um arquivo CSV ou JSONL")
+    importar.add_argument('arquivo', help="Arquivo .csv ou .jsonl")
+    importar.add_argument('--lote', type=int, default=IMPORT_CHUNK_SIZE, help="Usuários por transação")
+    importar.add_argument('--simular', action='store_true', help="Apenas valida, sem gravar")
+    importar.add_argument('--erros', default=None, help="Grava os erros por linha neste CSV")
+    importar.add_argument('--workers', type=int, default=HASH_WORKERS, help="Processos de hash (0 = núcleos - 1)")
+    
+    resetar = subparsers.add_parser('resetar-senhas', help="Redefine senhas em lote (colunas email, senha)")
+    resetar.add_argument('arquivo', help="Arquivo .csv ou .jsonl")
+    resetar.add_argument('--lote', type=int, default=IMPORT_CHUNK_SIZE, help="Usuários por transação")
+    resetar.add_argument('--erros', default=None, help="Grava os erros por linha neste CSV")
+    resetar.add_argument('--workers', type=int, default=HASH_WORKERS, help="Processos de hash (0 = núcleos - 1)")
+    
+    listar = subparsers.add_parser('listar', help="Lista usuários com filtros (paginação por chave)")
+    listar.add_argument('--email', default=None, help="Prefixo do email")
+    listar.add_argument('--grupo', choices=['adm', 'user'])
+    listar.add_argument('--permissao', choices=USER_PERMISSIONS)
+    listar.add_argument('--modulo', default=None, help="Nome ou ID do módulo")
+    listar.add_argument('--ordem', choices=list(USER_SORT_COLUMNS), default='id')
+    listar.add_argument('--desc', action='store_true', help="Ordem decrescente")
+    listar.add_argument('--pagina', type=int, default=1000, help="Linhas buscadas por consulta")
+    
+    sincronizar = subparsers.add_parser(
+        'sincronizar-acessos',
+        help="Aplica permissões e módulos desejados (colunas email, cadastrar, batepapo, modulos)"
+    )
+    sincronizar.add_argument('arquivo', nargs='?', help="Arquivo .csv ou .jsonl com o estado desejado")
+    sincronizar.add_argument('--sql', default=None, help="SELECT que retorna as mesmas colunas (em vez do arquivo)")
+    sincronizar.add_argument('--modo', choices=['substituir', 'adicionar'], default='substituir',
+                             help="substituir: módulos ficam exatamente os informados; adicionar: só concede")
+    sincronizar.add_argument('--simular', action='store_true', help="Mostra a diferença sem gravar")
+    sincronizar.add_argument('--erros', default=None, help="Grava os erros por linha neste CSV")
+    
+    desligar = subparsers.add_parser(
+        'desligar',
+        help="Desativa e exclui usuários em lote (coluna email), apagando os dados em lotes curtos"
+    )
+    desligar.add_argument('arquivo', nargs='?', help="Arquivo .csv ou .jsonl com a coluna email")
+    desligar.add_argument('--inativos', action='store_true', help="Exclui os usuários já desativados (em vez do arquivo)")
+    desligar.add_argument('--apenas-desativar', action='store_true', help="Só bloqueia o login; exclua depois com --inativos")
+    desligar.add_argument('--sem-desativar', action='store_true', help="Não desativa antes de excluir")
+    desligar.add_argument('--lote', type=int, default=OFFBOARD_BATCH_SIZE, help="Linhas por DELETE")
+    desligar.add_argument('--pausa-ms', type=float, default=0, help="Pausa entre lotes (alivia réplicas e outros usuários)")
+    desligar.add_argument('--transferir-conhecimento', default=None, metavar='EMAIL',
+                          help="Transfere a base de conhecimento dos desligados para este usuário")
+    desligar.add_argument('--simular', action='store_true', help="Mostra o que seria removido, sem gravar")
+    desligar.add_argument('--sim', action='store_true', help="Não pede confirmação")
+    desligar.add_argument('--erros', default=None, help="Grava os erros por linha neste CSV")
+    
+    exportar = subparsers.add_parser('exportar', help="Exporta usuários, permissões e módulos (CSV/JSONL, .gz)")
+    exportar.add_argument('arquivo', help="Arquivo .csv, .jsonl, .csv.gz ou .jsonl.gz")
+    exportar.add_argument('--formato', choices=['csv', 'jsonl'], default=None, help="Padrão: pela extensão")
+    exportar.add_argument('--a-partir-de', type=int, default=0, metavar='ID', help="Exporta apenas ids maiores")
+    exportar.add_argument('--continuar', action='store_true', help="Continua um export interrompido (sem .gz)")
+    exportar.add_argument('--email', default=None, help="Prefixo do email")
+    exportar.add_argument('--grupo', choices=['adm', 'user'])
+    exportar.add_argument('--permissao', choices=USER_PERMISSIONS)
+    exportar.add_argument('--modulo', default=None, help="Nome ou ID do módulo")
+    
+    calibrar = subparsers.add_parser('calibrar-bcrypt', help="Mede este host e grava BCRYPT_COST no .env")
+    calibrar.add_argument('--alvo-ms', type=float, default=250, help="Tempo máximo por hash em ms")
+    calibrar.add_argument('--simular', action='store_true', help="Apenas mede, sem gravar no .env")
+    
+    args = parser.parse_args(argv)
+    
+    if args.comando == 'calibrar-bcrypt':
+        calibrate_bcrypt(args.alvo_ms, save=not args.simular)
+        return 0
+    
+    conn = get_connection()
+    if not conn:
+        print("Verifique as configurações no arquivo .env")
+        return 1
+    
+    cursor = conn.cursor()
+    try:
+        if args.comando == 'importar':
+            ok = import_users(cursor, conn, args.arquivo, args.lote, args.simular, args.erros, args.workers)
+        elif args.comando == 'listar':
+            filters = build_user_filters(args.email, args.grupo, args.permissao, args.modulo)
+            list_users(cursor, filters, args.ordem, args.desc, args.pagina, interactive=False)
+            ok = True
+        elif args.comando == 'sincronizar-acessos':
+            if bool(args.arquivo) == bool(args.sql):
+                print("❌ Informe um arquivo ou --sql (apenas um)")
+                return 1
+            if args.sql:
+                rows = list(iter_query_rows(cursor, args.sql))
+            elif not os.path.exists(args.arquivo):
+                print(f"❌ Arquivo não encontrado: {args.arquivo}")
+                return 1
+            else:
+                rows = iter_import_rows(args.arquivo)
+            ok = sync_access(cursor, conn, rows, args.modo, args.simular, args.erros)
+        elif args.comando == 'desligar':
+            if bool(args.arquivo) == args.inativos:
+                print("❌ Informe um arquivo ou --inativos (apenas um)")
+                return 1
+            if args.arquivo and not os.path.exists(args.arquivo):
+                print(f"❌ Arquivo não encontrado: {args.arquivo}")
+                return 1
+            ok = offboard_users(
+                cursor, conn,
+                rows=iter_import_rows(args.arquivo) if args.arquivo else None,
+                only_inactive=args.inativos,
+                disable_only=args.apenas_desativar,
+                disable_first=not args.sem_desativar,
+                batch_size=args.lote,
+                pause=args.pausa_ms / 1000,
+                transfer_email=args.transferir_conhecimento,
+                dry_run=args.simular,
+                confirm=not args.sim,
+                errors_path=args.erros
+            )
+        elif args.comando == 'exportar':
+            filters = build_user_filters(args.email, args.grupo, args.permissao, args.modulo)
+            ok = export_users(cursor, args.arquivo, filters, args.a_partir_de, args.continuar, args.formato)
+        elif args.comando == 'resetar-senhas':
+            ok = reset_passwords_bulk(cursor, conn, args.arquivo, args.lote, args.erros, args.workers)
+        return 0 if ok else 2
+    finally:
+        cursor.close()
+        conn.close()
 
 if __name__ == '__main__':
     try:
+        if len(sys.argv) > 1:
+            sys.exit(run_cli(sys.argv[1:]))
         main_menu()
     except KeyboardInterrupt:
         print("\n\nOperação cancelada pelo usuário.")
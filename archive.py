@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Arquivamento das mensagens do chat (chat_messages -> chat_messages_archive)
+
+chat_messages cresce sem limite e toda consulta de histórico e todo backup
+passam pela tabela inteira. As mensagens das conversas sem atividade há
+ARCHIVE_IDLE_DAYS dias vão para chat_messages_archive em lotes curtos. A
+aplicação lê as duas tabelas (src/lib/chat.ts), então uma conversa arquivada
+abre normalmente e pode voltar a receber mensagens: as novas ficam na tabela
+ativa até ela parar de novo.
+
+Cada lote é uma transação que também grava o ponto de parada
+(archive_checkpoints): a execução pode ser interrompida a qualquer momento e
+continua de onde parou, e cada execução só lê as conversas que ficaram
+paradas desde a anterior. Duas execuções ao mesmo tempo se revezam no lock
+do ponto de parada.
+
+Uso:
+    python archive.py arquivar                     # conversas paradas há ARCHIVE_IDLE_DAYS dias (padrão 90)
+    python archive.py arquivar --dias 30 --taxa 500
+    python archive.py arquivar --simular           # conta o que seria movido
+    python archive.py status                       # tamanho das tabelas e ponto de parada
+
+Para rodar todo dia (cron):
+    0 3 * * * cd /caminho/do/projeto && python archive.py arquivar
+"""
+
+from mysql.connector import Error
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+import db
+from app import Progress
+
+load_dotenv()
+
+# Dias sem mensagens para uma conversa ser arquivada
+ARCHIVE_IDLE_DAYS = int(os.getenv('ARCHIVE_IDLE_DAYS') or 90)
+
+# Conversas por transação e limite de mensagens movidas por segundo (0 = sem limite)
+ARCHIVE_BATCH_SIZE = 50
+ARCHIVE_RATE = 2000
+
+ARCHIVE_JOB = 'chat_messages'
+MESSAGE_COLUMNS = 'id, conversation_id, role, content, image_url, file_url, file_name, created_at'
+
+
+# ============================================================================
+# BANCO DE DADOS
+# ============================================================================
+
+def load_checkpoint(cursor, lock=True):
+    """(updated_at, id) da última conversa arquivada; FOR UPDATE serializa execuções simultâneas"""
+    cursor.execute(
+        f"SELECT ultimo_updated_at, ultimo_id FROM archive_checkpoints WHERE tarefa = %s{' FOR UPDATE' if lock else ''}",
+        (ARCHIVE_JOB,)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        raise RuntimeError("Ponto de parada não encontrado em archive_checkpoints (execute: python migrate.py)")
+    return row[0], row[1]
+
+def save_checkpoint(cursor, checkpoint, moved):
+    updated_at, last_id = checkpoint
+    cursor.execute(
+        """UPDATE archive_checkpoints
+           SET ultimo_updated_at = %s, ultimo_id = %s, mensagens = mensagens + %s
+           WHERE tarefa = %s""",
+        (updated_at, last_id, moved, ARCHIVE_JOB)
+    )
+
+def checkpoint_filter(checkpoint):
+    """Condição keyset (updated_at, id) depois do ponto de parada"""
+    updated_at, last_id = checkpoint
+    if updated_at is None:
+        return "", ()
+    return " AND (updated_at > %s OR (updated_at = %s AND id > %s))", (updated_at, updated_at, last_id)
+
+def count_idle_conversations(cursor, checkpoint, idle_days):
+    condition, params = checkpoint_filter(checkpoint)
+    cursor.execute(
+        f"SELECT COUNT(*) FROM chat_conversations WHERE updated_at < NOW() - INTERVAL %s DAY{condition}",
+        (idle_days, *params)
+    )
+    return cursor.fetchone()[0]
+
+def fetch_idle_conversations(cursor, checkpoint, idle_days, batch_size):
+    """Próximas conversas paradas, na ordem do índice de updated_at"""
+    condition, params = checkpoint_filter(checkpoint)
+    cursor.execute(
+        f"""SELECT id, updated_at FROM chat_conversations
+            WHERE updated_at < NOW() - INTERVAL %s DAY{condition}
+            ORDER BY updated_at, id LIMIT %s""",
+        (idle_days, *params, batch_size)
+    )
+    return cursor.fetchall()
+
+def move_messages(cursor, conversation_ids):
+    """
+    Copia as mensagens das conversas para o arquivo e apaga da tabela ativa.
+    O FOR UPDATE trava as mensagens (e o intervalo do índice) até o commit:
+    uma mensagem nova numa dessas conversas espera o lote e fica na tabela ativa.
+    """
+    placeholders = ', '.join(['%s'] * len(conversation_ids))
+    cursor.execute(f"SELECT id FROM chat_messages WHERE conversation_id IN ({placeholders}) FOR UPDATE",
+                   conversation_ids)
+    message_ids = [row[0] for row in cursor.fetchall()]
+    if message_ids:
+        messages = ', '.join(['%s'] * len(message_ids))
+        cursor.execute(
+            f"""INSERT INTO chat_messages_archive ({MESSAGE_COLUMNS})
+                SELECT {MESSAGE_COLUMNS} FROM chat_messages WHERE id IN ({messages})""",
+            message_ids
+        )
+        cursor.execute(f"DELETE FROM chat_messages WHERE id IN ({messages})", message_ids)
+    return len(message_ids)
+
+def count_messages(cursor, conversation_ids):
+    placeholders = ', '.join(['%s'] * len(conversation_ids))
+    cursor.execute(f"SELECT COUNT(*) FROM chat_messages WHERE conversation_id IN ({placeholders})",
+                   conversation_ids)
+    return cursor.fetchone()[0]
+
+def archive_batch(cursor, conn, idle_days, batch_size, checkpoint=None, dry_run=False):
+    """
+    Um lote (executado por db.run_in_transaction, que repete a transação
+    inteira em deadlock/conexão perdida): lê e trava o ponto de parada, move
+    as mensagens das próximas conversas paradas e grava o novo ponto.
+    Na simulação, o ponto de parada vem da execução (checkpoint) e nada é
+    gravado. Retorna (conversas, mensagens, ponto de parada).
+    """
+    if checkpoint is None:
+        checkpoint = load_checkpoint(cursor)
+    conversations = fetch_idle_conversations(cursor, checkpoint, idle_days, batch_size)
+    if not conversations:
+        return 0, 0, checkpoint
+
+    conversation_ids = [row[0] for row in conversations]
+    moved = count_messages(cursor, conversation_ids) if dry_run else move_messages(cursor, conversation_ids)
+    checkpoint = (conversations[-1][1], conversations[-1][0])
+    if not dry_run:
+        save_checkpoint(cursor, checkpoint, moved)
+    return len(conversations), moved, checkpoint
+
+
+# ============================================================================
+# COMANDOS
+# ============================================================================
+
+def archive_messages(cursor, conn, idle_days=ARCHIVE_IDLE_DAYS, batch_size=ARCHIVE_BATCH_SIZE,
+                     rate=ARCHIVE_RATE, restart=False, dry_run=False):
+    """
+    Arquiva as mensagens das conversas paradas há idle_days dias. rate limita
+    as mensagens movidas por segundo (pausa entre lotes) para não competir
+    com o chat; restart volta o ponto de parada ao início (revisita todas as
+    conversas paradas).
+    """
+    print(f"\n--- ARQUIVAR MENSAGENS (conversas paradas há {idle_days} dias)"
+          f"{' (simulação)' if dry_run else ''} ---\n")
+    if restart and not dry_run:
+        save_checkpoint(cursor, (None, 0), 0)
+        conn.commit()
+    checkpoint = (None, 0) if restart else load_checkpoint(cursor, lock=False)
+    total = count_idle_conversations(cursor, checkpoint, idle_days)
+    conn.commit()
+    if total == 0:
+        print("✓ Nenhuma conversa nova para arquivar")
+        return True
+
+    progress = Progress(total, "Simulando" if dry_run else "Arquivando")
+    conversations = moved = 0
+    while True:
+        batch_started_at = time.perf_counter()
+        done, batch_moved, checkpoint = db.run_in_transaction(
+            archive_batch, idle_days, batch_size,
+            checkpoint=checkpoint if dry_run else None, dry_run=dry_run
+        )
+        if not done:
+            break
+        conversations += done
+        moved += batch_moved
+        progress.advance(done)
+        if rate and batch_moved:
+            time.sleep(max(0.0, batch_moved / rate - (time.perf_counter() - batch_started_at)))
+    progress.finish()
+
+    elapsed = time.perf_counter() - progress.started_at
+    print()
+    if dry_run:
+        print(f"✓ Simulação: {moved} mensagem(ns) de {conversations} conversa(s) seriam arquivadas. Nada foi alterado.")
+    else:
+        print(f"✅ {moved} mensagem(ns) de {conversations} conversa(s) arquivadas em {elapsed:.1f}s")
+    return True
+
+def table_sizes(cursor, tables):
+    """{tabela: (linhas estimadas, MB)} pelo information_schema"""
+    placeholders = ', '.join(['%s'] * len(tables))
+    cursor.execute(
+        f"""SELECT TABLE_NAME, TABLE_ROWS, (DATA_LENGTH + INDEX_LENGTH) / 1048576
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({placeholders})""",
+        tables
+    )
+    return {name: (rows or 0, float(size or 0)) for name, rows, size in cursor.fetchall()}
+
+def show_status(cursor, conn, idle_days=ARCHIVE_IDLE_DAYS):
+    print("\n--- ARQUIVO DE MENSAGENS ---\n")
+    sizes = table_sizes(cursor, ['chat_messages', 'chat_messages_archive', 'chat_conversations'])
+    for table, (rows, size) in sizes.items():
+        print(f"   {table:<24} ~{rows} linha(s)  {size:.1f} MB")
+
+    cursor.execute(
+        "SELECT ultimo_updated_at, ultimo_id, mensagens, atualizado_em FROM archive_checkpoints WHERE tarefa = %s",
+        (ARCHIVE_JOB,)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        print("\n❌ Ponto de parada não encontrado (execute: python migrate.py)")
+        return False
+    updated_at, last_id, total, changed_at = row
+    print(f"\n   Ponto de parada: {updated_at or 'início'} (conversa {last_id}), "
+          f"{total} mensagem(ns) arquivada(s) no total, última execução: {changed_at}")
+    print(f"   Conversas paradas há {idle_days} dias aguardando: "
+          f"{count_idle_conversations(cursor, (updated_at, last_id), idle_days)}")
+    conn.commit()
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Arquivamento das mensagens do chat")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    archive = subparsers.add_parser('arquivar', help="Move as mensagens das conversas paradas para chat_messages_archive")
+    archive.add_argument('--dias', type=int, default=ARCHIVE_IDLE_DAYS, help=f"Dias sem atividade (padrão: {ARCHIVE_IDLE_DAYS})")
+    archive.add_argument('--lote', type=int, default=ARCHIVE_BATCH_SIZE, help=f"Conversas por transação (padrão: {ARCHIVE_BATCH_SIZE})")
+    archive.add_argument('--taxa', type=int, default=ARCHIVE_RATE, help=f"Máximo de mensagens por segundo, 0 = sem limite (padrão: {ARCHIVE_RATE})")
+    archive.add_argument('--do-inicio', action='store_true', help="Ignora o ponto de parada e revisita todas as conversas paradas")
+    archive.add_argument('--simular', action='store_true', help="Conta o que seria movido, sem gravar")
+
+    status = subparsers.add_parser('status', help="Tamanho das tabelas e ponto de parada")
+    status.add_argument('--dias', type=int, default=ARCHIVE_IDLE_DAYS, help=f"Dias sem atividade (padrão: {ARCHIVE_IDLE_DAYS})")
+
+    args = parser.parse_args(argv)
+    if args.dias < 1:
+        parser.error("--dias deve ser pelo menos 1")
+
+    try:
+        connection = db.get_connection()
+        cursor = connection.cursor()
+        if args.comando == 'status':
+            ok = show_status(cursor, connection, args.dias)
+        else:
+            ok = archive_messages(cursor, connection, idle_days=args.dias, batch_size=max(1, args.lote),
+                                  rate=max(0, args.taxa), restart=args.do_inicio, dry_run=args.simular)
+        return 0 if ok else 2
+
+    except (Error, RuntimeError) as e:
+        print(f"❌ Erro no banco de dados: {e}")
+        return 1
+
+    finally:
+        if 'connection' in locals():
+            cursor.close()
+            connection.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+AskForge AI - Benchmark do Cliente Desktop
+Mede os caminhos de renderização e rede do client.py contra o servidor mock
+(mock_server.py), que imita os endpoints /api/* usados pelo APIClient.
+
+Uso (Linux sem monitor):
+    xvfb-run -a python benchmark.py
+    python benchmark.py --xvfb --sizes 10 100 1000 --label minha-mudanca
+
+Cada medição vira uma linha JSON em benchmark_results.jsonl (commit, tamanho,
+tempo, widgets e RSS), permitindo comparar commits com --compare.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+from mock_server import MockState, start_server, make_messages, make_conversations
+
+BENCH_DIR = Path(__file__).parent
+RESULTS_FILE = BENCH_DIR / "benchmark_results.jsonl"
+DEFAULT_SIZES = [10, 100, 1000]
+SETTLE_TIMEOUT = 60  # Segundos esperando o carregamento das imagens
+
+
+# ============================================================================
+# MEDIÇÕES
+# ============================================================================
+
+def rss_kb():
+    """Memória residente atual do processo em KB (None se indisponível)"""
+    status_file = Path('/proc/self/status')
+    if status_file.exists():
+        for line in status_file.read_text().splitlines():
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        return None
+
+
+def git_commit():
+    """Commit atual (com sufixo -dirty se houver alterações)"""
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+        dirty = subprocess.check_output(
+            ['git', 'status', '--porcelain', '--', '.'], cwd=BENCH_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+        return f"{commit}-dirty" if dirty else commit
+    except Exception:
+        return None
+
+
+def pump_events(root, until, timeout=SETTLE_TIMEOUT):
+    """Processa eventos do Tk até until() ser verdadeiro; retorna se concluiu"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        root.update()
+        if until():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+class Benchmark:
+    """Executa os cenários e acumula os resultados"""
+
+    def __init__(self, client, root, chat_screen, state, repeat):
+        self.client = client
+        self.root = root
+        self.chat = chat_screen
+        self.state = state
+        self.repeat = repeat
+        self.results = []
+
+    def record(self, name, size, durations, **extra):
+        result = {
+            'benchmark': name,
+            'size': size,
+            'median_ms': round(statistics.median(durations), 2),
+            'min_ms': round(min(durations), 2),
+            'runs': len(durations),
+            'rss_kb': rss_kb()
+        }
+        result.update(extra)
+        self.results.append(result)
+
+        details = ' '.join(f"{k}={v}" for k, v in extra.items())
+        print(f"  {name:<26} n={size:<5} mediana={result['median_ms']:>9.2f} ms  "
+              f"min={result['min_ms']:>9.2f} ms  rss={result['rss_kb']} KB  {details}")
+
+    def timed(self, func):
+        durations = []
+        for _ in range(self.repeat):
+            started_at = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - started_at) * 1000)
+        return durations
+
+    def run_size(self, size):
+        client, chat = self.client, self.chat
+        self.state.set_conversations(make_conversations(size))
+        self.state.set_messages(1, make_messages(size))
+        print(f"\n▶ {size} mensagens / {size} conversas")
+
+        # Carregamento via HTTP (GET /api/chat/conversations/:id)
+        durations = self.timed(lambda: chat.api_client.get_conversation_messages(1))
+        data = chat.api_client.get_conversation_messages(1)
+        payload_kb = round(len(json.dumps(data)) / 1024, 1)
+        self.record('fetch_messages', size, durations, payload_kb=payload_kb)
+
+        chat.messages = data['messages']
+        chat.knowledge_attachments = data['all_knowledge_attachments']
+        chat._show_chat_area()
+
+        # Parsing do conteúdo (regex de imagens/anexos)
+        durations = self.timed(lambda: [chat._parse_message_content(m['content']) for m in chat.messages])
+        self.record('parse_message_content', size, durations)
+
+        # Lista de conversas da sidebar
+        chat.conversations = chat.api_client.get_conversations()
+        durations = self.timed(chat._update_conversation_list)
+        self.record('update_conversation_list', size, durations,
+                    widgets=client.count_widgets(chat.conv_list_frame))
+
+        # Renderização síncrona das bolhas, com o cache de imagens vazio em todas as rodadas:
+        # mede a montagem com os placeholders (o download das imagens fica fora da medição)
+        def render_cold():
+            chat.image_cache.clear()
+            chat._render_messages()
+
+        durations = self.timed(render_cold)
+        self.record('render_messages', size, durations,
+                    widgets=client.count_widgets(chat.messages_container))
+
+        # Renderização completa: espera o carregamento das imagens em background
+        expected_images = len({
+            part['url']
+            for m in chat.messages
+            for part in chat._parse_message_content(m['content'])
+            if part['type'] == 'image'
+        })
+
+        def render_settled():
+            chat.image_cache.clear()
+            chat._render_messages()
+            pump_events(self.root, lambda: len(chat.image_cache) >= expected_images)
+
+        if client.PILImage.available():
+            durations = self.timed(render_settled)
+            self.record('render_messages_settled', size, durations,
+                        widgets=client.count_widgets(chat.messages_container),
+                        images=len(chat.image_cache))
+
+        # Download + decodificação de imagem, com e sem cache
+        if client.PILImage.available():
+            def load_cold():
+                chat.image_cache.clear()
+                chat._load_image_from_url('/uploads/mock/0.png')
+
+            self.record('load_image_cold', size, self.timed(load_cold))
+            self.record('load_image_cached', size,
+                        self.timed(lambda: chat._load_image_from_url('/uploads/mock/0.png')))
+
+
+# ============================================================================
+# RESULTADOS
+# ============================================================================
+
+def save_results(results, path, label):
+    meta = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'label': label,
+        'python': platform.python_version(),
+        'platform': platform.platform()
+    }
+    with open(path, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps({**meta, **result}, ensure_ascii=False) + "\n")
+    print(f"\n✓ {len(results)} resultados gravados em {path}")
+
+
+def compare_results(results, baseline_path, baseline_ref):
+    """Compara com a última medição de baseline_ref (commit ou label) no arquivo"""
+    baseline = {}
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if baseline_ref in (None, record.get('commit'), record.get('label')):
+                baseline[(record['benchmark'], record['size'])] = record
+
+    if not baseline:
+        print(f"❌ Nenhuma medição de referência encontrada em {baseline_path}")
+        return
+
+    print(f"\n{'Benchmark':<26}{'N':>6}{'Antes ms':>12}{'Depois ms':>12}{'Δ %':>9}")
+    for result in results:
+        before = baseline.get((result['benchmark'], result['size']))
+        if not before or not before['median_ms']:
+            continue
+        delta = (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100
+        print(f"{result['benchmark']:<26}{result['size']:>6}{before['median_ms']:>12.2f}"
+              f"{result['median_ms']:>12.2f}{delta:>+9.1f}")
+
+
+# ============================================================================
+# ENTRY POINT
+# ============================================================================
+
+def start_xvfb():
+    """Inicia um Xvfb próprio quando não há DISPLAY (Linux)"""
+    if not shutil.which('Xvfb'):
+        print("❌ Sem DISPLAY e Xvfb não encontrado. Use: xvfb-run -a python benchmark.py")
+        sys.exit(1)
+
+    display = f":{90 + os.getpid() % 100}"
+    process = subprocess.Popen(['Xvfb', display, '-screen', '0', '1280x800x24', '-nolisten', 'tcp'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1)
+    os.environ['DISPLAY'] = display
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do cliente desktop AskForge")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Quantidade de mensagens/conversas por cenário")
+    parser.add_argument('--repeat', type=int, default=5, help="Repetições por medição")
+    parser.add_argument('--label', default=None, help="Rótulo livre gravado junto ao resultado")
+    parser.add_argument('--output', default=str(RESULTS_FILE), help="Arquivo JSONL de resultados")
+    parser.add_argument('--compare', nargs='?', const='', default=None, metavar='COMMIT_OU_LABEL',
+                        help="Compara com medições anteriores do arquivo de resultados")
+    parser.add_argument('--xvfb', action='store_true', help="Inicia um Xvfb se não houver DISPLAY")
+    args = parser.parse_args()
+
+    xvfb_process = None
+    if args.xvfb and sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        xvfb_process = start_xvfb()
+
+    sys.path.insert(0, str(BENCH_DIR))
+    import client
+
+    state = MockState(conversations=0)
+    server, base_url = start_server(state=state, no_auth=True)
+    try:
+        api_client = client.APIClient(base_url)
+        api_client.user = api_client.get_session_user()
+
+        root = client.ttk.Window(title="AskForge Benchmark", themename="cosmo", size=(1100, 700))
+        chat_screen = client.ChatScreen(
+            root,
+            api_client,
+            api_client.user,
+            lambda: None,
+            lambda: None,
+            initial_data=api_client.load_initial_data()
+        )
+        chat_screen.pack(fill=client.BOTH, expand=client.YES)
+        root.update()
+
+        print(f"AskForge benchmark — commit {git_commit()} — PIL {'sim' if client.PILImage.available() else 'não'}")
+        benchmark = Benchmark(client, root, chat_screen, state, args.repeat)
+        for size in args.sizes:
+            benchmark.run_size(size)
+
+        if args.compare is not None and Path(args.output).exists():
+            compare_results(benchmark.results, args.output, args.compare or None)
+        save_results(benchmark.results, args.output, args.label)
+
+        root.destroy()
+    finally:
+        server.shutdown()
+        if xvfb_process:
+            xvfb_process.terminate()
+
+
+if __name__ == '__main__':
+    main()
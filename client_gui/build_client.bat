@@ -29,12 +29,21 @@ echo.
 echo [2/3] Gerando executável...
 
 REM Gera o executável
+REM Módulos opcionais são importados sob demanda (LazyImport), por isso
+REM precisam ser declarados como hidden-import para o PyInstaller
 pyinstaller --noconfirm --onefile --windowed ^
     --name "AskForge-AI" ^
     --icon "icon.png" ^
     --add-data "icon.png;." ^
     --hidden-import "pystray._win32" ^
     --hidden-import "PIL._tkinter_finder" ^
+    --hidden-import "PIL.Image" ^
+    --hidden-import "PIL.ImageTk" ^
+    --hidden-import "pystray" ^
+    --hidden-import "keyboard" ^
+    --hidden-import "winotify" ^
+    --hidden-import "ttkbootstrap.dialogs" ^
+    --hidden-import "ttkbootstrap.toast" ^
     client.py
 
 if errorlevel 1 (
@@ -5,14 +5,22 @@ AskForge-AI Desktop Client
 Cliente desktop para o sistema de Base de Conhecimento
 """
 
+import time
+
+# Marco zero do perfil de inicialização (--profile-startup)
+_PROCESS_START = time.perf_counter()
+
 import os
 import sys
 import json
 import re
 import io
+import importlib
 import threading
+import collections
 import webbrowser
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from urllib.parse import urlparse
@@ -20,44 +28,62 @@ from urllib.parse import urlparse
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 # ScrolledFrame removido - usando Canvas padrão
-from ttkbootstrap.dialogs import Messagebox
 from tkinter import PhotoImage
 import tkinter as tk
 
+
+class LazyImport:
+    """
+    Adia a importação de um módulo (ou de um atributo dele) até o primeiro uso.
+    Dependências opcionais ou usadas só depois do login não atrasam a primeira
+    pintura da janela. available() indica se a importação é possível.
+    """
+    
+    def __init__(self, module_name, attribute=None):
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+        self._failed = False
+    
+    def _load(self):
+        if self._target is None and not self._failed:
+            started_at = time.perf_counter()
+            try:
+                target = importlib.import_module(self._module_name)
+                if self._attribute:
+                    target = getattr(target, self._attribute)
+                self._target = target
+            except (ImportError, AttributeError):
+                self._failed = True
+            startup_profiler.record_import(self._module_name, (time.perf_counter() - started_at) * 1000)
+        return self._target
+    
+    def available(self):
+        return self._load() is not None
+    
+    def __getattr__(self, name):
+        target = self._load()
+        if target is None:
+            raise ImportError(f"Módulo opcional '{self._module_name}' não está instalado")
+        return getattr(target, name)
+
+
+# Diálogos do ttkbootstrap (só usados após interação do usuário)
+Messagebox = LazyImport('ttkbootstrap.dialogs', 'Messagebox')
+
 # Para system tray e imagens
-try:
-    import pystray
-    from PIL import Image as PILImage, ImageTk
-    TRAY_AVAILABLE = True
-    PIL_AVAILABLE = True
-except ImportError:
-    TRAY_AVAILABLE = False
-    PIL_AVAILABLE = False
-    PILImage = None
-    ImageTk = None
+pystray = LazyImport('pystray')
+PILImage = LazyImport('PIL.Image')
+ImageTk = LazyImport('PIL.ImageTk')
 
 # Para hotkey global
-try:
-    import keyboard
-    KEYBOARD_AVAILABLE = True
-except ImportError:
-    KEYBOARD_AVAILABLE = False
+keyboard = LazyImport('keyboard')
 
 # Para notificações toast (usando ttkbootstrap)
-try:
-    from ttkbootstrap.toast import ToastNotification
-    TOAST_AVAILABLE = True
-except ImportError:
-    TOAST_AVAILABLE = False
-    ToastNotification = None
+ttk_toast = LazyImport('ttkbootstrap.toast')
 
 # Para notificações Windows com callback de clique
-try:
-    from winotify import Notification, audio
-    WINOTIFY_AVAILABLE = True
-except ImportError:
-    WINOTIFY_AVAILABLE = False
-    Notification = None
+winotify = LazyImport('winotify')
 
 # Para instância única
 import ctypes
@@ -72,10 +98,90 @@ APP_NAME = "AskForge-AI"
 APP_VERSION = "1.0.0"
 CONFIG_DIR = Path(os.getenv('APPDATA', os.path.expanduser('~'))) / APP_NAME
 CONFIG_FILE = CONFIG_DIR / "config.json"
+SESSION_FILE = CONFIG_DIR / "session.json"  # Cookie da sessão (só com "Salvar credenciais")
 DEFAULT_HOTKEY = "ctrl+k"
+DEFAULT_QUICK_ASK_HOTKEY = "ctrl+shift+k"
+KEEP_ALIVE_INTERVAL_MS = 60000  # Mantém a conexão HTTP aquecida para a pergunta rápida
 SINGLE_INSTANCE_MUTEX_NAME = "AskForgeAI_SingleInstance_Mutex"
 
 
+class StartupProfiler:
+    """
+    Mede as fases da inicialização (imports, config, conexão, login, primeira
+    pintura). Os tempos são sempre coletados; só são impressos e gravados em
+    startup_profile.jsonl quando o app é iniciado com --profile-startup.
+    """
+    
+    def __init__(self, origin):
+        self.enabled = False
+        self.origin = origin
+        self.last_mark = origin
+        self.phases = []
+        self.lazy_imports = []
+        self.reported = False
+    
+    def _add(self, name, duration_ms):
+        at_ms = (time.perf_counter() - self.origin) * 1000
+        self.phases.append({'phase': name, 'ms': round(duration_ms, 1), 'at_ms': round(at_ms, 1)})
+        if self.enabled:
+            print(f"[startup] {name:<18} {duration_ms:8.1f} ms  (t={at_ms:.1f} ms)")
+    
+    def mark(self, name):
+        """Registra uma fase que vai do último marco até agora"""
+        now = time.perf_counter()
+        self._add(name, (now - self.last_mark) * 1000)
+        self.last_mark = now
+    
+    def phase(self, name):
+        """Context manager que mede uma fase isolada"""
+        profiler = self
+        
+        class _Phase:
+            def __enter__(self):
+                self.started_at = time.perf_counter()
+                return self
+            
+            def __exit__(self, *exc):
+                now = time.perf_counter()
+                profiler._add(name, (now - self.started_at) * 1000)
+                profiler.last_mark = now
+                return False
+        
+        return _Phase()
+    
+    def record_import(self, module_name, duration_ms):
+        self.lazy_imports.append({'module': module_name, 'ms': round(duration_ms, 1)})
+    
+    def report(self):
+        """Imprime o resumo e grava uma linha em startup_profile.jsonl"""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        
+        total_ms = (time.perf_counter() - self.origin) * 1000
+        print("[startup] " + "-" * 40)
+        for item in self.lazy_imports:
+            print(f"[startup] import tardio {item['module']:<22} {item['ms']:8.1f} ms")
+        print(f"[startup] total até tela de chat  {total_ms:8.1f} ms")
+        
+        try:
+            CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+            with open(CONFIG_DIR / "startup_profile.jsonl", 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    'timestamp': datetime.now().isoformat(),
+                    'version': APP_VERSION,
+                    'total_ms': round(total_ms, 1),
+                    'phases': self.phases,
+                    'lazy_imports': self.lazy_imports
+                }, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"Erro ao gravar perfil de inicialização: {e}")
+
+
+startup_profiler = StartupProfiler(_PROCESS_START)
+startup_profiler.mark('imports')
+
+
 def get_config_path():
     """Retorna o caminho do arquivo de configuração"""
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
@@ -307,6 +413,163 @@ def save_config(config):
         json.dump(config, f, indent=2, ensure_ascii=False)
 
 
+# ============================================================================
+# TELEMETRIA
+# ============================================================================
+
+TELEMETRY_LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+TELEMETRY_CAPACITY = 5000  # Eventos mantidos no ring buffer
+
+
+class Telemetry:
+    """
+    Eventos estruturados e métricas de desempenho do cliente.
+    Os eventos ficam em um ring buffer em memória e podem ser exportados como
+    JSONL. Abaixo do nível configurado, event() retorna antes de montar
+    qualquer registro, então a instrumentação não custa nada desabilitada.
+    Métricas (HTTP, renderização, imagens) usam o nível 'info'.
+    """
+    
+    def __init__(self, level='warning', capacity=TELEMETRY_CAPACITY):
+        self.events = collections.deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.echo = False  # Também imprime no console (--debug)
+        self.set_level(level)
+    
+    def set_level(self, level):
+        self.level_name = level if level in TELEMETRY_LEVELS else 'warning'
+        self.level = TELEMETRY_LEVELS[self.level_name]
+    
+    def enabled_for(self, level):
+        return TELEMETRY_LEVELS[level] >= self.level
+    
+    def event(self, level, name, **fields):
+        if TELEMETRY_LEVELS[level] < self.level:
+            return
+        record = {'ts': round(time.time(), 3), 'level': level, 'event': name}
+        record.update(fields)
+        with self.lock:
+            self.events.append(record)
+        if self.echo:
+            details = ' '.join(f"{k}={v}" for k, v in fields.items())
+            print(f"[{level.upper()}] {name} {details}")
+    
+    def debug(self, name, **fields):
+        self.event('debug', name, **fields)
+    
+    def info(self, name, **fields):
+        self.event('info', name, **fields)
+    
+    def warning(self, name, **fields):
+        self.event('warning', name, **fields)
+    
+    def error(self, name, **fields):
+        self.event('error', name, **fields)
+    
+    def snapshot(self, event_name=None):
+        """Cópia dos eventos do buffer (opcionalmente filtrados pelo nome)"""
+        with self.lock:
+            events = list(self.events)
+        if event_name:
+            events = [e for e in events if e['event'] == event_name]
+        return events
+    
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+    
+    def export_jsonl(self, path):
+        """Grava o buffer como JSONL; retorna o número de eventos exportados"""
+        events = self.snapshot()
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in events:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        return len(events)
+    
+    def http_summary(self):
+        """Agrega latência, bytes e status por endpoint"""
+        summary = {}
+        for record in self.snapshot('http'):
+            item = summary.setdefault(record['endpoint'], {'durations': [], 'bytes': 0, 'errors': 0, 'status': None})
+            item['durations'].append(record['ms'])
+            item['bytes'] += record.get('bytes') or 0
+            item['status'] = record.get('status')
+            if not record.get('status') or record['status'] >= 400:
+                item['errors'] += 1
+        
+        for item in summary.values():
+            durations = sorted(item.pop('durations'))
+            item['count'] = len(durations)
+            item['p50_ms'] = _percentile(durations, 50)
+            item['p95_ms'] = _percentile(durations, 95)
+        return summary
+
+
+def _percentile(sorted_values, pct):
+    """Percentil simples (nearest-rank) de uma lista já ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def _normalize_endpoint(url):
+    """Agrupa URLs por rota: IDs numéricos e arquivos de upload viram curingas"""
+    path = urlparse(url).path or '/'
+    if path.startswith('/uploads/'):
+        return '/'.join(path.split('/')[:3]) + '/*'
+    return re.sub(r'/\d+(?=/|$)', '/:id', path)
+
+
+def count_widgets(widget):
+    """Conta recursivamente os widgets abaixo de widget (inclusive)"""
+    total = 1
+    for child in widget.winfo_children():
+        total += count_widgets(child)
+    return total
+
+
+telemetry = Telemetry()
+
+
+class TelemetrySession(requests.Session):
+    """requests.Session que registra latência, bytes e status de cada chamada"""
+    
+    def request(self, method, url, *args, **kwargs):
+        if not telemetry.enabled_for('info'):
+            return super().request(method, url, *args, **kwargs)
+        
+        started_at = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception as e:
+            telemetry.info(
+                'http',
+                method=method,
+                endpoint=_normalize_endpoint(url),
+                status=None,
+                ms=round((time.perf_counter() - started_at) * 1000, 1),
+                bytes=0,
+                error=type(e).__name__
+            )
+            raise
+        
+        if kwargs.get('stream'):
+            size = int(response.headers.get('Content-Length') or 0)
+        else:
+            size = len(response.content)
+        
+        telemetry.info(
+            'http',
+            method=method,
+            endpoint=_normalize_endpoint(url),
+            status=response.status_code,
+            ms=round((time.perf_counter() - started_at) * 1000, 1),
+            bytes=size
+        )
+        return response
+
+
 # ============================================================================
 # API CLIENT
 # ============================================================================
@@ -316,7 +579,7 @@ class APIClient:
     
     def __init__(self, base_url):
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
+        self.session = TelemetrySession()
         self.token = None
         self.user = None
         self.csrf_token = None
@@ -332,16 +595,85 @@ class APIClient:
             headers['X-CSRF-Token'] = self.csrf_token
         return headers
     
-    def test_connection(self):
-        """Testa conexão com a API"""
+    def test_connection(self, timeout=3):
+        """Testa conexão com a API usando o endpoint leve /api/health"""
         try:
-            # Tenta acessar a página principal
-            response = self.session.get(self.base_url, timeout=10)
+            response = self.session.get(self._get_url('/health'), timeout=timeout)
+            if response.status_code == 404:
+                # Servidor sem /api/health: tenta a página principal
+                response = self.session.get(self.base_url, timeout=10)
             return response.status_code == 200
         except Exception as e:
             print(f"Erro de conexão: {e}")
             return False
     
+    def get_session_user(self):
+        """Valida a sessão atual (cookie) e retorna o usuário, ou None"""
+        try:
+            response = self.session.get(f"{self.base_url}/api/auth/session", timeout=10)
+            if response.status_code == 200:
+                session_data = response.json()
+                if session_data and session_data.get('user'):
+                    self.user = session_data['user']
+                    return self.user
+        except Exception as e:
+            print(f"Erro ao validar sessão: {e}")
+        return None
+    
+    def save_session(self, path):
+        """Salva os cookies da sessão para reutilizar na próxima inicialização"""
+        try:
+            cookies = [
+                {
+                    'name': cookie.name,
+                    'value': cookie.value,
+                    'domain': cookie.domain,
+                    'path': cookie.path,
+                    'secure': cookie.secure,
+                    'expires': cookie.expires
+                }
+                for cookie in self.session.cookies
+            ]
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'base_url': self.base_url, 'cookies': cookies}, f)
+        except Exception as e:
+            print(f"Erro ao salvar sessão: {e}")
+    
+    def load_session(self, path):
+        """Carrega cookies salvos; retorna True se havia sessão para este servidor"""
+        try:
+            if not path.exists():
+                return False
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('base_url') != self.base_url:
+                return False
+            for cookie in data.get('cookies', []):
+                self.session.cookies.set(
+                    cookie['name'],
+                    cookie['value'],
+                    domain=cookie.get('domain'),
+                    path=cookie.get('path') or '/',
+                    secure=cookie.get('secure', False),
+                    expires=cookie.get('expires')
+                )
+            return bool(data.get('cookies'))
+        except Exception as e:
+            print(f"Erro ao carregar sessão: {e}")
+            return False
+    
+    def load_initial_data(self):
+        """Busca conversas, módulos e modelo ativo em paralelo"""
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            conversations = executor.submit(self.get_conversations)
+            modules = executor.submit(self.get_modules)
+            active_model = executor.submit(self.get_active_model)
+            return {
+                'conversations': conversations.result(),
+                'modules': modules.result(),
+                'active_model': active_model.result()
+            }
+    
     def login(self, email, password):
         """Realiza login via NextAuth"""
         try:
@@ -466,6 +798,26 @@ class APIClient:
             print(f"Erro ao buscar modelo ativo: {e}")
             return None
     
+    def warm_up(self):
+        """Abre (ou mantém viva) a conexão TCP/TLS com o servidor"""
+        try:
+            self.session.get(self._get_url('/health'), timeout=5)
+            return True
+        except Exception as e:
+            print(f"Erro ao pré-aquecer conexão: {e}")
+            return False
+    
+    def _extract_error(self, response):
+        """Extrai a mensagem de erro de uma resposta HTTP"""
+        try:
+            if response.text:
+                error_data = response.json()
+                return error_data.get('error', f'Erro {response.status_code}')
+            else:
+                return f'Erro {response.status_code}: Resposta vazia do servidor'
+        except:
+            return f'Erro {response.status_code}: {response.text[:200] if response.text else "Sem detalhes"}'
+    
     def send_message(self, conversation_id, module_id, system_id, message, image_base64=None):
         """Envia uma mensagem"""
         try:
@@ -493,15 +845,66 @@ class APIClient:
             if response.status_code == 200:
                 return True, response.json()
             else:
-                # Tenta extrair erro da resposta
-                try:
-                    if response.text:
-                        error_data = response.json()
-                        return False, error_data.get('error', f'Erro {response.status_code}')
-                    else:
-                        return False, f'Erro {response.status_code}: Resposta vazia do servidor'
-                except:
-                    return False, f'Erro {response.status_code}: {response.text[:200] if response.text else "Sem detalhes"}'
+                return False, self._extract_error(response)
+        except requests.exceptions.Timeout:
+            return False, "Timeout - A resposta está demorando muito"
+        except requests.exceptions.ConnectionError:
+            return False, "Erro de conexão com o servidor"
+        except Exception as e:
+            return False, str(e)
+    
+    def send_message_stream(self, conversation_id, module_id, system_id, message, on_delta=None):
+        """
+        Envia uma mensagem lendo a resposta de forma incremental.
+        Se o servidor responder em NDJSON (uma linha {"delta": ...} por trecho e uma
+        linha final {"done": true, ...}), cada trecho é repassado para on_delta assim
+        que chega; caso contrário a resposta JSON completa é entregue de uma vez.
+        """
+        try:
+            data = {
+                'conversation_id': conversation_id,
+                'module_id': module_id,
+                'system_id': system_id,
+                'message': message
+            }
+            
+            headers = self._get_headers()
+            headers['Accept'] = 'application/x-ndjson, application/json'
+            
+            with self.session.post(
+                self._get_url('/chat/send'),
+                json=data,
+                headers=headers,
+                timeout=120,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    return False, self._extract_error(response)
+                
+                if 'ndjson' not in response.headers.get('Content-Type', ''):
+                    result = response.json()
+                    if on_delta:
+                        on_delta(result.get('response', ''))
+                    return True, result
+                
+                response.encoding = response.encoding or 'utf-8'
+                result = {}
+                parts = []
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event.get('error'):
+                        return False, event['error']
+                    if event.get('delta'):
+                        parts.append(event['delta'])
+                        if on_delta:
+                            on_delta(event['delta'])
+                    if event.get('done'):
+                        result = event
+                
+                result.setdefault('response', ''.join(parts))
+                return True, result
         except requests.exceptions.Timeout:
             return False, "Timeout - A resposta está demorando muito"
         except requests.exceptions.ConnectionError:
@@ -558,10 +961,10 @@ class APIClient:
             )
             
             if response.status_code in (200, 201):
-                print(f"[DEBUG] Feedback '{feedback}' enviado com sucesso")
+                telemetry.debug('feedback.sent', feedback=feedback)
                 return True
             else:
-                print(f"[DEBUG] Erro ao enviar feedback: {response.status_code}")
+                telemetry.warning('feedback.failed', feedback=feedback, status=response.status_code)
                 return False
         except Exception as e:
             print(f"Erro ao enviar feedback: {e}")
@@ -998,10 +1401,14 @@ class LoginScreen(ttk.Frame):
                 creds = {'email': email, 'password': encoded_password}
                 with open(cred_file, 'w', encoding='utf-8') as f:
                     json.dump(creds, f)
+                # Guarda o cookie para validar a sessão na próxima inicialização
+                self.api_client.save_session(SESSION_FILE)
             else:
-                # Remove arquivo de credenciais se existir
+                # Remove arquivos de credenciais e sessão se existirem
                 if cred_file.exists():
                     cred_file.unlink()
+                if SESSION_FILE.exists():
+                    SESSION_FILE.unlink()
         except Exception as e:
             print(f"Erro ao salvar credenciais: {e}")
     
@@ -1048,7 +1455,8 @@ class LoginScreen(ttk.Frame):
         self.update()
         
         def do_login_thread():
-            success, result = self.api_client.login(email, password)
+            with startup_profiler.phase('login'):
+                success, result = self.api_client.login(email, password)
             self.after(0, lambda: self._handle_login_result(success, result, email, password))
         
         threading.Thread(target=do_login_thread, daemon=True).start()
@@ -1135,13 +1543,14 @@ class LoginScreen(ttk.Frame):
 class ChatScreen(ttk.Frame):
     """Tela principal do chat"""
     
-    def __init__(self, parent, api_client, user, on_logout_callback, on_settings_callback, on_notification_callback=None):
+    def __init__(self, parent, api_client, user, on_logout_callback, on_settings_callback, on_notification_callback=None, on_context_callback=None, initial_data=None):
         super().__init__(parent)
         self.api_client = api_client
         self.user = user
         self.on_logout_callback = on_logout_callback
         self.on_settings_callback = on_settings_callback
         self.on_notification_callback = on_notification_callback  # Callback para notificações toast
+        self.on_context_callback = on_context_callback  # Callback quando módulo/sistema ativo muda
         
         self.conversations = []
         self.active_conversation = None
@@ -1153,6 +1562,7 @@ class ChatScreen(ttk.Frame):
         self.is_sending = False
         self.knowledge_attachments = []  # Lista de anexos da base de conhecimento
         self.image_cache = {}  # Cache de imagens carregadas
+        self.last_render_stats = {}  # Última renderização medida (telemetria)
         
         # Variáveis para imagem anexada
         self.attached_image = None  # Imagem anexada (base64)
@@ -1160,9 +1570,12 @@ class ChatScreen(ttk.Frame):
         self.model_supports_images = False  # Se o modelo suporta imagens
         self.is_capturing_screen = False  # Se está capturando tela
         
+        # Dados iniciais são buscados em paralelo com a construção dos widgets
+        if initial_data is None:
+            self._load_initial_data()
         self._create_widgets()
-        self._load_initial_data()
-        self._check_model_image_support()
+        if initial_data is not None:
+            self._apply_initial_data(initial_data)
     
     def _create_widgets(self):
         # Container principal
@@ -1377,26 +1790,25 @@ class ChatScreen(ttk.Frame):
         self._show_welcome_screen()
     
     def _load_initial_data(self):
-        """Carrega dados iniciais"""
+        """Carrega conversas, módulos e modelo ativo (requisições em paralelo)"""
         def load_thread():
-            self.conversations = self.api_client.get_conversations()
-            self.modules = self.api_client.get_modules()
-            self.after(0, self._update_conversation_list)
+            data = self.api_client.load_initial_data()
+            self.after(0, lambda: self._apply_initial_data(data))
         
         threading.Thread(target=load_thread, daemon=True).start()
     
-    def _check_model_image_support(self):
-        """Verifica se o modelo ativo suporta imagens"""
-        def check_thread():
-            model = self.api_client.get_active_model()
-            if model and model.get('visualiza_imagem'):
-                self.model_supports_images = True
-                self.after(0, self._show_image_buttons)
-            else:
-                self.model_supports_images = False
-                self.after(0, self._hide_image_buttons)
+    def _apply_initial_data(self, data):
+        """Aplica os dados iniciais e verifica se o modelo ativo suporta imagens"""
+        self.conversations = data.get('conversations') or []
+        self.modules = data.get('modules') or []
+        self._update_conversation_list()
         
-        threading.Thread(target=check_thread, daemon=True).start()
+        model = data.get('active_model')
+        self.model_supports_images = bool(model and model.get('visualiza_imagem'))
+        if self.model_supports_images:
+            self._show_image_buttons()
+        else:
+            self._hide_image_buttons()
     
     def _show_image_buttons(self):
         """Mostra botões de imagem"""
@@ -1428,7 +1840,7 @@ class ChatScreen(ttk.Frame):
     def _load_and_attach_image(self, filepath):
         """Carrega imagem do arquivo e anexa"""
         try:
-            if PIL_AVAILABLE:
+            if PILImage.available():
                 img = PILImage.open(filepath)
                 # Redimensiona se muito grande
                 max_size = (1920, 1080)
@@ -1461,7 +1873,7 @@ class ChatScreen(ttk.Frame):
             return
         
         try:
-            if PIL_AVAILABLE:
+            if PILImage.available():
                 from PIL import ImageGrab
                 
                 # Tenta pegar imagem do clipboard
@@ -1488,7 +1900,7 @@ class ChatScreen(ttk.Frame):
     
     def _start_screen_capture(self):
         """Inicia captura de tela"""
-        if not PIL_AVAILABLE:
+        if not PILImage.available():
             Messagebox.show_warning("PIL não disponível para captura de tela", "Aviso")
             return
         
@@ -1796,10 +2208,9 @@ class ChatScreen(ttk.Frame):
         modules_frame = ttk.Frame(center_frame)
         modules_frame.pack()
         
-        print(f"[DEBUG] Módulos carregados: {len(self.modules)}")  # Debug
+        telemetry.debug('modules.loaded', count=len(self.modules))
         
-        for i, module in enumerate(self.modules):
-            print(f"[DEBUG] Módulo {i}: {module.get('nome', 'Sem nome')}")  # Debug
+        for module in self.modules:
             btn = ttk.Button(
                 modules_frame,
                 text=module.get('nome', 'Módulo'),
@@ -1895,6 +2306,7 @@ class ChatScreen(ttk.Frame):
             self.chat_title_label.config(text="Nova Conversa")
             self._show_chat_area()
             self._clear_messages()
+            self._notify_context_changed(module.get('nome', ''))
     
     def _select_system(self, system):
         """Seleciona um sistema"""
@@ -1910,10 +2322,11 @@ class ChatScreen(ttk.Frame):
         self.chat_title_label.config(text="Nova Conversa")
         self._show_chat_area()
         self._clear_messages()
+        self._notify_context_changed(f"{module_name} → {system.get('nome', '')}")
     
     def _select_conversation(self, conv):
         """Seleciona uma conversa existente"""
-        print(f"[DEBUG] Selecionando conversa: {conv.get('titulo', 'Sem título')}")  # Debug
+        telemetry.debug('conversation.select', conversation_id=conv.get('id'))
         
         self.active_conversation = conv
         self.active_module_id = conv.get('module_id')
@@ -1925,21 +2338,25 @@ class ChatScreen(ttk.Frame):
         if conv.get('system_nome'):
             module_info += f" → {conv.get('system_nome')}"
         self.module_label.config(text=module_info)
+        self._notify_context_changed(module_info)
         
         self._show_chat_area()
         self._update_conversation_list()
         
         # Carrega mensagens
         def load_messages():
-            print(f"[DEBUG] Carregando mensagens da conversa {conv.get('id')}")  # Debug
             data = self.api_client.get_conversation_messages(conv.get('id'))
-            print(f"[DEBUG] Mensagens recebidas: {len(data.get('messages', [])) if data else 0}")  # Debug
+            telemetry.debug(
+                'conversation.messages_loaded',
+                conversation_id=conv.get('id'),
+                count=len(data.get('messages', [])) if data else 0
+            )
             if data:
                 self.messages = data.get('messages', [])
                 # Carrega anexos da base de conhecimento
                 if data.get('all_knowledge_attachments'):
                     self.knowledge_attachments = data.get('all_knowledge_attachments', [])
-                    print(f"[DEBUG] Anexos carregados: {len(self.knowledge_attachments)}")
+                    telemetry.debug('conversation.attachments_loaded', count=len(self.knowledge_attachments))
                 self.after(0, self._render_messages)
             else:
                 self.after(0, lambda: self.status_label.config(text="Erro ao carregar mensagens"))
@@ -1947,6 +2364,15 @@ class ChatScreen(ttk.Frame):
         self.status_label.config(text="Carregando mensagens...")
         threading.Thread(target=load_messages, daemon=True).start()
     
+    def _notify_context_changed(self, label):
+        """Informa o app do módulo/sistema ativo (usado pela pergunta rápida)"""
+        if self.on_context_callback and self.active_module_id:
+            self.on_context_callback({
+                'module_id': self.active_module_id,
+                'system_id': self.active_system_id,
+                'label': label
+            })
+    
     def _clear_messages(self):
         """Limpa área de mensagens"""
         for widget in self.messages_container.winfo_children():
@@ -1957,12 +2383,41 @@ class ChatScreen(ttk.Frame):
         self._clear_messages()
         self.status_label.config(text="")
         
+        if not telemetry.enabled_for('info'):
+            for msg in self.messages:
+                self._add_message_bubble(msg)
+            
+            # Scroll para o final
+            self.msg_canvas.update_idletasks()
+            self.msg_canvas.yview_moveto(1.0)
+            return
+        
+        # Mesmo fluxo, medindo o custo de cada bolha e da renderização completa
+        started_at = time.perf_counter()
+        slowest_ms = 0.0
         for msg in self.messages:
+            msg_started_at = time.perf_counter()
             self._add_message_bubble(msg)
+            slowest_ms = max(slowest_ms, (time.perf_counter() - msg_started_at) * 1000)
         
-        # Scroll para o final
         self.msg_canvas.update_idletasks()
         self.msg_canvas.yview_moveto(1.0)
+        
+        self.last_render_stats = {
+            'messages': len(self.messages),
+            'ms': round((time.perf_counter() - started_at) * 1000, 1),
+            'slowest_message_ms': round(slowest_ms, 1),
+            'widgets': count_widgets(self.messages_container),
+            'image_cache': len(self.image_cache)
+        }
+        telemetry.info('render.messages', **self.last_render_stats)
+    
+    def get_perf_stats(self):
+        """Estatísticas de renderização para o overlay de debug"""
+        stats = dict(self.last_render_stats)
+        stats['image_cache'] = len(self.image_cache)
+        stats['widgets_total'] = count_widgets(self)
+        return stats
     
     def _parse_message_content(self, content):
         """
@@ -2028,7 +2483,7 @@ class ChatScreen(ttk.Frame):
     
     def _load_image_from_url(self, url, max_width=400):
         """Carrega uma imagem de uma URL e retorna um PhotoImage"""
-        if not PIL_AVAILABLE:
+        if not PILImage.available():
             return None
         
         # Verifica cache
@@ -2047,6 +2502,8 @@ class ChatScreen(ttk.Frame):
             # Baixa a imagem
             response = self.api_client.session.get(url, timeout=10)
             if response.status_code == 200:
+                decode_started_at = time.perf_counter()
+                
                 # Carrega com PIL
                 img_data = io.BytesIO(response.content)
                 pil_image = PILImage.open(img_data)
@@ -2064,9 +2521,15 @@ class ChatScreen(ttk.Frame):
                 # Armazena no cache
                 self.image_cache[url] = photo
                 
+                telemetry.info(
+                    'image.decode',
+                    endpoint=_normalize_endpoint(url),
+                    bytes=len(response.content),
+                    ms=round((time.perf_counter() - decode_started_at) * 1000, 1)
+                )
                 return photo
         except Exception as e:
-            print(f"[DEBUG] Erro ao carregar imagem {url}: {e}")
+            telemetry.warning('image.load_failed', url=url, error=str(e))
         
         return None
     
@@ -2212,7 +2675,7 @@ class ChatScreen(ttk.Frame):
             # Mensagem do usuário
             # Verifica se tem imagem anexada
             image_data = msg.get('image_data')
-            if image_data and PIL_AVAILABLE:
+            if image_data and PILImage.available():
                 try:
                     # Decodifica a imagem base64
                     import base64
@@ -2557,6 +3020,309 @@ class ChatScreen(ttk.Frame):
         threading.Thread(target=refresh_thread, daemon=True).start()
 
 
+# ============================================================================
+# POPUP DE PERGUNTA RÁPIDA
+# ============================================================================
+
+class QuickAskPopup(ttk.Toplevel):
+    """
+    Popup leve aberto pelo atalho de pergunta rápida.
+    É construído uma única vez após o login e apenas ocultado/exibido, para que
+    o atalho não pague criação de widgets nem chamadas extras à API.
+    """
+    
+    def __init__(self, parent, api_client, get_context_callback, on_answer_callback=None):
+        super().__init__(parent)
+        self.api_client = api_client
+        self.get_context_callback = get_context_callback
+        self.on_answer_callback = on_answer_callback
+        self.context = None
+        self.conversation_id = None
+        self.is_sending = False
+        
+        self.title(f"{APP_NAME} - Pergunta Rápida")
+        self.geometry("620x380")
+        self.attributes('-topmost', True)
+        self.protocol("WM_DELETE_WINDOW", self.hide)
+        
+        self._create_widgets()
+        self.withdraw()
+    
+    def _create_widgets(self):
+        main_frame = ttk.Frame(self, padding=15)
+        main_frame.pack(fill=BOTH, expand=YES)
+        
+        # Contexto (módulo → sistema da última conversa)
+        self.context_label = ttk.Label(
+            main_frame,
+            text="",
+            font=('Segoe UI', 9),
+            foreground='gray'
+        )
+        self.context_label.pack(anchor=W)
+        
+        # Campo único de pergunta
+        self.question_entry = ttk.Entry(main_frame, font=('Segoe UI', 12))
+        self.question_entry.pack(fill=X, pady=(5, 10))
+        self.question_entry.bind('<Return>', lambda e: self._send())
+        
+        # Resposta (preenchida conforme chega)
+        answer_frame = ttk.Frame(main_frame)
+        answer_frame.pack(fill=BOTH, expand=YES)
+        
+        self.answer_text = tk.Text(
+            answer_frame,
+            font=('Segoe UI', 10),
+            wrap=WORD,
+            height=12,
+            borderwidth=0,
+            highlightthickness=0,
+            state=DISABLED
+        )
+        answer_scrollbar = ttk.Scrollbar(answer_frame, orient=VERTICAL, command=self.answer_text.yview)
+        self.answer_text.configure(yscrollcommand=answer_scrollbar.set)
+        answer_scrollbar.pack(side=RIGHT, fill=Y)
+        self.answer_text.pack(side=LEFT, fill=BOTH, expand=YES)
+        
+        # Status
+        self.status_label = ttk.Label(
+            main_frame,
+            text="Enter para enviar • Esc para fechar",
+            font=('Segoe UI', 9),
+            foreground='gray'
+        )
+        self.status_label.pack(anchor=W, pady=(5, 0))
+        
+        self.bind('<Escape>', lambda e: self.hide())
+    
+    def show(self):
+        """Exibe o popup com o contexto mais recente"""
+        context = self.get_context_callback()
+        if context != self.context:
+            # Mudou o módulo/sistema: a próxima pergunta abre nova conversa
+            self.context = context
+            self.conversation_id = None
+        
+        if self.context and self.context.get('module_id'):
+            self.context_label.config(text=f"📁 {self.context.get('label') or 'Módulo'}")
+        else:
+            self.context_label.config(text="Abra uma conversa no aplicativo para definir o módulo")
+        
+        # Posiciona no terço superior da tela
+        self.update_idletasks()
+        x = (self.winfo_screenwidth() - 620) // 2
+        y = self.winfo_screenheight() // 5
+        self.geometry(f"+{x}+{y}")
+        
+        self.deiconify()
+        self.lift()
+        self.focus_force()
+        self.question_entry.focus_set()
+    
+    def hide(self):
+        """Oculta o popup sem destruí-lo"""
+        self.withdraw()
+    
+    def _set_answer(self, text):
+        self.answer_text.config(state=NORMAL)
+        self.answer_text.delete('1.0', END)
+        self.answer_text.insert('1.0', text)
+        self.answer_text.config(state=DISABLED)
+    
+    def _append_answer(self, delta):
+        self.answer_text.config(state=NORMAL)
+        self.answer_text.insert(END, delta)
+        self.answer_text.see(END)
+        self.answer_text.config(state=DISABLED)
+    
+    def _send(self):
+        """Envia a pergunta usando o módulo/sistema da última conversa"""
+        question = self.question_entry.get().strip()
+        if not question or self.is_sending:
+            return
+        
+        if not self.context or not self.context.get('module_id'):
+            self.status_label.config(text="Nenhum módulo selecionado", foreground='red')
+            return
+        
+        self.is_sending = True
+        self.question_entry.delete(0, END)
+        self._set_answer(f"❓ {question}\n\n")
+        self.status_label.config(text="Aguardando resposta...", foreground='gray')
+        
+        started_at = time.perf_counter()
+        first_delta = {'ms': None}
+        
+        def on_delta(delta):
+            if first_delta['ms'] is None:
+                first_delta['ms'] = (time.perf_counter() - started_at) * 1000
+            self.after(0, lambda d=delta: self._append_answer(d))
+        
+        def send_thread():
+            success, result = self.api_client.send_message_stream(
+                self.conversation_id,
+                self.context.get('module_id'),
+                self.context.get('system_id'),
+                question,
+                on_delta=on_delta
+            )
+            self.after(0, lambda: self._handle_result(success, result, started_at, first_delta['ms']))
+        
+        threading.Thread(target=send_thread, daemon=True).start()
+    
+    def _handle_result(self, success, result, started_at, first_delta_ms):
+        """Callback após a resposta completa"""
+        self.is_sending = False
+        total_ms = (time.perf_counter() - started_at) * 1000
+        
+        if success:
+            self.conversation_id = result.get('conversation_id') or self.conversation_id
+            first = f"{first_delta_ms:.0f} ms" if first_delta_ms is not None else "-"
+            self.status_label.config(
+                text=f"Primeira resposta em {first} • total {total_ms:.0f} ms",
+                foreground='gray'
+            )
+            if self.on_answer_callback:
+                self.on_answer_callback(self.conversation_id)
+        else:
+            self.status_label.config(text=f"Erro: {result}", foreground='red')
+
+
+# ============================================================================
+# OVERLAY DE DEBUG
+# ============================================================================
+
+class DebugOverlay(ttk.Toplevel):
+    """
+    Janela de métricas ao vivo (Ctrl+Shift+D).
+    Enquanto está aberta a telemetria coleta no nível 'info'; ao fechar,
+    o nível anterior é restaurado.
+    """
+    
+    REFRESH_MS = 1000
+    
+    def __init__(self, parent, get_chat_screen, on_close_callback=None):
+        super().__init__(parent)
+        self.get_chat_screen = get_chat_screen
+        self.on_close_callback = on_close_callback
+        self.previous_level = telemetry.level_name
+        self.refresh_id = None
+        
+        if not telemetry.enabled_for('info'):
+            telemetry.set_level('info')
+        
+        self.title(f"{APP_NAME} - Debug")
+        self.geometry("640x420")
+        self.attributes('-topmost', True)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        
+        self._create_widgets()
+        self._refresh()
+    
+    def _create_widgets(self):
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill=BOTH, expand=YES)
+        
+        self.stats_text = tk.Text(
+            main_frame,
+            font=('Consolas', 9),
+            wrap=NONE,
+            borderwidth=0,
+            highlightthickness=0,
+            state=DISABLED
+        )
+        self.stats_text.pack(fill=BOTH, expand=YES)
+        
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.pack(fill=X, pady=(10, 0))
+        
+        ttk.Button(
+            btn_frame,
+            text="Exportar JSONL",
+            bootstyle="primary",
+            command=self._export
+        ).pack(side=LEFT)
+        
+        ttk.Button(
+            btn_frame,
+            text="Limpar",
+            bootstyle="secondary",
+            command=telemetry.clear
+        ).pack(side=LEFT, padx=10)
+    
+    def _build_report(self):
+        lines = [f"Eventos no buffer: {len(telemetry.events)}  (nível: {telemetry.level_name})", ""]
+        
+        lines.append(f"{'Endpoint':<36}{'N':>5}{'p50 ms':>9}{'p95 ms':>9}{'KB':>9}{'Status':>8}")
+        summary = telemetry.http_summary()
+        for endpoint, item in sorted(summary.items(), key=lambda kv: -kv[1]['p95_ms']):
+            lines.append(
+                f"{endpoint[:35]:<36}{item['count']:>5}{item['p50_ms']:>9.1f}{item['p95_ms']:>9.1f}"
+                f"{item['bytes'] / 1024:>9.1f}{str(item['status']):>8}"
+            )
+        if not summary:
+            lines.append("(nenhuma requisição registrada)")
+        
+        lines.append("")
+        chat_screen = self.get_chat_screen()
+        if chat_screen:
+            stats = chat_screen.get_perf_stats()
+            lines.append(f"Widgets na tela de chat: {stats['widgets_total']}")
+            lines.append(f"Imagens em cache: {stats['image_cache']}")
+            if stats.get('messages') is not None:
+                lines.append(
+                    f"Última renderização: {stats['messages']} mensagens em {stats['ms']:.1f} ms "
+                    f"(mais lenta: {stats['slowest_message_ms']:.1f} ms, {stats['widgets']} widgets)"
+                )
+        
+        decodes = telemetry.snapshot('image.decode')
+        if decodes:
+            avg_ms = sum(e['ms'] for e in decodes) / len(decodes)
+            lines.append(f"Decodificação de imagens: {len(decodes)} (média {avg_ms:.1f} ms)")
+        
+        return "\n".join(lines)
+    
+    def _refresh(self):
+        try:
+            report = self._build_report()
+        except tk.TclError:
+            return
+        
+        self.stats_text.configure(state=NORMAL)
+        self.stats_text.delete('1.0', END)
+        self.stats_text.insert('1.0', report)
+        self.stats_text.configure(state=DISABLED)
+        
+        self.refresh_id = self.after(self.REFRESH_MS, self._refresh)
+    
+    def _export(self):
+        from tkinter import filedialog
+        
+        save_path = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=".jsonl",
+            initialfile=f"telemetria_{time.strftime('%Y%m%d_%H%M%S')}.jsonl",
+            filetypes=[("JSON Lines", "*.jsonl"), ("Todos os arquivos", "*.*")]
+        )
+        if not save_path:
+            return
+        
+        try:
+            count = telemetry.export_jsonl(save_path)
+            Messagebox.show_info(f"{count} eventos exportados para:\n{save_path}", "Telemetria", parent=self)
+        except Exception as e:
+            Messagebox.show_error(f"Erro ao exportar: {e}", "Erro", parent=self)
+    
+    def close(self):
+        if self.refresh_id:
+            self.after_cancel(self.refresh_id)
+            self.refresh_id = None
+        telemetry.set_level(self.previous_level)
+        if self.on_close_callback:
+            self.on_close_callback()
+        self.destroy()
+
+
 # ============================================================================
 # TELA DE CONFIGURAÇÕES
 # ============================================================================
@@ -2570,13 +3336,13 @@ class SettingsDialog(ttk.Toplevel):
         self.on_save_callback = on_save_callback
         
         self.title("Configurações")
-        self.geometry("450x420")
+        self.geometry("450x540")
         self.resizable(False, False)
         
         # Centraliza
         self.update_idletasks()
         x = (self.winfo_screenwidth() - 450) // 2
-        y = (self.winfo_screenheight() - 420) // 2
+        y = (self.winfo_screenheight() - 540) // 2
         self.geometry(f"+{x}+{y}")
         
         self.transient(parent)
@@ -2624,7 +3390,7 @@ class SettingsDialog(ttk.Toplevel):
             hotkey_container,
             text="Capturar",
             bootstyle="info-outline",
-            command=self._capture_hotkey
+            command=lambda: self._capture_hotkey(self.hotkey_entry, DEFAULT_HOTKEY)
         ).pack(side=LEFT, padx=(10, 0))
         
         # Info
@@ -2635,6 +3401,29 @@ class SettingsDialog(ttk.Toplevel):
             foreground='gray'
         ).pack(anchor=W, pady=(5, 0))
         
+        # Atalho da pergunta rápida
+        quick_frame = ttk.Labelframe(main_frame, text="Pergunta Rápida", padding=10)
+        quick_frame.pack(fill=X, pady=(0, 15))
+        
+        ttk.Label(
+            quick_frame,
+            text="Atalho para abrir o popup de pergunta rápida:"
+        ).pack(anchor=W)
+        
+        quick_container = ttk.Frame(quick_frame)
+        quick_container.pack(fill=X, pady=(5, 0))
+        
+        self.quick_hotkey_entry = ttk.Entry(quick_container, font=('Segoe UI', 10), width=20)
+        self.quick_hotkey_entry.pack(side=LEFT)
+        self.quick_hotkey_entry.insert(0, self.config.get('quick_ask_hotkey', DEFAULT_QUICK_ASK_HOTKEY))
+        
+        ttk.Button(
+            quick_container,
+            text="Capturar",
+            bootstyle="info-outline",
+            command=lambda: self._capture_hotkey(self.quick_hotkey_entry, DEFAULT_QUICK_ASK_HOTKEY)
+        ).pack(side=LEFT, padx=(10, 0))
+        
         # Botões
         btn_frame = ttk.Frame(main_frame)
         btn_frame.pack(fill=X, pady=(20, 0))
@@ -2654,39 +3443,40 @@ class SettingsDialog(ttk.Toplevel):
             width=12
         ).pack(side=RIGHT)
     
-    def _capture_hotkey(self):
+    def _capture_hotkey(self, entry, default_hotkey):
         """Captura atalho de teclado"""
-        if not KEYBOARD_AVAILABLE:
+        if not keyboard.available():
             Messagebox.show_warning(
                 "Biblioteca 'keyboard' não instalada.\nInstale com: pip install keyboard",
                 "Aviso"
             )
             return
         
-        self.hotkey_entry.delete(0, END)
-        self.hotkey_entry.insert(0, "Pressione o atalho...")
-        self.hotkey_entry.config(state=DISABLED)
+        entry.delete(0, END)
+        entry.insert(0, "Pressione o atalho...")
+        entry.config(state=DISABLED)
         self.update()
         
         def capture():
             try:
                 hotkey = keyboard.read_hotkey(suppress=False)
-                self.after(0, lambda: self._set_captured_hotkey(hotkey))
+                self.after(0, lambda: self._set_captured_hotkey(entry, hotkey))
             except:
-                self.after(0, lambda: self._set_captured_hotkey(DEFAULT_HOTKEY))
+                self.after(0, lambda: self._set_captured_hotkey(entry, default_hotkey))
         
         threading.Thread(target=capture, daemon=True).start()
     
-    def _set_captured_hotkey(self, hotkey):
+    def _set_captured_hotkey(self, entry, hotkey):
         """Define o atalho capturado"""
-        self.hotkey_entry.config(state=NORMAL)
-        self.hotkey_entry.delete(0, END)
-        self.hotkey_entry.insert(0, hotkey)
+        entry.config(state=NORMAL)
+        entry.delete(0, END)
+        entry.insert(0, hotkey)
     
     def _save(self):
         """Salva configurações"""
         self.config['api_url'] = self.url_entry.get().strip()
         self.config['hotkey'] = self.hotkey_entry.get().strip() or DEFAULT_HOTKEY
+        self.config['quick_ask_hotkey'] = self.quick_hotkey_entry.get().strip() or DEFAULT_QUICK_ASK_HOTKEY
         
         save_config(self.config)
         self.on_save_callback(self.config)
@@ -2701,20 +3491,29 @@ class AskForgeApp:
     """Aplicação principal"""
     
     def __init__(self, single_instance=None):
-        self.config = load_config()
+        with startup_profiler.phase('config'):
+            self.config = load_config()
+        if self.config and self.config.get('telemetry_level') and not telemetry.enabled_for('info'):
+            telemetry.set_level(self.config['telemetry_level'])
         self.api_client = None
         self.tray_icon = None
         self.hotkey_registered = False
         self.single_instance = single_instance
         self.is_window_visible = True  # Rastreia se a janela está visível
+        self.quick_ask_popup = None  # Popup de pergunta rápida (criado após o login)
+        self.keep_alive_id = None
+        self.debug_overlay = None
+        self.first_paint_done = False
+        self.after_first_paint_callbacks = []  # Executados após a primeira pintura
         
         # Cria janela principal
-        self.root = ttk.Window(
-            title=APP_NAME,
-            themename="cosmo",
-            size=(1100, 700),
-            minsize=(900, 600)
-        )
+        with startup_profiler.phase('window'):
+            self.root = ttk.Window(
+                title=APP_NAME,
+                themename="cosmo",
+                size=(1100, 700),
+                minsize=(900, 600)
+            )
         
         # Centraliza
         self.root.update_idletasks()
@@ -2756,21 +3555,42 @@ class AskForgeApp:
         self.root.bind('<Map>', self._on_window_show)
         self.root.bind('<Unmap>', self._on_window_hide)
         
+        # Overlay de métricas de desempenho
+        self.root.bind_all('<Control-Shift-D>', self._toggle_debug_overlay)
+        
         # Verifica configuração
         if not self.config:
             self._show_config_screen()
         else:
             self._init_with_config(self.config)
     
+    def _toggle_debug_overlay(self, event=None):
+        """Abre/fecha o overlay de debug"""
+        if self.debug_overlay:
+            self.debug_overlay.close()
+            return
+        
+        self.debug_overlay = DebugOverlay(
+            self.root,
+            lambda: getattr(self, 'chat_screen', None),
+            on_close_callback=self._on_debug_overlay_closed
+        )
+    
+    def _on_debug_overlay_closed(self):
+        self.debug_overlay = None
+    
     def _on_window_show(self, event):
         """Callback quando janela é mostrada"""
         self.is_window_visible = True
-        print(f"[DEBUG] Janela visível: {self.is_window_visible}")
+        if not self.first_paint_done and event.widget is self.root:
+            self.first_paint_done = True
+            self.root.after_idle(self._on_first_paint)
+        telemetry.debug('window.visibility', visible=True)
     
     def _on_window_hide(self, event):
         """Callback quando janela é escondida/minimizada"""
         self.is_window_visible = False
-        print(f"[DEBUG] Janela visível: {self.is_window_visible}")
+        telemetry.debug('window.visibility', visible=False)
     
     def _check_window_visible(self):
         """Verifica se a janela está realmente visível"""
@@ -2798,15 +3618,15 @@ class AskForgeApp:
                 self._pending_conversation_id = conversation_id
                 
                 # Tenta usar winotify (suporta callback de clique)
-                if WINOTIFY_AVAILABLE:
+                if winotify.available():
                     try:
-                        toast = Notification(
+                        toast = winotify.Notification(
                             app_id=APP_NAME,
                             title=title,
                             msg=message,
                             duration="short"
                         )
-                        toast.set_audio(audio.Default, loop=False)
+                        toast.set_audio(winotify.audio.Default, loop=False)
                         
                         # Adiciona ação para abrir a conversa
                         toast.add_actions(label="Abrir Conversa", launch=f"askforge://open/{conversation_id}" if conversation_id else "askforge://open")
@@ -2820,8 +3640,8 @@ class AskForgeApp:
                         print(f"Erro ao mostrar notificação winotify: {e}")
                 
                 # Fallback para ttkbootstrap toast (sem callback de clique)
-                if TOAST_AVAILABLE:
-                    toast = ToastNotification(
+                if ttk_toast.available():
+                    toast = ttk_toast.ToastNotification(
                         title=title,
                         message=message + "\n\n(Clique no ícone da bandeja para abrir)",
                         duration=5000,
@@ -2852,22 +3672,36 @@ class AskForgeApp:
                 # Foca na janela
                 self.root.focus_force()
                 
-                print(f"[DEBUG] Janela restaurada. Estado: {self.root.state()}")
+                telemetry.debug('window.restored', state=self.root.state())
                 
                 # Se tem ID de conversa e tela de chat está ativa, abre a conversa
                 if conversation_id and hasattr(self, 'chat_screen') and self.chat_screen:
                     # Busca a conversa na lista
                     for conv in self.chat_screen.conversations:
                         if conv.get('id') == conversation_id:
-                            print(f"[DEBUG] Abrindo conversa: {conv.get('titulo', 'Sem título')}")
+                            telemetry.debug('notification.open_conversation', conversation_id=conversation_id)
                             self.chat_screen._select_conversation(conv)
                             break
             except Exception as e:
-                print(f"[DEBUG] Erro ao abrir janela: {e}")
+                telemetry.error('notification.open_failed', error=str(e))
         
         # Executa na thread principal
         self.root.after(0, open_conversation)
     
+    def _on_first_paint(self):
+        """Executa o que foi adiado para depois da primeira pintura"""
+        startup_profiler.mark('first paint')
+        callbacks, self.after_first_paint_callbacks = self.after_first_paint_callbacks, []
+        for callback in callbacks:
+            callback()
+    
+    def _run_after_first_paint(self, callback):
+        """Agenda um callback para depois da primeira pintura da janela"""
+        if self.first_paint_done:
+            self.root.after_idle(callback)
+        else:
+            self.after_first_paint_callbacks.append(callback)
+    
     def _show_config_screen(self):
         """Mostra tela de configuração inicial"""
         ConfigScreen(self.root, self._on_config_saved)
@@ -2880,22 +3714,66 @@ class AskForgeApp:
     def _init_with_config(self, config):
         """Inicializa com configuração"""
         self.api_client = APIClient(config.get('api_url', ''))
+        has_saved_session = self.api_client.load_session(SESSION_FILE)
+        
+        # Mostra tela de login sem esperar pela rede
+        self._show_login_screen()
+        
+        # Teste de conexão, validação da sessão salva e dados iniciais em paralelo
+        self._start_background_startup(has_saved_session)
         
-        # Testa conexão
-        if not self.api_client.test_connection():
+        # System tray e hotkey (pystray, PIL, keyboard) só depois da primeira pintura
+        self._run_after_first_paint(self._setup_tray)
+        self._run_after_first_paint(self._setup_hotkey)
+    
+    def _start_background_startup(self, has_saved_session):
+        """Executa as verificações de rede da inicialização fora da thread da UI"""
+        api_client = self.api_client
+        
+        def test_connection():
+            with startup_profiler.phase('connection test'):
+                return api_client.test_connection()
+        
+        def validate_session():
+            with startup_profiler.phase('session check'):
+                return api_client.get_session_user()
+        
+        def startup_thread():
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                connection = executor.submit(test_connection)
+                session_user = executor.submit(validate_session) if has_saved_session else None
+                # Otimista: se há sessão salva, os dados já vêm junto com a validação
+                initial_data = executor.submit(api_client.load_initial_data) if has_saved_session else None
+                
+                connected = connection.result()
+                user = session_user.result() if session_user else None
+                data = initial_data.result() if initial_data else None
+            
+            self.root.after(0, lambda: self._handle_startup_result(api_client, connected, user, data))
+        
+        threading.Thread(target=startup_thread, daemon=True).start()
+    
+    def _handle_startup_result(self, api_client, connected, user, initial_data):
+        """Callback das verificações de inicialização"""
+        if api_client is not self.api_client:
+            return  # Servidor trocado enquanto verificava
+        
+        login_idle = (
+            hasattr(self, 'login_screen')
+            and self.login_screen.winfo_exists()
+            and self.login_screen.loading_animation_id is None
+        )
+        
+        if user and login_idle:
+            # Sessão salva ainda válida: vai direto para o chat
+            self._show_chat_screen(user, initial_data=initial_data)
+            return
+        
+        if not connected and login_idle:
             Messagebox.show_warning(
                 "Não foi possível conectar ao servidor.\nVerifique a URL nas configurações.",
                 "Aviso de Conexão"
             )
-        
-        # Mostra tela de login
-        self._show_login_screen()
-        
-        # Configura system tray
-        self._setup_tray()
-        
-        # Configura hotkey
-        self._setup_hotkey()
     
     def _show_login_screen(self):
         """Mostra tela de login"""
@@ -2918,7 +3796,7 @@ class AskForgeApp:
         """Callback quando login é bem sucedido"""
         self._show_chat_screen(user)
     
-    def _show_chat_screen(self, user):
+    def _show_chat_screen(self, user, initial_data=None):
         """Mostra tela de chat"""
         self._clear_main_container()
         
@@ -2928,14 +3806,74 @@ class AskForgeApp:
             user,
             self._on_logout,
             self._show_settings,
-            on_notification_callback=self.show_notification
+            on_notification_callback=self.show_notification,
+            on_context_callback=self._on_chat_context_changed,
+            initial_data=initial_data
         )
         self.chat_screen.pack(fill=BOTH, expand=YES)
+        
+        self.root.after_idle(self._report_startup_profile)
+        
+        # Pré-constrói o popup de pergunta rápida e mantém a conexão aquecida
+        if not self.quick_ask_popup:
+            self.quick_ask_popup = QuickAskPopup(
+                self.root,
+                self.api_client,
+                self._get_quick_ask_context,
+                self._on_quick_ask_answer
+            )
+        self._schedule_keep_alive()
+    
+    def _report_startup_profile(self):
+        """Fecha o perfil de inicialização quando a tela de chat é pintada"""
+        if not startup_profiler.reported:
+            startup_profiler.mark('chat screen')
+            startup_profiler.report()
+    
+    def _on_chat_context_changed(self, context):
+        """Guarda o último módulo/sistema usado para a pergunta rápida"""
+        if self.config.get('last_context') != context:
+            self.config['last_context'] = context
+            save_config(self.config)
+    
+    def _get_quick_ask_context(self):
+        """Retorna o contexto usado pela pergunta rápida"""
+        return self.config.get('last_context')
+    
+    def _on_quick_ask_answer(self, conversation_id):
+        """Callback quando a pergunta rápida recebe resposta"""
+        if hasattr(self, 'chat_screen') and self.chat_screen:
+            self.chat_screen.refresh_conversations()
+    
+    def _schedule_keep_alive(self):
+        """Mantém a conexão TCP/TLS aberta enquanto o usuário está logado"""
+        if self.keep_alive_id:
+            self.root.after_cancel(self.keep_alive_id)
+            self.keep_alive_id = None
+        
+        if not self.api_client or not self.api_client.user:
+            return
+        
+        threading.Thread(target=self.api_client.warm_up, daemon=True).start()
+        self.keep_alive_id = self.root.after(KEEP_ALIVE_INTERVAL_MS, self._schedule_keep_alive)
     
     def _on_logout(self):
         """Callback de logout"""
-        self.api_client.session = requests.Session()
+        self.api_client.session = TelemetrySession()
         self.api_client.user = None
+        if SESSION_FILE.exists():
+            try:
+                SESSION_FILE.unlink()
+            except Exception as e:
+                print(f"Erro ao remover sessão salva: {e}")
+        
+        if self.keep_alive_id:
+            self.root.after_cancel(self.keep_alive_id)
+            self.keep_alive_id = None
+        if self.quick_ask_popup:
+            self.quick_ask_popup.destroy()
+            self.quick_ask_popup = None
+        
         self._show_login_screen()
     
     def _show_settings(self):
@@ -2945,14 +3883,15 @@ class AskForgeApp:
     def _on_settings_saved(self, new_config):
         """Callback quando configurações são salvas"""
         old_hotkey = self.config.get('hotkey')
+        old_quick_hotkey = self.config.get('quick_ask_hotkey')
         self.config = new_config
         
         # Atualiza URL da API
         if self.api_client:
             self.api_client.base_url = new_config.get('api_url', '').rstrip('/')
         
-        # Atualiza hotkey se mudou
-        if new_config.get('hotkey') != old_hotkey:
+        # Atualiza hotkeys se mudaram
+        if new_config.get('hotkey') != old_hotkey or new_config.get('quick_ask_hotkey') != old_quick_hotkey:
             self._setup_hotkey()
     
     def _clear_main_container(self):
@@ -2962,7 +3901,7 @@ class AskForgeApp:
     
     def _setup_tray(self):
         """Configura ícone na bandeja do sistema"""
-        if not TRAY_AVAILABLE:
+        if not (pystray.available() and PILImage.available()):
             return
         
         # Carrega ícone
@@ -2997,7 +3936,7 @@ class AskForgeApp:
     
     def _setup_hotkey(self):
         """Configura atalho global"""
-        if not KEYBOARD_AVAILABLE:
+        if not keyboard.available():
             return
         
         # Remove hotkey anterior
@@ -3016,6 +3955,14 @@ class AskForgeApp:
             self.hotkey_registered = True
         except Exception as e:
             print(f"Erro ao registrar hotkey: {e}")
+        
+        # Registra hotkey da pergunta rápida
+        quick_hotkey = self.config.get('quick_ask_hotkey', DEFAULT_QUICK_ASK_HOTKEY)
+        try:
+            keyboard.add_hotkey(quick_hotkey, self._show_quick_ask, suppress=True, trigger_on_release=True)
+            self.hotkey_registered = True
+        except Exception as e:
+            print(f"Erro ao registrar hotkey da pergunta rápida: {e}")
     
     def _show_from_tray(self):
         """Mostra janela da bandeja"""
@@ -3035,9 +3982,21 @@ class AskForgeApp:
         
         self.root.after(0, show)
     
+    def _show_quick_ask(self):
+        """Abre o popup de pergunta rápida (ou a janela principal se não logado)"""
+        if time.time() - getattr(self, '_last_quick_ask_time', 0) < 0.5:
+            return
+        self._last_quick_ask_time = time.time()
+        
+        if not self.quick_ask_popup:
+            self._show_from_tray()
+            return
+        
+        self.root.after(0, self.quick_ask_popup.show)
+    
     def _on_close(self):
         """Handler de fechamento - minimiza para bandeja"""
-        if TRAY_AVAILABLE and self.tray_icon:
+        if self.tray_icon:
             self.root.withdraw()
         else:
             self._quit_app()
@@ -3045,7 +4004,7 @@ class AskForgeApp:
     def _quit_app(self):
         """Encerra aplicação"""
         # Remove hotkey
-        if KEYBOARD_AVAILABLE and self.hotkey_registered:
+        if self.hotkey_registered:
             try:
                 keyboard.unhook_all_hotkeys()
             except:
@@ -3072,6 +4031,20 @@ class AskForgeApp:
 # ============================================================================
 
 if __name__ == '__main__':
+    # --profile-startup: imprime e grava os tempos de cada fase da inicialização
+    if '--profile-startup' in sys.argv:
+        startup_profiler.enabled = True
+        for phase in startup_profiler.phases:
+            print(f"[startup] {phase['phase']:<18} {phase['ms']:8.1f} ms  (t={phase['at_ms']:.1f} ms)")
+    
+    # --telemetry: coleta métricas (HTTP, renderização, imagens) desde o início
+    # --debug: também coleta eventos de debug e os imprime no console
+    if '--debug' in sys.argv:
+        telemetry.set_level('debug')
+        telemetry.echo = True
+    elif '--telemetry' in sys.argv:
+        telemetry.set_level('info')
+    
     # Verifica se já existe uma instância rodando
     single_instance = SingleInstance()
     
@@ -0,0 +1,619 @@
+"""
+AskForge AI - Servidor Mock
+Implementa, em Python puro, os endpoints usados pelo APIClient do cliente
+desktop (auth/csrf/sessão, conversas, módulos, sistemas, modelo ativo,
+chat/send, feedback e /uploads), sem Next.js, MySQL ou LLM.
+
+Latência, jitter, taxa de erros e velocidade do "LLM" são configuráveis e
+determinísticos (--seed), para reproduzir rede lenta e LLM lento localmente.
+
+Uso:
+    python mock_server.py --port 3001 --latency 150 --jitter 50 --error-rate 0.05
+    python mock_server.py --route /api/chat/send=800:0.2 --llm-first-token 1500 --llm-tps 25
+
+Login padrão: admin@admin.com / admin123
+"""
+
+import re
+import json
+import time
+import zlib
+import uuid
+import random
+import struct
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+SESSION_COOKIE = 'next-auth.session-token'
+CSRF_COOKIE = 'next-auth.csrf-token'
+IMAGE_POOL = 20  # Imagens distintas servidas em /uploads/mock
+IMAGE_EVERY = 5  # Uma imagem Markdown a cada N respostas do assistente
+ATTACHMENT_EVERY = 7  # Um marcador [ANEXO_X] a cada N respostas do assistente
+
+
+# ============================================================================
+# DADOS SINTÉTICOS
+# ============================================================================
+
+def make_png(width, height, seed=0):
+    """Gera um PNG RGB simples sem depender do PIL"""
+    rows = []
+    for y in range(height):
+        row = bytearray([0])  # Filtro "None" da linha
+        for x in range(width):
+            row += bytes(((x + seed * 13) % 256, (y + seed * 29) % 256, (x + y + seed) % 256))
+        rows.append(bytes(row))
+
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', header)
+        + chunk(b'IDAT', zlib.compress(b''.join(rows), 6))
+        + chunk(b'IEND', b'')
+    )
+
+
+def make_attachments(count=10):
+    """Anexos no formato de all_knowledge_attachments"""
+    return [
+        {'id': f'[ANEXO_{i}]', 'url': f'/uploads/mock/manual_{i}.pdf', 'name': f'manual_{i}.pdf'}
+        for i in range(1, count + 1)
+    ]
+
+
+def make_answer(index, topic):
+    """Resposta sintética do assistente (com imagem/anexo periodicamente)"""
+    parts = [
+        f"Resposta {index + 1}. Para configurar {topic}, acesse o menu de cadastros, "
+        "selecione a opção desejada e confirme as alterações.",
+        "1. Abra a tela de parâmetros\n2. Ajuste os valores\n3. Salve"
+    ]
+    if index % IMAGE_EVERY == 0:
+        parts.append(f"![Tela {index + 1}](/uploads/mock/{index % IMAGE_POOL}.png)")
+    if index % ATTACHMENT_EVERY == 0:
+        parts.append(f"Veja o manual: [ANEXO_{index % 10 + 1}]")
+    return "\n\n".join(parts)
+
+
+def make_messages(count, conversation_id=1):
+    """Conversa sintética alternando usuário/assistente, com imagens e anexos"""
+    messages = []
+    for i in range(count):
+        message = {'id': i + 1, 'conversation_id': conversation_id}
+        if i % 2 == 0:
+            message['role'] = 'user'
+            message['content'] = f"Pergunta {i // 2 + 1}: como configurar o recurso {i} no sistema?"
+        else:
+            message['role'] = 'assistant'
+            message['content'] = make_answer(i // 2, f"o recurso {i}")
+            message['used_knowledge_ids'] = [1, 2]
+        messages.append(message)
+    return messages
+
+
+def make_conversations(count, module_id=1, module_nome='Financeiro'):
+    """Lista de conversas no formato de /api/chat/conversations"""
+    return [
+        {
+            'id': i + 1,
+            'user_id': 1,
+            'module_id': module_id,
+            'system_id': None,
+            'titulo': f"Conversa {i + 1}",
+            'module_nome': module_nome,
+            'system_nome': None
+        }
+        for i in range(count)
+    ]
+
+
+# ============================================================================
+# PERFIL DE REDE / LLM
+# ============================================================================
+
+class LatencyProfile:
+    """
+    Latência, jitter e taxa de erros, com overrides por prefixo de rota.
+    Usa um random.Random com semente fixa para que as execuções sejam
+    reproduzíveis.
+    """
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.routes = []  # [(prefixo, latency_ms, error_rate)]
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def add_route(self, spec):
+        """Formato: /api/prefixo=latencia_ms[:taxa_de_erro]"""
+        prefix, _, values = spec.partition('=')
+        latency, _, error_rate = values.partition(':')
+        self.routes.append((prefix, float(latency), float(error_rate) if error_rate else self.error_rate))
+        self.routes.sort(key=lambda route: -len(route[0]))
+
+    def _route(self, path):
+        for prefix, latency_ms, error_rate in self.routes:
+            if path.startswith(prefix):
+                return latency_ms, error_rate
+        return self.latency_ms, self.error_rate
+
+    def apply(self, path):
+        """Dorme a latência simulada; retorna True se a requisição deve falhar"""
+        latency_ms, error_rate = self._route(path)
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+            fail = self.random.random() < error_rate
+        delay = max(0.0, latency_ms + jitter) / 1000
+        if delay:
+            time.sleep(delay)
+        return fail
+
+
+# ============================================================================
+# ESTADO
+# ============================================================================
+
+class MockState:
+    """Usuários, sessões, conversas e feedbacks mantidos em memória"""
+
+    def __init__(self, conversations=5, messages=10):
+        self.lock = threading.Lock()
+        self.users = {
+            'admin@admin.com': {
+                'password': 'admin123',
+                'user': {
+                    'id': '1',
+                    'name': 'Administrador',
+                    'email': 'admin@admin.com',
+                    'grupo': 'adm',
+                    'permissions': {'cadastrar': True, 'batepapo': True},
+                    'modules': [{'id': 1, 'nome': 'Financeiro'}, {'id': 2, 'nome': 'Estoque'}]
+                }
+            }
+        }
+        self.sessions = {}  # token -> user
+        self.csrf_tokens = set()
+        self.modules = [
+            {'id': 1, 'nome': 'Financeiro', 'descricao': 'Contas a pagar e receber'},
+            {'id': 2, 'nome': 'Estoque', 'descricao': 'Movimentações e inventário'}
+        ]
+        self.systems = [
+            {'id': 1, 'module_id': 1, 'nome': 'ERP', 'module_nome': 'Financeiro'},
+            {'id': 2, 'module_id': 1, 'nome': 'Portal', 'module_nome': 'Financeiro'},
+            {'id': 3, 'module_id': 2, 'nome': 'WMS', 'module_nome': 'Estoque'}
+        ]
+        self.active_model = {
+            'id': 1, 'provider': 'mock', 'nome': 'Mock LLM', 'modelo': 'mock-1', 'visualiza_imagem': True
+        }
+        self.attachments = make_attachments()
+        self.images = {f'/uploads/mock/{i}.png': make_png(320, 180, i) for i in range(IMAGE_POOL)}
+        self.feedbacks = []
+        self.set_conversations(make_conversations(conversations), messages)
+
+    def set_conversations(self, conversations, messages_per_conversation=0):
+        """Substitui as conversas (e gera mensagens sintéticas para cada uma)"""
+        with self.lock:
+            self.conversations = {conv['id']: conv for conv in conversations}
+            self.messages = {
+                conv['id']: make_messages(messages_per_conversation, conv['id'])
+                for conv in conversations
+            }
+            self.next_conversation_id = max(self.conversations, default=0) + 1
+
+    def set_messages(self, conversation_id, messages):
+        with self.lock:
+            self.messages[conversation_id] = messages
+
+    def create_session(self, user):
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.sessions[token] = user
+        return token
+
+    def create_conversation(self, module_id, system_id, titulo):
+        module = next((m for m in self.modules if m['id'] == module_id), {'nome': 'Módulo'})
+        system = next((s for s in self.systems if s['id'] == system_id), None)
+        with self.lock:
+            conv = {
+                'id': self.next_conversation_id,
+                'user_id': 1,
+                'module_id': module_id,
+                'system_id': system_id,
+                'titulo': titulo,
+                'module_nome': module['nome'],
+                'system_nome': system['nome'] if system else None
+            }
+            self.next_conversation_id += 1
+            self.conversations[conv['id']] = conv
+            self.messages[conv['id']] = []
+        return conv
+
+
+# ============================================================================
+# HANDLER HTTP
+# ============================================================================
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Roteia as requisições para o estado em memória do servidor"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'AskForgeMock/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # ----- Utilitários -----
+
+    def _send(self, status, body, content_type='application/json', cookies=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        for name, value in (cookies or {}).items():
+            self.send_header('Set-Cookie', f"{name}={value}; Path=/; HttpOnly; SameSite=Lax")
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _read_body(self):
+        raw = self.raw_body
+        if 'application/json' in self.headers.get('Content-Type', ''):
+            return json.loads(raw or b'{}')
+        return {k: v[0] for k, v in parse_qs(raw.decode('utf-8')).items()}
+
+    def _current_user(self):
+        if self.server.no_auth:
+            return self.server.state.users['admin@admin.com']['user']
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        token = cookie.get(SESSION_COOKIE)
+        return self.server.state.sessions.get(token.value) if token else None
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        self.query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        # Lido antes de qualquer resposta: com keep-alive, um corpo deixado na conexão
+        # (erro simulado, 401, 404) seria interpretado como a próxima requisição
+        length = int(self.headers.get('Content-Length') or 0)
+        self.raw_body = self.rfile.read(length) if length else b''
+
+        if self.server.profile.apply(url.path):
+            return self._send(500, {'error': 'Erro simulado pelo servidor mock'})
+
+        for route_method, pattern, handler_name in ROUTES:
+            if route_method != method:
+                continue
+            match = re.fullmatch(pattern, url.path)
+            if match:
+                return getattr(self, handler_name)(*match.groups())
+
+        if method == 'GET' and url.path.startswith('/uploads/'):
+            return self.handle_upload(url.path)
+
+        return self._send(404, {'error': 'Não encontrado'})
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_HEAD(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _require_user(self):
+        user = self._current_user()
+        if not user:
+            self._send(401, {'error': 'Não autorizado'})
+        return user
+
+    # ----- Autenticação -----
+
+    def handle_health(self):
+        self._send(200, {'status': 'ok', 'timestamp': int(time.time() * 1000)})
+
+    def handle_csrf(self):
+        token = uuid.uuid4().hex
+        self.server.state.csrf_tokens.add(token)
+        self._send(200, {'csrfToken': token}, cookies={CSRF_COOKIE: token})
+
+    def handle_login(self):
+        data = self._read_body()
+        state = self.server.state
+        account = state.users.get(data.get('email', ''))
+
+        if data.get('csrfToken') not in state.csrf_tokens:
+            return self._send(403, {'error': 'CSRF inválido'})
+        if not account or account['password'] != data.get('password'):
+            return self._send(401, {'url': '/login?error=CredentialsSignin'})
+
+        token = state.create_session(account['user'])
+        self._send(200, {'url': data.get('callbackUrl', '/')}, cookies={SESSION_COOKIE: token})
+
+    def handle_session(self):
+        user = self._current_user()
+        if not user:
+            return self._send(200, {})
+        expires = (datetime.utcnow() + timedelta(days=30)).isoformat() + 'Z'
+        self._send(200, {'user': user, 'expires': expires})
+
+    # ----- Leitura -----
+
+    def handle_conversations(self):
+        if not self._require_user():
+            return
+        state = self.server.state
+        with state.lock:
+            conversations = sorted(state.conversations.values(), key=lambda c: -c['id'])
+        self._send(200, conversations)
+
+    def handle_conversation(self, conversation_id):
+        if not self._require_user():
+            return
+        state = self.server.state
+        conv = state.conversations.get(int(conversation_id))
+        if not conv:
+            return self._send(404, {'error': 'Conversa não encontrada'})
+        self._send(200, {
+            'conversation': conv,
+            'messages': state.messages.get(conv['id'], []),
+            'all_knowledge_attachments': state.attachments
+        })
+
+    def handle_modules(self):
+        if not self._require_user():
+            return
+        self._send(200, self.server.state.modules)
+
+    def handle_systems(self):
+        if not self._require_user():
+            return
+        systems = self.server.state.systems
+        if self.query.get('module_id'):
+            systems = [s for s in systems if str(s['module_id']) == self.query['module_id']]
+        self._send(200, systems)
+
+    def handle_active_model(self):
+        if not self._require_user():
+            return
+        self._send(200, self.server.state.active_model)
+
+    def handle_upload(self, path):
+        image = self.server.state.images.get(path)
+        if image:
+            return self._send(200, image, 'image/png')
+
+        uploads_dir = self.server.uploads_dir
+        if uploads_dir:
+            file_path = (uploads_dir / path[len('/uploads/'):]).resolve()
+            if uploads_dir in file_path.parents and file_path.is_file():
+                return self._send(200, file_path.read_bytes(), 'application/octet-stream')
+
+        self._send(404, {'error': 'Arquivo não encontrado'})
+
+    # ----- Escrita -----
+
+    def handle_create_conversation(self):
+        if not self._require_user():
+            return
+        data = self._read_body()
+        conv = self.server.state.create_conversation(
+            data.get('module_id'), data.get('system_id'), data.get('titulo') or 'Nova conversa'
+        )
+        self._send(201, {**conv, 'message': 'Conversa criada com sucesso'})
+
+    def handle_rename_conversation(self, conversation_id):
+        if not self._require_user():
+            return
+        conv = self.server.state.conversations.get(int(conversation_id))
+        if not conv:
+            return self._send(404, {'error': 'Conversa não encontrada'})
+        conv['titulo'] = self._read_body().get('titulo') or conv['titulo']
+        self._send(200, {'message': 'Conversa atualizada com sucesso'})
+
+    def handle_delete_conversation(self, conversation_id):
+        if not self._require_user():
+            return
+        state = self.server.state
+        with state.lock:
+            removed = state.conversations.pop(int(conversation_id), None)
+            state.messages.pop(int(conversation_id), None)
+        if not removed:
+            return self._send(404, {'error': 'Conversa não encontrada'})
+        self._send(200, {'message': 'Conversa excluída com sucesso'})
+
+    def handle_feedback(self):
+        user = self._require_user()
+        if not user:
+            return
+        data = self._read_body()
+        if data.get('feedback') not in ('like', 'dislike'):
+            return self._send(400, {'error': 'Feedback inválido'})
+        with self.server.state.lock:
+            self.server.state.feedbacks.append({**data, 'user_id': user['id']})
+        self._send(201, {'message': 'Feedback salvo com sucesso'})
+
+    def handle_send(self):
+        if not self._require_user():
+            return
+        data = self._read_body()
+        message = (data.get('message') or '').strip()
+        if not message:
+            return self._send(400, {'error': 'Mensagem é obrigatória'})
+
+        state = self.server.state
+        generated_title = None
+        conv = state.conversations.get(data.get('conversation_id'))
+        if not conv:
+            generated_title = message[:50]
+            conv = state.create_conversation(data.get('module_id'), data.get('system_id'), generated_title)
+
+        history = state.messages.setdefault(conv['id'], [])
+        answer = make_answer(len(history) // 2, f'"{message[:40]}"')
+        tokens = re.findall(r'\S+\s*', answer)
+
+        with state.lock:
+            history.append({'id': len(history) + 1, 'conversation_id': conv['id'], 'role': 'user', 'content': message})
+            history.append({
+                'id': len(history) + 1,
+                'conversation_id': conv['id'],
+                'role': 'assistant',
+                'content': answer,
+                'used_knowledge_ids': [1, 2]
+            })
+
+        result = {
+            'done': True,
+            'conversation_id': conv['id'],
+            'response': answer,
+            'image_url': None,
+            'file_url': None,
+            'file_name': None,
+            'knowledge_images': [],
+            'all_knowledge_images': [],
+            'all_knowledge_attachments': state.attachments,
+            'used_knowledge_ids': [1, 2],
+            'generated_title': generated_title
+        }
+
+        llm = self.server.llm
+        time.sleep(llm['first_token_ms'] / 1000)
+        token_delay = 1 / llm['tokens_per_sec'] if llm['tokens_per_sec'] else 0
+
+        if not llm['stream'] or 'ndjson' not in self.headers.get('Accept', ''):
+            time.sleep(token_delay * len(tokens))
+            result.pop('done')
+            return self._send(200, result)
+
+        # Resposta incremental em NDJSON (chunked)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        for token in tokens:
+            self._write_chunk((json.dumps({'delta': token}, ensure_ascii=False) + "\n").encode('utf-8'))
+            if token_delay:
+                time.sleep(token_delay)
+        self._write_chunk((json.dumps(result, ensure_ascii=False) + "\n").encode('utf-8'))
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+ROUTES = [
+    ('GET', r'/api/health', 'handle_health'),
+    ('GET', r'/api/auth/csrf', 'handle_csrf'),
+    ('POST', r'/api/auth/callback/credentials', 'handle_login'),
+    ('GET', r'/api/auth/session', 'handle_session'),
+    ('GET', r'/api/chat/conversations', 'handle_conversations'),
+    ('POST', r'/api/chat/conversations', 'handle_create_conversation'),
+    ('GET', r'/api/chat/conversations/(\d+)', 'handle_conversation'),
+    ('PUT', r'/api/chat/conversations/(\d+)', 'handle_rename_conversation'),
+    ('DELETE', r'/api/chat/conversations/(\d+)', 'handle_delete_conversation'),
+    ('GET', r'/api/modules', 'handle_modules'),
+    ('GET', r'/api/systems', 'handle_systems'),
+    ('GET', r'/api/llm/active-model', 'handle_active_model'),
+    ('POST', r'/api/chat/send', 'handle_send'),
+    ('POST', r'/api/chat/feedback', 'handle_feedback'),
+]
+
+
+# ============================================================================
+# SERVIDOR
+# ============================================================================
+
+def start_server(host='127.0.0.1', port=0, profile=None, state=None, llm=None,
+                 uploads_dir=None, no_auth=False, verbose=False):
+    """
+    Sobe o servidor mock em uma thread; retorna (server, base_url).
+    port=0 escolhe uma porta livre (útil em benchmarks e scripts).
+    """
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.profile = profile or LatencyProfile()
+    server.state = state or MockState()
+    server.llm = {'first_token_ms': 0, 'tokens_per_sec': 0, 'stream': True, **(llm or {})}
+    server.uploads_dir = Path(uploads_dir).resolve() if uploads_dir else None
+    server.no_auth = no_auth
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor mock do AskForge para testes de carga e latência")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3001)
+    parser.add_argument('--latency', type=float, default=0, help="Latência base em ms")
+    parser.add_argument('--jitter', type=float, default=0, help="Variação (±ms) da latência")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fração de respostas 500 (0 a 1)")
+    parser.add_argument('--route', action='append', default=[], metavar='PREFIXO=MS[:ERRO]',
+                        help="Override por rota, ex.: /api/chat/send=800:0.1 (pode repetir)")
+    parser.add_argument('--seed', type=int, default=42, help="Semente do gerador (execuções reproduzíveis)")
+    parser.add_argument('--llm-first-token', type=float, default=300, help="Tempo até o 1º token em ms")
+    parser.add_argument('--llm-tps', type=float, default=40, help="Tokens por segundo do LLM simulado")
+    parser.add_argument('--no-stream', action='store_true', help="Responde chat/send só em JSON completo")
+    parser.add_argument('--conversations', type=int, default=5, help="Conversas sintéticas iniciais")
+    parser.add_argument('--messages', type=int, default=10, help="Mensagens por conversa sintética")
+    parser.add_argument('--uploads-dir', default=None, help="Diretório extra servido em /uploads")
+    parser.add_argument('--no-auth', action='store_true', help="Aceita requisições sem sessão")
+    parser.add_argument('--verbose', action='store_true', help="Loga cada requisição")
+    args = parser.parse_args()
+
+    profile = LatencyProfile(args.latency, args.jitter, args.error_rate, args.seed)
+    for spec in args.route:
+        profile.add_route(spec)
+
+    server, base_url = start_server(
+        args.host,
+        args.port,
+        profile=profile,
+        state=MockState(args.conversations, args.messages),
+        llm={
+            'first_token_ms': args.llm_first_token,
+            'tokens_per_sec': args.llm_tps,
+            'stream': not args.no_stream
+        },
+        uploads_dir=args.uploads_dir,
+        no_auth=args.no_auth,
+        verbose=args.verbose
+    )
+
+    print(f"✓ Servidor mock do AskForge em {base_url}")
+    print("  Login: admin@admin.com / admin123")
+    print(f"  Latência {args.latency}±{args.jitter} ms, erros {args.error_rate:.0%}, "
+          f"LLM {args.llm_first_token} ms + {args.llm_tps} tokens/s")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nEncerrando...")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+Acesso ao banco de dados compartilhado pelos scripts Python
+(app.py, init_db.py, scripts de migração e jobs em lote).
+
+- Pool de conexões (mysql.connector.pooling) configurado pelo .env
+- Ping com reconexão antes de entregar cada conexão (evita conexões
+  derrubadas pelo wait_timeout do MySQL em sessões ociosas)
+- Nova tentativa com backoff em erros transitórios (conexão perdida,
+  deadlock, lock wait timeout)
+- Hooks de tempo por consulta (DB_SLOW_QUERY_MS / DB_TRACE no .env)
+
+Uso:
+    import db
+
+    with db.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT ...")
+
+    with db.transaction() as (conn, cursor):
+        cursor.execute("UPDATE ...")   # commit automático; rollback em erro
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import Error, errorcode, pooling
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente do arquivo .env
+load_dotenv()
+
+# Configurações do banco de dados
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': int(os.getenv('DB_PORT', 3306)),
+    'user': os.getenv('DB_USER', 'acore'),
+    'password': os.getenv('DB_PASSWORD', 'acore'),
+    'database': os.getenv('DB_NAME', 'knowledge_base'),
+}
+
+POOL_NAME = 'askforge'
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+MAX_RETRIES = int(os.getenv('DB_MAX_RETRIES', 3))
+RETRY_DELAY = 0.5  # Segundos (dobra a cada tentativa)
+SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 0))  # 0 = desligado
+TRACE = os.getenv('DB_TRACE', '').lower() in ('1', 'true', 'sim')
+
+# Erros em que vale tentar de novo (conexão caiu, deadlock, lock wait)
+TRANSIENT_ERRORS = {
+    errorcode.CR_CONN_HOST_ERROR,  # 2003
+    errorcode.CR_SERVER_GONE_ERROR,  # 2006
+    errorcode.CR_SERVER_LOST,  # 2013
+    errorcode.ER_LOCK_WAIT_TIMEOUT,  # 1205
+    errorcode.ER_LOCK_DEADLOCK,  # 1213
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+_query_hooks = []
+
+
+# ============================================================================
+# HOOKS DE TEMPO
+# ============================================================================
+
+def add_query_hook(callback):
+    """
+    Registra callback(sql, elapsed_ms, rowcount) chamado após cada
+    execute/executemany feito por cursores deste módulo.
+    """
+    _query_hooks.append(callback)
+
+def remove_query_hook(callback):
+    if callback in _query_hooks:
+        _query_hooks.remove(callback)
+
+def _print_query(sql, elapsed_ms, rowcount):
+    summary = ' '.join(sql.split())
+    if len(summary) > 120:
+        summary = summary[:117] + '...'
+    print(f"[db] {elapsed_ms:8.1f} ms  {rowcount:>6} linha(s)  {summary}")
+
+if TRACE:
+    add_query_hook(_print_query)
+elif SLOW_QUERY_MS:
+    add_query_hook(lambda sql, elapsed_ms, rowcount:
+                   elapsed_ms >= SLOW_QUERY_MS and _print_query(sql, elapsed_ms, rowcount))
+
+
+class TimedCursor:
+    """Cursor que mede execute/executemany e repassa o resto ao cursor real"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _timed(self, method, sql, *args, **kwargs):
+        if not _query_hooks:
+            return method(sql, *args, **kwargs)
+        started_at = time.perf_counter()
+        try:
+            return method(sql, *args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            for hook in _query_hooks:
+                hook(sql, elapsed_ms, self._cursor.rowcount)
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        return self._timed(self._cursor.execute, sql, params, *args, **kwargs)
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        return self._timed(self._cursor.executemany, sql, seq_params, *args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class PooledConnection:
+    """Conexão do pool cujos cursores são TimedCursor"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._connection.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+# ============================================================================
+# CONEXÕES
+# ============================================================================
+
+def is_transient(error):
+    """True se o erro é transitório (vale tentar novamente)"""
+    return isinstance(error, pooling.PoolError) or getattr(error, 'errno', None) in TRANSIENT_ERRORS
+
+def get_pool():
+    """Cria o pool na primeira chamada"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = pooling.MySQLConnectionPool(
+                pool_name=POOL_NAME,
+                pool_size=POOL_SIZE,
+                pool_reset_session=True,
+                **DB_CONFIG
+            )
+        return _pool
+
+def get_connection(retries=MAX_RETRIES):
+    """
+    Retorna uma conexão do pool já testada (ping com reconexão).
+    Feche com conn.close() para devolvê-la ao pool.
+    """
+    for attempt in range(retries + 1):
+        try:
+            connection = get_pool().get_connection()
+            connection.ping(reconnect=True, attempts=2, delay=RETRY_DELAY)
+            return PooledConnection(connection)
+        except Error as e:
+            if attempt >= retries or not is_transient(e):
+                raise
+            time.sleep(RETRY_DELAY * 2 ** attempt)
+
+def connect_server(retries=MAX_RETRIES, **overrides):
+    """
+    Conexão avulsa (fora do pool), com as mesmas tentativas. Útil antes de o
+    banco existir (init_db.py) ou para sessões com configuração própria.
+    """
+    config = {k: v for k, v in DB_CONFIG.items() if k != 'database'}
+    config.update(overrides)
+    for attempt in range(retries + 1):
+        try:
+            return PooledConnection(mysql.connector.connect(**config))
+        except Error as e:
+            if attempt >= retries or not is_transient(e):
+                raise
+            time.sleep(RETRY_DELAY * 2 ** attempt)
+
+@contextmanager
+def connection():
+    """Conexão do pool devolvida automaticamente ao sair do bloco"""
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+@contextmanager
+def transaction(**cursor_options):
+    """Conexão + cursor com commit ao final do bloco e rollback em erro"""
+    with connection() as conn:
+        cursor = conn.cursor(**cursor_options)
+        try:
+            yield conn, cursor
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+def run_in_transaction(func, *args, retries=MAX_RETRIES, **kwargs):
+    """
+    Executa func(cursor, conn, *args, **kwargs) em uma transação e repete a
+    transação inteira em deadlock/lock wait timeout/conexão perdida.
+    """
+    for attempt in range(retries + 1):
+        try:
+            with transaction() as (conn, cursor):
+                return func(cursor, conn, *args, **kwargs)
+        except Error as e:
+            if attempt >= retries or not is_transient(e):
+                raise
+            time.sleep(RETRY_DELAY * 2 ** attempt)
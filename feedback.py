@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conteúdo do chat_feedback endereçado por hash e comprimido (feedback_blobs)
+
+conversation_history e knowledge_base_sent ficam uma vez em feedback_blobs
+(chave SHA-256 do texto, conteúdo em zlib) e chat_feedback guarda só os
+hashes. O blob do histórico é um manifesto com o hash de cada mensagem (o
+JSON de cada item da lista), então feedbacks da mesma conversa compartilham
+as mensagens em comum. A API do chat (src/lib/feedback.ts) grava nesse
+formato; este script converte as linhas antigas e oferece a leitura.
+
+Comandos:
+    python feedback.py compactar               # move os textos das linhas antigas para feedback_blobs
+    python feedback.py compactar --simular     # calcula a economia sem gravar
+
+Leitura (os campos são descompactados só quando acessados):
+    reader = FeedbackReader(cursor)
+    for row in reader.rows(["f.feedback = 'positive'"], limit=500):
+        row.knowledge_base_sent
+
+Blobs de feedbacks excluídos não são removidos: são compartilhados entre
+linhas e pequenos depois de comprimidos.
+"""
+
+from mysql.connector import Error
+import sys
+import json
+import time
+import zlib
+import hashlib
+import argparse
+from dotenv import load_dotenv
+
+import db
+from app import Progress
+
+load_dotenv()
+
+# Feedbacks convertidos por transação (keyset por id) e pausa entre lotes
+COMPACT_BATCH_SIZE = 200
+COMPACT_PAUSE = 0.05
+
+# Hashes por consulta IN (...) em feedback_blobs
+BLOB_FETCH_SIZE = 500
+HASH_SIZE = 32
+ZLIB_LEVEL = 6
+
+
+# ============================================================================
+# CONTEÚDO
+# ============================================================================
+
+def content_hash(data):
+    return hashlib.sha256(data).digest()
+
+def add_text(payloads, text):
+    """Registra um texto em payloads {hash: bytes} e retorna o hash"""
+    data = text.encode('utf-8')
+    digest = content_hash(data)
+    payloads[digest] = data
+    return digest
+
+def split_history(text):
+    """
+    Itens de um histórico gerado por JSON.stringify(mensagens), recortados do
+    próprio texto: '[' + ','.join(itens) + ']' reconstrói o original byte a
+    byte. Texto que não é uma lista vira um item só (o miolo entre os
+    colchetes); sem colchetes, retorna None e o texto fica como está.
+    """
+    if not (text.startswith('[') and text.endswith(']')):
+        return None
+    if text == '[]':
+        return []
+    decoder = json.JSONDecoder()
+    items = []
+    position = 1
+    try:
+        while True:
+            _, end = decoder.raw_decode(text, position)
+            items.append(text[position:end])
+            if text[end] != ',':
+                break
+            position = end + 1
+    except (ValueError, IndexError):
+        return [text[1:-1]]
+    if '[' + ','.join(items) + ']' != text:
+        return [text[1:-1]]
+    return items
+
+def add_history(payloads, text):
+    """Registra as mensagens e o manifesto (hashes concatenados); retorna o hash do manifesto ou None"""
+    items = split_history(text)
+    if items is None:
+        return None
+    manifest = b''.join(add_text(payloads, item) for item in items)
+    digest = content_hash(manifest)
+    payloads[digest] = manifest
+    return digest
+
+def store_blobs(cursor, payloads, known, dry_run=False):
+    """
+    Grava em feedback_blobs os conteúdos ainda ausentes (só estes são
+    comprimidos). known guarda os hashes já vistos na execução. Retorna
+    (blobs novos, bytes comprimidos).
+    """
+    pending = [digest for digest in payloads if digest not in known]
+    for start in range(0, len(pending), BLOB_FETCH_SIZE):
+        chunk = pending[start:start + BLOB_FETCH_SIZE]
+        cursor.execute(
+            f"SELECT hash FROM feedback_blobs WHERE hash IN ({', '.join(['%s'] * len(chunk))})",
+            chunk
+        )
+        known.update(bytes(row[0]) for row in cursor.fetchall())
+
+    missing = [(digest, len(payloads[digest]), zlib.compress(payloads[digest], ZLIB_LEVEL))
+               for digest in pending if digest not in known]
+    known.update(digest for digest, _, _ in missing)
+    if missing and not dry_run:
+        cursor.executemany(
+            "INSERT IGNORE INTO feedback_blobs (hash, tamanho, conteudo) VALUES (%s, %s, %s)",
+            missing
+        )
+    return len(missing), sum(len(data) for _, _, data in missing)
+
+
+# ============================================================================
+# LEITURA
+# ============================================================================
+
+class FeedbackRow:
+    """
+    Linha de chat_feedback. conversation_history e knowledge_base_sent são
+    resolvidos (texto antigo ou blobs) e descompactados no primeiro acesso.
+    """
+
+    def __init__(self, reader, values):
+        (self.id, self.conversation_id, self.user_id, self.user_message, self.assistant_response,
+         self.feedback, self.created_at, self.module_id, self.system_id,
+         self._knowledge, self._knowledge_hash, self._history_hash) = values
+        self._reader = reader
+        self._history = None
+
+    @property
+    def knowledge_base_sent(self):
+        if self._knowledge is None and self._knowledge_hash is not None:
+            self._knowledge = self._reader.text(self._knowledge_hash)
+        return self._knowledge
+
+    @property
+    def conversation_history(self):
+        if self._history is None:
+            self._history = (self._reader.history(self._history_hash) if self._history_hash is not None
+                             else self._reader.legacy_history(self.id))
+        return self._history
+
+class FeedbackReader:
+    """
+    Lê chat_feedback resolvendo os hashes em feedback_blobs. Os blobs
+    comprimidos ficam em cache (o mesmo conhecimento aparece em muitas
+    linhas) e são descompactados só quando o campo é lido.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self._compressed = {}
+
+    def load(self, hashes):
+        """Busca em poucas consultas os blobs que ainda não estão no cache"""
+        missing = [digest for digest in dict.fromkeys(bytes(h) for h in hashes) if digest not in self._compressed]
+        for start in range(0, len(missing), BLOB_FETCH_SIZE):
+            chunk = missing[start:start + BLOB_FETCH_SIZE]
+            self.cursor.execute(
+                f"SELECT hash, conteudo FROM feedback_blobs WHERE hash IN ({', '.join(['%s'] * len(chunk))})",
+                chunk
+            )
+            for digest, data in self.cursor.fetchall():
+                self._compressed[bytes(digest)] = data
+
+    def content(self, digest):
+        digest = bytes(digest)
+        if digest not in self._compressed:
+            self.load([digest])
+        return zlib.decompress(self._compressed[digest])
+
+    def text(self, digest):
+        return self.content(digest).decode('utf-8')
+
+    def history(self, digest):
+        """Histórico (texto JSON) a partir do manifesto de mensagens"""
+        manifest = self.content(digest)
+        hashes = [manifest[i:i + HASH_SIZE] for i in range(0, len(manifest), HASH_SIZE)]
+        self.load(hashes)
+        return '[' + ','.join(self.text(h) for h in hashes) + ']'
+
+    def legacy_history(self, feedback_id):
+        """Histórico de uma linha ainda não compactada"""
+        self.cursor.execute("SELECT conversation_history FROM chat_feedback WHERE id = %s", (feedback_id,))
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+
+    def rows(self, filters=(), params=(), limit=None):
+        """
+        Feedbacks (com module_id/system_id da conversa), mais recentes
+        primeiro. O blob do conhecimento vem na mesma consulta, ainda
+        comprimido; o histórico só é lido se for acessado.
+        """
+        self.cursor.execute(
+            f"""SELECT f.id, f.conversation_id, f.user_id, f.user_message, f.assistant_response,
+                       f.feedback, f.created_at, c.module_id, c.system_id,
+                       f.knowledge_base_sent, f.knowledge_base_sent_hash, f.conversation_history_hash,
+                       kb.conteudo
+                FROM chat_feedback f
+                JOIN chat_conversations c ON c.id = f.conversation_id
+                LEFT JOIN feedback_blobs kb ON kb.hash = f.knowledge_base_sent_hash
+                WHERE {' AND '.join(filters) or '1 = 1'}
+                ORDER BY f.id DESC{f' LIMIT {int(limit)}' if limit else ''}""",
+            params
+        )
+        rows = []
+        for *values, knowledge_data in self.cursor.fetchall():
+            if knowledge_data is not None:
+                self._compressed[bytes(values[10])] = knowledge_data
+            rows.append(FeedbackRow(self, values))
+        return rows
+
+
+# ============================================================================
+# COMPACTAÇÃO
+# ============================================================================
+
+PENDING_FEEDBACK = "(conversation_history IS NOT NULL OR knowledge_base_sent IS NOT NULL)"
+
+def fetch_pending(cursor, after_id, batch_size):
+    """
+    Próximo lote por keyset, travado até o commit: um feedback reavaliado
+    durante a conversão espera o lote e então grava por cima.
+    """
+    cursor.execute(
+        f"""SELECT id, conversation_history, knowledge_base_sent FROM chat_feedback
+            WHERE id > %s AND {PENDING_FEEDBACK}
+            ORDER BY id LIMIT %s FOR UPDATE""",
+        (after_id, batch_size)
+    )
+    return cursor.fetchall()
+
+def compact_rows(rows):
+    """Conteúdos a gravar e as alterações de cada linha: (payloads, [(id, {coluna: valor})], bytes originais)"""
+    payloads = {}
+    updates = []
+    original = 0
+    for feedback_id, history, knowledge in rows:
+        changes = {}
+        if history is not None:
+            digest = add_history(payloads, history)
+            if digest is not None:
+                changes.update(conversation_history=None, conversation_history_hash=digest)
+                original += len(history.encode('utf-8'))
+        if knowledge is not None:
+            changes.update(knowledge_base_sent=None, knowledge_base_sent_hash=add_text(payloads, knowledge))
+            original += len(knowledge.encode('utf-8'))
+        if changes:
+            updates.append((feedback_id, changes))
+    return payloads, updates, original
+
+def write_updates(cursor, updates):
+    for feedback_id, changes in updates:
+        cursor.execute(
+            f"UPDATE chat_feedback SET {', '.join(f'{column} = %s' for column in changes)} WHERE id = %s",
+            (*changes.values(), feedback_id)
+        )
+
+def compact_feedback(cursor, conn, batch_size=COMPACT_BATCH_SIZE, pause=COMPACT_PAUSE, dry_run=False):
+    """
+    Move os textos das linhas antigas para feedback_blobs em lotes curtos
+    (um commit por lote). Pode ser interrompido e executado de novo: só as
+    linhas que ainda têm texto são lidas.
+    """
+    print(f"\n--- COMPACTAR FEEDBACKS{' (simulação)' if dry_run else ''} ---\n")
+    cursor.execute(f"SELECT COUNT(*) FROM chat_feedback WHERE {PENDING_FEEDBACK}")
+    total = cursor.fetchone()[0]
+    if total == 0:
+        print("✓ Nenhum feedback pendente")
+        return True
+
+    progress = Progress(total, "Simulando" if dry_run else "Compactando")
+    known = set()
+    converted = blobs = original = stored = 0
+    last_id = 0
+    try:
+        while True:
+            rows = fetch_pending(cursor, last_id, batch_size)
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            payloads, updates, batch_original = compact_rows(rows)
+            new_blobs, new_bytes = store_blobs(cursor, payloads, known, dry_run)
+            if dry_run:
+                conn.rollback()
+            else:
+                write_updates(cursor, updates)
+                conn.commit()
+            converted += len(updates)
+            blobs += new_blobs
+            original += batch_original
+            stored += new_bytes
+            progress.advance(len(rows))
+            if pause:
+                time.sleep(pause)
+    except Error:
+        conn.rollback()
+        raise
+    progress.finish()
+
+    elapsed = time.perf_counter() - progress.started_at
+    saved = 1 - stored / original if original else 0
+    print()
+    print(f"{'✓ Simulação:' if dry_run else '✅'} {converted} feedback(s), "
+          f"{original / 1048576:.1f} MB de texto -> {blobs} blob(s) novo(s) com {stored / 1048576:.1f} MB "
+          f"({saved:.0%} menor) em {elapsed:.1f}s")
+    if dry_run:
+        print("   Nada foi gravado.")
+    else:
+        print("   O espaço das colunas antigas volta ao sistema com: OPTIMIZE TABLE chat_feedback")
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Conteúdo comprimido do chat_feedback")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    compact = subparsers.add_parser('compactar', help="Move o histórico e o conhecimento das linhas antigas para feedback_blobs")
+    compact.add_argument('--lote', type=int, default=COMPACT_BATCH_SIZE, help=f"Feedbacks por lote (padrão: {COMPACT_BATCH_SIZE})")
+    compact.add_argument('--pausa', type=float, default=COMPACT_PAUSE, help=f"Segundos entre lotes (padrão: {COMPACT_PAUSE})")
+    compact.add_argument('--simular', action='store_true', help="Calcula a economia sem gravar")
+
+    args = parser.parse_args(argv)
+
+    try:
+        connection = db.get_connection()
+        cursor = connection.cursor()
+        ok = compact_feedback(cursor, connection, batch_size=max(1, args.lote),
+                              pause=max(0.0, args.pausa), dry_run=args.simular)
+        return 0 if ok else 2
+
+    except Error as e:
+        print(f"❌ Erro no banco de dados: {e}")
+        return 1
+
+    finally:
+        if 'connection' in locals():
+            cursor.close()
+            connection.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,29 +5,25 @@ Execute este script para criar todas as tabelas necessárias e o usuário admin
 Uso: python init_db.py
 """
 
-import mysql.connector
 from mysql.connector import Error
-import hashlib
 import os
 from dotenv import load_dotenv
 
+import db
+import migrate
+
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
 
-# Configurações do banco de dados
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'port': int(os.getenv('DB_PORT', 3306)),
-    'user': os.getenv('DB_USER', 'acore'),
-    'password': os.getenv('DB_PASSWORD', 'acore'),
-}
+DB_NAME = db.DB_CONFIG['database']
 
-DB_NAME = os.getenv('DB_NAME', 'knowledge_base')
+# Custo do bcrypt (calibrado com: python app.py calibrar-bcrypt)
+BCRYPT_COST = int(os.getenv('BCRYPT_COST') or 12)
 
 def hash_password(password: str) -> str:
     """Gera hash da senha usando bcrypt-like (SHA256 para simplicidade no Python)"""
     import bcrypt
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_COST)).decode('utf-8')
 
 def create_database(cursor):
     """Cria o banco de dados se não existir"""
@@ -35,188 +31,6 @@ def create_database(cursor):
     cursor.execute(f"USE {DB_NAME}")
     print(f"✓ Banco de dados '{DB_NAME}' criado/selecionado com sucesso!")
 
-def create_tables(cursor):
-    """Cria todas as tabelas necessárias"""
-    
-    # Tabela de usuários
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            nome VARCHAR(255) NOT NULL,
-            email VARCHAR(255) NOT NULL UNIQUE,
-            senha VARCHAR(255) NOT NULL,
-            grupo ENUM('adm', 'user') NOT NULL DEFAULT 'user',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """)
-    print("✓ Tabela 'users' criada com sucesso!")
-    
-    # Tabela de permissões
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS permissions (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT NOT NULL,
-            cadastrar BOOLEAN DEFAULT FALSE,
-            batepapo BOOLEAN DEFAULT FALSE,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """)
-    print("✓ Tabela 'permissions' criada com sucesso!")
-    
-    # Tabela de módulos
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS modules (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            nome VARCHAR(255) NOT NULL UNIQUE,
-            descricao TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """)
-    print("✓ Tabela 'modules' criada com sucesso!")
-    
-    # Tabela de acesso aos módulos
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS module_access (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT NOT NULL,
-            module_id INT NOT NULL,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-            FOREIGN KEY (module_id) REFERENCES modules(id) ON DELETE CASCADE,
-            UNIQUE KEY unique_user_module (user_id, module_id)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """)
-    print("✓ Tabela 'module_access' criada com sucesso!")
-    
-    # Tabela de sistemas (dentro de cada módulo)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS systems (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            module_id INT NOT NULL,
-            nome VARCHAR(255) NOT NULL,
-            descricao TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (module_id) REFERENCES modules(id) ON DELETE CASCADE,
-            UNIQUE KEY unique_system_module (nome, module_id)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """)
-    print("✓ Tabela 'systems' criada com sucesso!")
-    
-    # Tabela de base de conhecimento
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS knowledge_base (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            module_id INT NOT NULL,
-            system_id INT,
-            created_by INT NOT NULL,
-            titulo VARCHAR(500) NOT NULL,
-            conteudo LONGTEXT,
-            tags VARCHAR(500),
-            data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            FOREIGN KEY (module_id) REFERENCES modules(id) ON DELETE CASCADE,
-            FOREIGN KEY (system_id) REFERENCES systems(id) ON DELETE SET NULL,
-            FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE CASCADE
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """)
-    print("✓ Tabela 'knowledge_base' criada com sucesso!")
-    
-    # Tabela de anexos
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS attachments (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            knowledge_id INT NOT NULL,
-            filename VARCHAR(255) NOT NULL,
-            original_name VARCHAR(255) NOT NULL,
-            file_path VARCHAR(500) NOT NULL,
-            file_type VARCHAR(100),
-            file_size INT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (knowledge_id) REFERENCES knowledge_base(id) ON DELETE CASCADE
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """)
-    print("✓ Tabela 'attachments' criada com sucesso!")
-    
-    # Tabela de configurações do LLM
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS llm_config (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            nome_empresa VARCHAR(255) NOT NULL,
-            prompt_sistema LONGTEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """)
-    print("✓ Tabela 'llm_config' criada com sucesso!")
-    
-    # Tabela de modelos LLM
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS llm_models (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            provider ENUM('openai', 'anthropic', 'deepseek', 'lmstudio', 'ollama', 'openrouter') NOT NULL,
-            nome VARCHAR(255) NOT NULL,
-            modelo VARCHAR(255) NOT NULL,
-            api_key VARCHAR(500),
-            api_url VARCHAR(500),
-            visualiza_imagem BOOLEAN DEFAULT FALSE,
-            ativo BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """)
-    print("✓ Tabela 'llm_models' criada com sucesso!")
-    
-    # Tabela de conversas do chat
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS chat_conversations (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT NOT NULL,
-            module_id INT NOT NULL,
-            system_id INT,
-            titulo VARCHAR(255) DEFAULT 'Nova conversa',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-            FOREIGN KEY (module_id) REFERENCES modules(id) ON DELETE CASCADE,
-            FOREIGN KEY (system_id) REFERENCES systems(id) ON DELETE SET NULL
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """)
-    print("✓ Tabela 'chat_conversations' criada com sucesso!")
-    
-    # Tabela de mensagens do chat
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS chat_messages (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            conversation_id INT NOT NULL,
-            role ENUM('user', 'assistant', 'system') NOT NULL,
-            content LONGTEXT NOT NULL,
-            image_url VARCHAR(500),
-            file_url VARCHAR(500),
-            file_name VARCHAR(255),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (conversation_id) REFERENCES chat_conversations(id) ON DELETE CASCADE
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """)
-    print("✓ Tabela 'chat_messages' criada com sucesso!")
-    
-    # Tabela de feedback das respostas do chat
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS chat_feedback (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            conversation_id INT NOT NULL,
-            user_id INT NOT NULL,
-            user_message LONGTEXT NOT NULL,
-            assistant_response LONGTEXT NOT NULL,
-            conversation_history LONGTEXT,
-            knowledge_base_sent LONGTEXT,
-            feedback ENUM('positive', 'negative') NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (conversation_id) REFERENCES chat_conversations(id) ON DELETE CASCADE,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """)
-    print("✓ Tabela 'chat_feedback' criada com sucesso!")
-
 def create_admin_user(cursor):
     """Cria o usuário administrador padrão"""
     try:
@@ -228,7 +42,7 @@ def create_admin_user(cursor):
         
         # Hash da senha 'admin123'
         import bcrypt
-        senha_hash = bcrypt.hashpw('admin123'.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        senha_hash = bcrypt.hashpw('admin123'.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_COST)).decode('utf-8')
         
         # Insere o usuário admin
         cursor.execute("""
@@ -280,8 +94,8 @@ def main():
     print()
     
     try:
-        # Conecta ao MySQL
-        connection = mysql.connector.connect(**DB_CONFIG)
+        # Conecta ao MySQL (sem banco selecionado: ele pode ainda não existir)
+        connection = db.connect_server()
         cursor = connection.cursor()
         
         print("✓ Conectado ao MySQL com sucesso!")
@@ -291,9 +105,10 @@ def main():
         create_database(cursor)
         print()
         
-        # Cria as tabelas
-        print("Criando tabelas...")
-        create_tables(cursor)
+        # Cria/atualiza as tabelas (migrations/, registradas em schema_migrations)
+        print("Aplicando migrações...")
+        if not migrate.migrate(cursor, connection):
+            return
         print()
         
         # Cria o usuário admin
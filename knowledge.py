@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manutenção da base de conhecimento (knowledge_base)
+
+Comandos:
+    python knowledge.py preparar-texto             # documentos sem conteudo_texto
+    python knowledge.py preparar-texto --todos     # recalcula todos
+    python knowledge.py fragmentar                 # documentos sem trechos (knowledge_chunks)
+    python knowledge.py fragmentar --todos         # refaz todos (ex.: mudou KNOWLEDGE_CHUNK_TOKENS)
+    python knowledge.py indexar-tags               # sincroniza tags/knowledge_tags com knowledge_base.tags
+
+Todos os comandos aceitam --lote e --simular (processa sem gravar);
+preparar-texto e fragmentar aceitam também --todos e --workers.
+
+O texto pronto para o prompt (conteudo_texto), o manifesto de imagens
+(knowledge_images), os trechos (knowledge_chunks) e as tags normalizadas
+(knowledge_tags) são gravados pelas APIs de cadastro/edição; este script preenche os documentos antigos e recalcula tudo
+se a transformação mudar. A conversão roda em um pool de processos enquanto o
+lote anterior é gravado.
+"""
+
+from mysql.connector import Error
+import os
+import re
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+
+import db
+from app import Progress
+
+# Carrega variáveis de ambiente (KNOWLEDGE_CHUNK_TOKENS é o mesmo do Next.js)
+load_dotenv()
+
+# Documentos lidos e gravados por lote (keyset por id)
+TEXT_BATCH_SIZE = 200
+
+# Processos de conversão (0 = núcleos - 1)
+KNOWLEDGE_WORKERS = int(os.getenv('KNOWLEDGE_WORKERS', '0'))
+
+# Tamanho máximo de um trecho em tokens estimados (KNOWLEDGE_CHUNK_TOKENS em src/lib/knowledge.ts).
+# Trechos menores que 1/8 disso são juntados ao anterior.
+KNOWLEDGE_CHUNK_TOKENS = int(os.getenv('KNOWLEDGE_CHUNK_TOKENS') or 400)
+SECTION_TITLE_MAX = 255
+
+# Tags normalizadas (tags/knowledge_tags): mesmas regras de parseTags em src/lib/knowledge.ts
+TAG_MAX = 100
+TAG_BATCH_SIZE = 500
+
+# Mesmos padrões de src/lib/knowledge.ts. \s do JavaScript é explícito aqui
+# porque o \s do Python cobre um conjunto diferente de espaços.
+JS_SPACE_CHARS = '\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff'
+IMAGE_TAG = re.compile(r'''<img[^>]+src=["']([^"']+)["'][^>]*>''', re.IGNORECASE)
+HTML_TAG = re.compile(r'<[^>]*>')
+SPACES = re.compile(f'[{JS_SPACE_CHARS}]+')
+BEFORE_IMAGE = re.compile(f'[{JS_SPACE_CHARS}]*(!\\[)')
+AFTER_IMAGE = re.compile(f'(\\))[{JS_SPACE_CHARS}]*')
+JS_TRIM = re.compile(f'^[{JS_SPACE_CHARS}]+|[{JS_SPACE_CHARS}]+$')
+HEADING = re.compile(r'<h[1-6][^>]*>([\s\S]*?)</h[1-6]>', re.IGNORECASE)
+SENTENCE_SPLIT = re.compile(r'((?<=[.!?]) +|\n\n)')
+WORD_CHARS = '0-9A-Za-z\u00c0-\u024f'
+TOKEN = re.compile(f'[{WORD_CHARS}]+|[^{WORD_CHARS}{JS_SPACE_CHARS}]')
+
+
+# ============================================================================
+# CONVERSÃO
+# ============================================================================
+
+def js_trim(text):
+    return JS_TRIM.sub('', text)
+
+def html_to_text(html, titulo, images):
+    """Converte um trecho de HTML; as imagens encontradas entram em images (numeração contínua)"""
+    def replace_image(match):
+        src = match.group(1)
+        url = src if src.startswith('/') or src.startswith('http') else f"/{src}"
+        images.append((len(images) + 1, url))
+        return f"\n![Imagem {len(images)} - {titulo}]({url})\n"
+
+    texto = IMAGE_TAG.sub(replace_image, html)
+    texto = HTML_TAG.sub(' ', texto)
+    texto = SPACES.sub(' ', texto)
+    texto = BEFORE_IMAGE.sub('\n\n\\1', texto)  # Quebra de linha antes das imagens
+    texto = AFTER_IMAGE.sub('\\1\n\n', texto)  # Quebra de linha depois das imagens
+    return js_trim(texto)
+
+def build_knowledge_text(titulo, conteudo):
+    """
+    Texto pronto para o prompt e lista de imagens [(posicao, url)].
+    Deve produzir exatamente o mesmo resultado que buildKnowledgeText
+    (src/lib/knowledge.ts), usado pelas APIs ao gravar o documento.
+    """
+    images = []
+    return html_to_text(conteudo, titulo, images), images
+
+def estimate_tokens(text):
+    """Tokens estimados: palavras contam 1 a cada 4 letras, pontuação/símbolos contam 1"""
+    return sum((len(match) + 3) // 4 for match in TOKEN.findall(text))
+
+def split_sections(conteudo):
+    """Divide o HTML nos títulos (<h1>..<h6>): [(título em HTML | None, corpo em HTML)]"""
+    sections = []
+    heading = None
+    last_index = 0
+    for match in HEADING.finditer(conteudo):
+        sections.append((heading, conteudo[last_index:match.start()]))
+        heading = match.group(1)
+        last_index = match.end()
+    sections.append((heading, conteudo[last_index:]))
+    return sections
+
+def pack_text(text, max_tokens):
+    """Junta frases (ou palavras, se uma frase sozinha passa do limite) em pedaços de até max_tokens"""
+    pieces = []
+    current = ''
+    current_tokens = 0
+
+    def add(unit):
+        nonlocal current, current_tokens
+        tokens = estimate_tokens(unit)
+        if current_tokens + tokens > max_tokens and js_trim(current):
+            pieces.append(js_trim(current))
+            current = ''
+            current_tokens = 0
+        current += unit
+        current_tokens += tokens
+
+    parts = SENTENCE_SPLIT.split(text)
+    for i in range(0, len(parts), 2):
+        unit = parts[i] + (parts[i + 1] if i + 1 < len(parts) else '')
+        if estimate_tokens(unit) > max_tokens:
+            words = unit.split(' ')
+            for index, word in enumerate(words):
+                add(f"{word} " if index < len(words) - 1 else word)
+        else:
+            add(unit)
+    if js_trim(current):
+        pieces.append(js_trim(current))
+    return pieces
+
+def chunk_knowledge(titulo, conteudo, max_tokens=KNOWLEDGE_CHUNK_TOKENS):
+    """
+    Trechos do documento [(posicao, secao, conteudo, tokens)].
+    Deve produzir exatamente o mesmo resultado que chunkKnowledge
+    (src/lib/knowledge.ts), usado pelas APIs ao gravar o documento.
+    """
+    images = []
+    min_tokens = max_tokens // 8
+    chunks = []
+    pending_heading = None  # Título sem corpo (ex.: <h1> seguido de <h2>)
+
+    for heading_html, body_html in split_sections(conteudo):
+        heading = None if heading_html is None else html_to_text(heading_html, titulo, images) or None
+        body = html_to_text(body_html, titulo, images)
+        if pending_heading:
+            heading = f"{pending_heading} - {heading}" if heading else pending_heading
+        if not body:
+            pending_heading = heading
+            continue
+        pending_heading = None
+
+        secao = None if heading is None else heading[:SECTION_TITLE_MAX]
+        for piece in pack_text(body, max_tokens):
+            text = f"{heading}\n\n{piece}" if heading else piece
+            tokens = estimate_tokens(text)
+            if chunks and tokens < min_tokens and chunks[-1][3] + tokens <= max_tokens:
+                posicao, previous_secao, previous_text, _ = chunks[-1]
+                merged = f"{previous_text}\n\n{text}"
+                chunks[-1] = (posicao, previous_secao, merged, estimate_tokens(merged))
+            else:
+                chunks.append((len(chunks) + 1, secao, text, tokens))
+    return chunks
+
+def parse_tags(tags):
+    """
+    Nomes normalizados de knowledge_base.tags (separadas por vírgula): espaços
+    colapsados, minúsculas, até TAG_MAX caracteres, sem repetição
+    """
+    names = []
+    for part in (tags or '').split(','):
+        name = js_trim(js_trim(SPACES.sub(' ', part)).lower()[:TAG_MAX])
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def prepare_document(row):
+    """Executado nos processos do pool: (id, data_atualizacao, (texto, imagens))"""
+    knowledge_id, titulo, conteudo, data_atualizacao = row
+    return knowledge_id, data_atualizacao, build_knowledge_text(titulo or '', conteudo or '')
+
+def chunk_document(row):
+    """Executado nos processos do pool: (id, data_atualizacao, trechos)"""
+    knowledge_id, titulo, conteudo, data_atualizacao = row
+    return knowledge_id, data_atualizacao, chunk_knowledge(titulo or '', conteudo or '')
+
+def resolve_workers(workers):
+    """Número de processos de conversão (0 = núcleos - 1, mínimo 1)"""
+    if workers and workers > 0:
+        return workers
+    return max(1, (os.cpu_count() or 2) - 1)
+
+def start_converting(pool, convert, rows):
+    """
+    Envia o lote para o pool e retorna um iterador com os resultados, na
+    mesma ordem. Os processos continuam convertendo enquanto o lote anterior
+    é gravado.
+    """
+    if pool is None:
+        return (convert(row) for row in rows)
+    return pool.map(convert, rows, chunksize=max(1, len(rows) // 32))
+
+
+# ============================================================================
+# BANCO DE DADOS
+# ============================================================================
+
+# Documentos pendentes de cada comando (sem --todos)
+PENDING_TEXT = "conteudo_texto IS NULL"
+PENDING_CHUNKS = "NOT EXISTS (SELECT 1 FROM knowledge_chunks c WHERE c.knowledge_id = knowledge_base.id)"
+
+def pending_filter(pending_sql):
+    """Condição extra para as consultas (vazia com --todos)"""
+    return f" AND {pending_sql}" if pending_sql else ""
+
+def count_documents(cursor, pending_sql):
+    cursor.execute(f"SELECT COUNT(*) FROM knowledge_base WHERE id > 0{pending_filter(pending_sql)}")
+    return cursor.fetchone()[0]
+
+def fetch_documents(cursor, after_id, pending_sql, batch_size):
+    """Próximo lote por keyset (id > after_id), sem OFFSET"""
+    cursor.execute(
+        f"""SELECT id, titulo, conteudo, data_atualizacao FROM knowledge_base
+            WHERE id > %s{pending_filter(pending_sql)}
+            ORDER BY id LIMIT %s""",
+        (after_id, batch_size)
+    )
+    return cursor.fetchall()
+
+def write_text(cursor, knowledge_id, data_atualizacao, result):
+    """
+    A condição em data_atualizacao ignora documentos editados durante a
+    execução (a API já gravou o texto novo) e data_atualizacao =
+    data_atualizacao evita que o backfill mude a data de edição. O manifesto
+    só é trocado nos documentos atualizados.
+    """
+    texto, images = result
+    cursor.execute(
+        """UPDATE knowledge_base
+           SET conteudo_texto = %s, data_atualizacao = data_atualizacao
+           WHERE id = %s AND data_atualizacao <=> %s""",
+        (texto, knowledge_id, data_atualizacao)
+    )
+    if not cursor.rowcount:
+        return False
+    cursor.execute("DELETE FROM knowledge_images WHERE knowledge_id = %s", (knowledge_id,))
+    if images:
+        cursor.executemany(
+            "INSERT INTO knowledge_images (knowledge_id, posicao, url) VALUES (%s, %s, %s)",
+            [(knowledge_id, posicao, url) for posicao, url in images]
+        )
+    return True
+
+def write_chunks(cursor, knowledge_id, data_atualizacao, chunks):
+    """
+    Troca os trechos se o documento não foi editado durante a execução. O
+    FOR UPDATE segura uma edição concorrente até o commit do lote; ela então
+    grava os próprios trechos por cima.
+    """
+    cursor.execute(
+        "SELECT id FROM knowledge_base WHERE id = %s AND data_atualizacao <=> %s FOR UPDATE",
+        (knowledge_id, data_atualizacao)
+    )
+    if not cursor.fetchall():
+        return False
+    cursor.execute("DELETE FROM knowledge_chunks WHERE knowledge_id = %s", (knowledge_id,))
+    if chunks:
+        cursor.executemany(
+            "INSERT INTO knowledge_chunks (knowledge_id, posicao, secao, conteudo, tokens) VALUES (%s, %s, %s, %s, %s)",
+            [(knowledge_id, *chunk) for chunk in chunks]
+        )
+    return True
+
+def fetch_tag_batch(cursor, after_id, batch_size):
+    """
+    Próximo lote por keyset, travado até o commit: uma edição concorrente
+    espera o lote terminar e então grava as próprias tags por cima.
+    """
+    cursor.execute(
+        "SELECT id, tags FROM knowledge_base WHERE id > %s ORDER BY id LIMIT %s FOR UPDATE",
+        (after_id, batch_size)
+    )
+    return cursor.fetchall()
+
+def current_tags(cursor, ids):
+    """{knowledge_id: {tag_id, ...}} já gravados em knowledge_tags"""
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(
+        f"SELECT knowledge_id, tag_id FROM knowledge_tags WHERE knowledge_id IN ({placeholders})",
+        ids
+    )
+    current = {}
+    for knowledge_id, tag_id in cursor.fetchall():
+        current.setdefault(knowledge_id, set()).add(tag_id)
+    return current
+
+def resolve_tags(cursor, names):
+    """
+    {nome: tag_id} dos nomes que já existem em tags. A comparação é feita
+    pelo banco (a collation ignora maiúsculas/acentos), então 'Nota' e 'nóta'
+    chegam ao mesmo id; nomes sem tag ficam de fora.
+    """
+    ids = {}
+    names = sorted(set(names))
+    for start in range(0, len(names), TAG_BATCH_SIZE):
+        batch = names[start:start + TAG_BATCH_SIZE]
+        cursor.execute(
+            f"""SELECT n.nome, t.id FROM ({' UNION ALL '.join(['SELECT %s AS nome'] * len(batch))}) n
+                JOIN tags t ON t.nome = n.nome""",
+            batch
+        )
+        ids.update(cursor.fetchall())
+    return ids
+
+def write_tags(cursor, changed):
+    """
+    Troca as associações dos documentos [(id, nomes)]. INSERT IGNORE em tags
+    reaproveita nomes existentes (a collation ignora maiúsculas/acentos).
+    """
+    placeholders = ', '.join(['%s'] * len(changed))
+    cursor.execute(f"DELETE FROM knowledge_tags WHERE knowledge_id IN ({placeholders})",
+                   [knowledge_id for knowledge_id, _ in changed])
+    names = sorted({name for _, doc_names in changed for name in doc_names})
+    if not names:
+        return
+    cursor.executemany("INSERT IGNORE INTO tags (nome) VALUES (%s)", [(name,) for name in names])
+    for knowledge_id, doc_names in changed:
+        if doc_names:
+            cursor.execute(
+                f"""INSERT IGNORE INTO knowledge_tags (knowledge_id, tag_id)
+                    SELECT %s, id FROM tags WHERE nome IN ({', '.join(['%s'] * len(doc_names))})""",
+                (knowledge_id, *doc_names)
+            )
+
+def sync_tags(cursor, conn, batch_size=TAG_BATCH_SIZE, dry_run=False, progress=None):
+    """
+    Percorre knowledge_base em lotes e regrava knowledge_tags dos documentos
+    cujas tags mudaram (cadastros feitos por código que só grava o VARCHAR).
+    Um commit por lote. Retorna (documentos lidos, documentos alterados).
+    """
+    documents = changed_count = 0
+    last_id = 0
+    while True:
+        rows = fetch_tag_batch(cursor, last_id, batch_size)
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        parsed = [(knowledge_id, parse_tags(tags)) for knowledge_id, tags in rows]
+        current = current_tags(cursor, [row[0] for row in rows])
+        tag_ids = resolve_tags(cursor, [name for _, names in parsed for name in names])
+        # Compara ids, não nomes: o nome gravado em tags pode diferir em acento/maiúscula
+        changed = [(knowledge_id, names) for knowledge_id, names in parsed
+                   if any(name not in tag_ids for name in names)
+                   or {tag_ids[name] for name in names} != current.get(knowledge_id, set())]
+        if changed and not dry_run:
+            write_tags(cursor, changed)
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+        documents += len(rows)
+        changed_count += len(changed)
+        if progress:
+            progress.advance(len(rows))
+    return documents, changed_count
+
+def write_batch(cursor, conn, write, results, progress):
+    """Grava o lote convertido em uma transação. Retorna (atualizados, ignorados)"""
+    updated = skipped = 0
+    for knowledge_id, data_atualizacao, result in results:
+        if write(cursor, knowledge_id, data_atualizacao, result):
+            updated += 1
+        else:
+            skipped += 1
+        progress.advance()
+    conn.commit()
+    return updated, skipped
+
+
+# ============================================================================
+# COMANDOS
+# ============================================================================
+
+def process_documents(cursor, conn, title, pending_sql, convert, write, count_items, item_label,
+                      batch_size=TEXT_BATCH_SIZE, workers=KNOWLEDGE_WORKERS, dry_run=False):
+    """
+    Lê os documentos em lotes, converte no pool (convert) e grava (write).
+    count_items(resultado) alimenta o resumo (imagens, trechos...).
+    """
+    print(f"\n--- {title} ---\n")
+    total = count_documents(cursor, pending_sql)
+    if total == 0:
+        print("✓ Nenhum documento pendente")
+        return True
+
+    progress = Progress(total, "Simulando" if dry_run else "Processando")
+    workers = resolve_workers(workers)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    updated = skipped = items = 0
+    in_flight = None  # Lote em conversão: iterador de resultados
+    last_id = 0
+
+    def flush(results):
+        nonlocal updated, skipped, items
+        if dry_run:
+            for _, _, result in results:
+                items += count_items(result)
+                updated += 1
+                progress.advance()
+            return
+        done, ignored = write_batch(cursor, conn, write, results, progress)
+        updated += done
+        skipped += ignored
+
+    try:
+        while True:
+            rows = fetch_documents(cursor, last_id, pending_sql, batch_size)
+            if in_flight is not None:
+                flush(in_flight)
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            in_flight = start_converting(pool, convert, rows)
+    except Error:
+        conn.rollback()
+        raise
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+    progress.finish()
+
+    elapsed = time.perf_counter() - progress.started_at
+    print()
+    if dry_run:
+        print(f"✓ Simulação: {updated} documento(s) processado(s), {items} {item_label}, nada gravado")
+    else:
+        print(f"✅ {updated} documento(s) processado(s) em {elapsed:.1f}s "
+              f"({updated / elapsed if elapsed else 0:.1f} documentos/s, "
+              f"{workers} processo(s))")
+        if skipped:
+            print(f"⚠️  {skipped} documento(s) editado(s) durante a execução foram mantidos como estão")
+    return True
+
+def prepare_texts(cursor, conn, all_documents=False, **options):
+    """Preenche conteudo_texto e knowledge_images em lotes"""
+    return process_documents(
+        cursor, conn,
+        f"PREPARAR TEXTO DOS DOCUMENTOS ({'todos' if all_documents else 'pendentes'})",
+        None if all_documents else PENDING_TEXT,
+        prepare_document, write_text,
+        lambda result: len(result[1]), "imagem(ns)",
+        **options
+    )
+
+def chunk_documents(cursor, conn, all_documents=False, **options):
+    """Refaz knowledge_chunks em lotes"""
+    return process_documents(
+        cursor, conn,
+        f"DIVIDIR DOCUMENTOS EM TRECHOS ({'todos' if all_documents else 'pendentes'}, "
+        f"até {KNOWLEDGE_CHUNK_TOKENS} tokens)",
+        None if all_documents else PENDING_CHUNKS,
+        chunk_document, write_chunks,
+        len, "trecho(s)",
+        **options
+    )
+
+def index_tags(cursor, conn, batch_size=TAG_BATCH_SIZE, dry_run=False):
+    """Sincroniza tags/knowledge_tags com knowledge_base.tags em lotes"""
+    print("\n--- INDEXAR TAGS DOS DOCUMENTOS ---\n")
+    cursor.execute("SELECT COUNT(*) FROM knowledge_base")
+    total = cursor.fetchone()[0]
+    if total == 0:
+        print("✓ Nenhum documento cadastrado")
+        return True
+
+    progress = Progress(total, "Simulando" if dry_run else "Processando")
+    try:
+        documents, changed = sync_tags(cursor, conn, batch_size, dry_run, progress)
+    except Error:
+        conn.rollback()
+        raise
+    progress.finish()
+
+    elapsed = time.perf_counter() - progress.started_at
+    print()
+    if dry_run:
+        print(f"✓ Simulação: {changed} de {documents} documento(s) com tags a atualizar, nada gravado")
+    else:
+        cursor.execute("SELECT COUNT(*) FROM tags")
+        print(f"✅ {changed} de {documents} documento(s) atualizado(s) em {elapsed:.1f}s "
+              f"({cursor.fetchone()[0]} tag(s) distintas)")
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manutenção da base de conhecimento")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    commands = {
+        'preparar-texto': (prepare_texts, "Preenche conteudo_texto e o manifesto de imagens"),
+        'fragmentar': (chunk_documents, "Divide os documentos em trechos (knowledge_chunks)"),
+    }
+    for name, (_, help_text) in commands.items():
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument('--todos', action='store_true', help="Recalcula também os documentos já processados")
+        command.add_argument('--lote', type=int, default=TEXT_BATCH_SIZE, help=f"Documentos por lote (padrão: {TEXT_BATCH_SIZE})")
+        command.add_argument('--workers', type=int, default=KNOWLEDGE_WORKERS, help="Processos de conversão (0 = núcleos - 1)")
+        command.add_argument('--simular', action='store_true', help="Processa sem gravar")
+
+    tags_command = subparsers.add_parser('indexar-tags', help="Sincroniza tags/knowledge_tags com knowledge_base.tags")
+    tags_command.add_argument('--lote', type=int, default=TAG_BATCH_SIZE, help=f"Documentos por lote (padrão: {TAG_BATCH_SIZE})")
+    tags_command.add_argument('--simular', action='store_true', help="Processa sem gravar")
+
+    args = parser.parse_args(argv)
+
+    try:
+        connection = db.get_connection()
+        cursor = connection.cursor()
+
+        if args.comando == 'indexar-tags':
+            ok = index_tags(cursor, connection, batch_size=max(1, args.lote), dry_run=args.simular)
+        else:
+            run, _ = commands[args.comando]
+            ok = run(cursor, connection, all_documents=args.todos, batch_size=max(1, args.lote),
+                     workers=args.workers, dry_run=args.simular)
+        return 0 if ok else 2
+
+    except Error as e:
+        print(f"❌ Erro no banco de dados: {e}")
+        return 1
+
+    finally:
+        if 'connection' in locals():
+            cursor.close()
+            connection.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paridade entre knowledge.py e src/lib/knowledge.ts
+
+A divisão em trechos e a normalização de tags existem duas vezes: nas APIs
+de cadastro/edição (chunkKnowledge e parseTags, TypeScript) e nos comandos
+de manutenção (chunk_knowledge e parse_tags, knowledge.py). Os dois lados
+precisam produzir exatamente o mesmo resultado; este script roda os dois
+sobre o mesmo conjunto de casos e aponta as diferenças.
+
+O lado TypeScript é transpilado com o pacote typescript do projeto
+(devDependencies), então é preciso ter rodado npm install. Não acessa o
+banco.
+
+Uso:
+    python knowledge_parity.py                 # casos fixos + 2000 gerados
+    python knowledge_parity.py --gerados 10000 --semente 7
+    python knowledge_parity.py --mostrar 5     # diferenças exibidas por função
+
+Rodar depois de mudar qualquer um dos dois arquivos.
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+import subprocess
+
+from knowledge import chunk_knowledge, parse_tags
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Casos escritos à mão: cada um cobre uma regra da conversão
+CHUNK_CASES = [
+    ('Vazio', '', 400),
+    ('Texto simples', '<p>Uma frase. Outra frase! Pergunta?</p>', 400),
+    ('Seções', '<h1>Intro</h1><h2>Instalação</h2><p>Passo um. Passo dois.</p><h2>Uso</h2><p>Use.</p>', 400),
+    ('Título sem corpo', '<h1>Capítulo</h1><h2>Seção</h2><p>Corpo da seção.</p>', 400),
+    ('Imagens', '<p>Antes</p><img src="/uploads/a.png"><IMG src=\'b.jpg\'/><p>Depois</p>', 400),
+    ('Imagem no título', '<h2>Tela <img src="tela.png"></h2><p>Descrição da tela.</p>', 400),
+    ('Espaços', '<p>a\u00a0b\u2003c\ufeffd\u3000e\tf\r\ng</p>', 400),
+    ('Palavra longa', '<p>' + 'palavrasemespaco' * 40 + '</p>', 20),
+    ('Emoji e acentos', '<p>Atenção 😀 ação, coração. Seção ÇÃO!</p>', 8),
+    ('Parágrafos', '<p>' + ' '.join(f'Frase número {i}.' for i in range(120)) + '</p>', 40),
+    ('Trecho pequeno', '<h2>A</h2><p>' + 'longo ' * 60 + '</p><h2>B</h2><p>curto</p>', 40),
+    ('Título longo', '<h3>' + 'título ' * 60 + '</h3><p>corpo</p>', 400),
+]
+
+TAG_CASES = [
+    None, '', ',', ' , ,', 'fiscal', 'NF-e, fiscal', 'fiscal,  Nota  Fiscal ,fiscal',
+    'ESTOQUE, estoque, Estoque', ' \u00a0tag\u2003com\u3000espaços\ufeff ', 'Ação, AÇÃO, acao',
+    'x' * 150, ' ' + 'y' * 99 + ' z', 'a,b,c,a,b,c', '😀, emoji 😀 ',
+]
+
+# Pedaços sorteados para os casos gerados
+CHUNK_PIECES = [
+    '<p>', '</p>', '<h1>', '</h1>', '<h2 class="x">', '</h2>', '<H3>Seção 3</H3>', '<img src="/uploads/a.png">',
+    "<IMG src='b.jpg'/>", ' Texto longo de exemplo. ', 'Outra frase! ', 'Pergunta? ', ' ', '\ufeff', '\u00a0',
+    '(nota) ', 'ação', '<br/>', 'palavrasuperlongasemespaco' * 3, '😀', '. ', '\n', '\n\n',
+    'um dois três quatro cinco seis sete oito nove dez ',
+]
+TAG_PIECES = ['a', 'B', 'É', 'ç', ' ', '  ', ',', '\t', '\u00a0', '\u2003', 'x' * 60, '😀']
+
+# Executado pelo node: transpila src/lib/knowledge.ts e aplica as funções aos casos da entrada padrão
+NODE_RUNNER = r"""
+const fs = require('fs');
+const ts = require('typescript');
+const source = fs.readFileSync('src/lib/knowledge.ts', 'utf8');
+const { outputText } = ts.transpileModule(source, {
+  compilerOptions: { module: ts.ModuleKind.CommonJS, target: ts.ScriptTarget.ES2020 },
+});
+// Só as funções puras são usadas: os módulos do projeto (@/lib/db) não são carregados
+const localRequire = name => (name.startsWith('@/') ? {} : require(name));
+const knowledge = { exports: {} };
+new Function('exports', 'require', 'module', outputText)(knowledge.exports, localRequire, knowledge);
+const { chunkKnowledge, parseTags } = knowledge.exports;
+
+const cases = JSON.parse(fs.readFileSync(0, 'utf8'));
+process.stdout.write(JSON.stringify({
+  chunks: cases.chunks.map(([titulo, conteudo, maxTokens]) =>
+    chunkKnowledge(titulo, conteudo, maxTokens).map(c => [c.posicao, c.secao, c.conteudo, c.tokens])),
+  tags: cases.tags.map(tags => parseTags(tags)),
+}));
+"""
+
+
+# ============================================================================
+# CASOS
+# ============================================================================
+
+def generated_cases(count, seed):
+    """(trechos, tags) sorteados com a semente informada (mesma semente, mesmos casos)"""
+    rng = random.Random(seed)
+    chunks = [
+        ('Manual (v2)', ''.join(rng.choice(CHUNK_PIECES) for _ in range(rng.randint(0, 80))), rng.choice([8, 20, 40, 400]))
+        for _ in range(count)
+    ]
+    tags = [''.join(rng.choice(TAG_PIECES) for _ in range(rng.randint(0, 20))) for _ in range(count)]
+    return chunks, tags
+
+def run_typescript(chunk_cases, tag_cases):
+    """Resultados de chunkKnowledge e parseTags para os casos (listas no formato do Python)"""
+    result = subprocess.run(
+        ['node', '-e', NODE_RUNNER],
+        input=json.dumps({'chunks': chunk_cases, 'tags': tag_cases}),
+        capture_output=True, text=True, encoding='utf-8', cwd=PROJECT_DIR
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"node terminou com código {result.returncode}")
+    return json.loads(result.stdout)
+
+
+# ============================================================================
+# COMPARAÇÃO
+# ============================================================================
+
+def compare(name, cases, expected, actual, show):
+    """Imprime as diferenças (até show) e retorna quantas houve"""
+    mismatches = [i for i in range(len(cases)) if expected[i] != actual[i]]
+    if not mismatches:
+        print(f"✓ {name}: {len(cases)} caso(s) iguais")
+        return 0
+    print(f"❌ {name}: {len(mismatches)} de {len(cases)} caso(s) diferentes")
+    for i in mismatches[:show]:
+        print(f"\n  Caso:       {cases[i]!r}")
+        print(f"  TypeScript: {expected[i]!r}")
+        print(f"  Python:     {actual[i]!r}")
+    print()
+    return len(mismatches)
+
+def check_parity(count, seed, show):
+    print("\n--- PARIDADE knowledge.py x src/lib/knowledge.ts ---\n")
+    chunks, tags = generated_cases(count, seed)
+    chunk_cases = [list(case) for case in CHUNK_CASES] + [list(case) for case in chunks]
+    tag_cases = TAG_CASES + tags
+
+    typescript = run_typescript(chunk_cases, tag_cases)
+    python_chunks = [[list(chunk) for chunk in chunk_knowledge(*case)] for case in chunk_cases]
+    python_tags = [parse_tags(case) for case in tag_cases]
+
+    differences = compare("Trechos (chunkKnowledge)", chunk_cases, typescript['chunks'], python_chunks, show)
+    differences += compare("Tags (parseTags)", tag_cases, typescript['tags'], python_tags, show)
+    if differences:
+        print(f"❌ {differences} diferença(s): ajuste o lado que mudou até os dois baterem")
+        return False
+    print(f"\n✅ Implementações equivalentes (semente {seed})")
+    return True
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara knowledge.py com src/lib/knowledge.ts")
+    parser.add_argument('--gerados', type=int, default=2000, help="Casos sorteados além dos fixos (padrão: 2000)")
+    parser.add_argument('--semente', type=int, default=44, help="Semente do sorteio (padrão: 44)")
+    parser.add_argument('--mostrar', type=int, default=3, help="Diferenças exibidas por função (padrão: 3)")
+    args = parser.parse_args(argv)
+
+    try:
+        return 0 if check_parity(max(0, args.gerados), args.semente, max(0, args.mostrar)) else 2
+    except (OSError, RuntimeError) as e:
+        print(f"❌ Não foi possível executar o lado TypeScript (node e npm install): {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,461 @@
+"""
+Migrações versionadas do banco de dados
+
+As migrações ficam em migrations/NNNN_descricao.py (ou .sql) e são aplicadas
+em ordem. Cada uma aplicada é registrada em 'schema_migrations' com o
+checksum do arquivo e o tempo gasto; um arquivo já aplicado que foi alterado
+bloqueia a execução. Um lock nomeado do MySQL (GET_LOCK) impede que dois
+processos migrem o mesmo banco ao mesmo tempo.
+
+Uso:
+    python migrate.py                  # aplica as pendentes
+    python migrate.py status           # aplicadas, pendentes e alteradas
+    python migrate.py up --simular     # mostra os passos sem executar
+    python migrate.py up --ate 0003    # aplica até a versão 0003
+    python migrate.py baseline 0004    # marca até 0004 como aplicadas (banco já atualizado à mão)
+
+Formato de uma migração .py:
+
+    from migrate import Step, column_exists
+
+    STEPS = [
+        Step("Coluna users.ativo",
+             "ALTER TABLE users ADD COLUMN ativo BOOLEAN NOT NULL DEFAULT TRUE",
+             skip_if=column_exists('users', 'ativo')),
+    ]
+
+Em .sql, cada comando terminado em ';' é um passo. DDL no MySQL faz commit
+implícito, então os passos devem poder ser repetidos: use skip_if (consulta
+ao information_schema) em vez de tratar mensagens de erro. Um passo pode ser
+uma função (cursor, conn) para preencher dados em lotes, com commit por lote.
+
+Uma migração .py pode declarar CHECKS = [Check(...)]: consultas medidas antes
+e depois de aplicá-la (índice escolhido pelo EXPLAIN, filesort e linhas
+realmente lidas pelo InnoDB), para comparar o efeito de novos índices.
+"""
+
+import os
+import re
+import sys
+import time
+import hashlib
+import argparse
+import importlib.util
+from contextlib import contextmanager
+
+from mysql.connector import Error
+
+import db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.(py|sql)$')
+LOCK_NAME = 'askforge_schema_migrations'
+LOCK_TIMEOUT = 10  # Segundos esperando outro processo terminar
+
+
+class Step:
+    """Um passo de migração: SQL (ou função (cursor, conn) -> None) com condição de pulo"""
+
+    def __init__(self, descricao, sql, skip_if=None):
+        self.descricao = descricao
+        self.sql = sql
+        self.skip_if = skip_if
+
+    def run(self, cursor, conn):
+        if callable(self.sql):
+            self.sql(cursor, conn)
+        else:
+            cursor.execute(self.sql)
+            if cursor.with_rows:
+                cursor.fetchall()
+
+
+class Check:
+    """
+    Consulta acompanhada antes/depois da migração. sample_sql retorna uma
+    linha com os parâmetros (ex.: a conversa mais recente); sem
+    resultado, a verificação é ignorada.
+    """
+
+    def __init__(self, descricao, sql, sample_sql=None):
+        self.descricao = descricao
+        self.sql = sql
+        self.sample_sql = sample_sql
+
+
+class Migration:
+    """Arquivo de migração versionado"""
+
+    def __init__(self, path):
+        match = MIGRATION_FILE.match(os.path.basename(path))
+        self.path = path
+        self.version = match.group(1)
+        self.name = match.group(2)
+        self.kind = match.group(3)
+        self.checksum = file_checksum(path)
+        self._steps = None
+        self._checks = []
+
+    @property
+    def steps(self):
+        if self._steps is None:
+            self._steps, self._checks = load_steps(self)
+        return self._steps
+
+    @property
+    def checks(self):
+        self.steps
+        return self._checks
+
+    def __repr__(self):
+        return f"{self.version}_{self.name}"
+
+
+# ============================================================================
+# CONDIÇÕES (information_schema do banco atual)
+# ============================================================================
+
+def _exists(sql, *params):
+    def check(cursor):
+        cursor.execute(sql, params)
+        return cursor.fetchone()[0] > 0
+    return check
+
+def table_exists(table):
+    return _exists("""
+        SELECT COUNT(*) FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, table)
+
+def column_exists(table, column):
+    return _exists("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, table, column)
+
+def index_exists(table, index):
+    return _exists("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, table, index)
+
+def foreign_key_exists(table, column):
+    """Qualquer FK sobre a coluna (nomeada pela migração ou gerada pelo MySQL)"""
+    return _exists("""
+        SELECT COUNT(*) FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+          AND REFERENCED_TABLE_NAME IS NOT NULL
+    """, table, column)
+
+
+# ============================================================================
+# ARQUIVOS DE MIGRAÇÃO
+# ============================================================================
+
+def file_checksum(path):
+    """SHA-256 do arquivo com quebras de linha normalizadas (CRLF no Windows)"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read().replace(b'\r\n', b'\n')).hexdigest()
+
+def split_sql(text):
+    """Separa um arquivo .sql em comandos (terminados por ';' no fim da linha)"""
+    statements = []
+    current = []
+    for line in text.splitlines():
+        if not current and (not line.strip() or line.strip().startswith('--')):
+            continue
+        current.append(line)
+        if line.rstrip().endswith(';'):
+            statements.append('\n'.join(current).rstrip().rstrip(';'))
+            current = []
+    if current and '\n'.join(current).strip():
+        statements.append('\n'.join(current))
+    return statements
+
+def load_steps(migration):
+    if migration.kind == 'sql':
+        with open(migration.path, 'r', encoding='utf-8') as f:
+            statements = split_sql(f.read())
+        return [Step(' '.join(sql.split())[:70], sql) for sql in statements], []
+
+    spec = importlib.util.spec_from_file_location(f"migration_{migration.version}", migration.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return list(module.STEPS), list(getattr(module, 'CHECKS', []))
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Migrações do diretório, em ordem de versão"""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        if MIGRATION_FILE.match(filename):
+            migrations.append(Migration(os.path.join(directory, filename)))
+
+    versions = [m.version for m in migrations]
+    duplicated = {v for v in versions if versions.count(v) > 1}
+    if duplicated:
+        raise ValueError(f"Versões duplicadas em {directory}: {', '.join(sorted(duplicated))}")
+    return migrations
+
+
+# ============================================================================
+# CONTROLE (schema_migrations)
+# ============================================================================
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version CHAR(4) PRIMARY KEY,
+            nome VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            duracao_ms INT NOT NULL DEFAULT 0,
+            executado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+
+def applied_migrations(cursor):
+    """{versão: (nome, checksum, duracao_ms, executado_em)}"""
+    cursor.execute("SELECT version, nome, checksum, duracao_ms, executado_em FROM schema_migrations ORDER BY version")
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+def record_migration(cursor, conn, migration, duration_ms):
+    cursor.execute("""
+        INSERT INTO schema_migrations (version, nome, checksum, duracao_ms)
+        VALUES (%s, %s, %s, %s)
+    """, (migration.version, migration.name, migration.checksum, duration_ms))
+    conn.commit()
+
+def changed_migrations(migrations, applied):
+    """Migrações já aplicadas cujo arquivo mudou depois"""
+    return [m for m in migrations if m.version in applied and applied[m.version][1] != m.checksum]
+
+@contextmanager
+def migration_lock(cursor, timeout=LOCK_TIMEOUT):
+    """Lock nomeado do MySQL, preso à conexão enquanto durar o bloco"""
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, timeout))
+    if cursor.fetchone()[0] != 1:
+        raise RuntimeError(f"Outro processo está aplicando migrações (lock '{LOCK_NAME}')")
+    try:
+        yield
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+
+
+# ============================================================================
+# VERIFICAÇÕES (EXPLAIN + linhas lidas)
+# ============================================================================
+
+def handler_reads(cursor):
+    """Soma dos contadores Handler_read_* da sessão (linhas lidas pelo motor)"""
+    cursor.execute("SHOW SESSION STATUS LIKE 'Handler_read%'")
+    return sum(int(value) for _, value in cursor.fetchall())
+
+def measure_check(cursor, check):
+    """
+    Retorna {key, estimated, filesort, rows_read} da consulta, ou None se a
+    amostra não trouxe parâmetros (tabela vazia).
+    """
+    params = ()
+    if check.sample_sql:
+        cursor.execute(check.sample_sql)
+        row = cursor.fetchone()
+        cursor.fetchall()
+        if not row:
+            return None
+        params = row
+
+    cursor.execute(f"EXPLAIN {check.sql}", params)
+    columns = [column[0].lower() for column in cursor.description]
+    plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    # Os próprios SHOW STATUS tocam os contadores: desconta uma leitura vazia
+    before = handler_reads(cursor)
+    overhead = handler_reads(cursor) - before
+    cursor.execute(check.sql, params)
+    cursor.fetchall()
+    rows_read = handler_reads(cursor) - before - 2 * overhead
+
+    return {
+        'key': ', '.join(f"{p['table']}:{p['key'] or 'FULL'}" for p in plan),
+        'estimated': sum(int(p['rows'] or 0) for p in plan),
+        'filesort': any('filesort' in (p.get('extra') or '') for p in plan),
+        'rows_read': max(rows_read, 0),
+    }
+
+def measure_checks(cursor, checks):
+    results = []
+    for check in checks:
+        try:
+            results.append(measure_check(cursor, check))
+        except Error as e:
+            print(f"   ⚠ Verificação '{check.descricao}' ignorada: {e}")
+            results.append(None)
+    return results
+
+def print_checks(checks, before, after=None):
+    """Tabela antes/depois das verificações da migração"""
+    print(f"\n   {'Consulta':<34}{'Linhas lidas':>24}{'Estimadas (EXPLAIN)':>24}  Índice")
+    for index, check in enumerate(checks):
+        old = before[index]
+        new = after[index] if after else None
+        if not old:
+            print(f"   {check.descricao:<34}{'(sem dados)':>24}")
+            continue
+        reads = f"{old['rows_read']}" + (f" → {new['rows_read']}" if new else '')
+        estimated = f"{old['estimated']}" + (f" → {new['estimated']}" if new else '')
+        plan = new or old
+        print(f"   {check.descricao:<34}{reads:>24}{estimated:>24}  {plan['key']}"
+              f"{' (filesort)' if plan['filesort'] else ''}")
+
+
+# ============================================================================
+# EXECUÇÃO
+# ============================================================================
+
+def run_migration(cursor, conn, migration, dry_run=False):
+    """Executa os passos de uma migração; retorna a duração em ms"""
+    started_at = time.perf_counter()
+    for number, step in enumerate(migration.steps, start=1):
+        step_started_at = time.perf_counter()
+        if step.skip_if and step.skip_if(cursor):
+            print(f"   {number}. {step.descricao} ... ⚠ já aplicado, pulando")
+            continue
+        if dry_run:
+            print(f"   {number}. {step.descricao} ... (simulação)")
+            continue
+        print(f"   {number}. {step.descricao} ...", end=' ', flush=True)
+        step.run(cursor, conn)
+        conn.commit()
+        print(f"✓ {(time.perf_counter() - step_started_at) * 1000:.0f} ms")
+    return int((time.perf_counter() - started_at) * 1000)
+
+def migrate(cursor, conn, target=None, dry_run=False, lock_timeout=LOCK_TIMEOUT, directory=MIGRATIONS_DIR):
+    """
+    Aplica as migrações pendentes (até target, inclusive) no banco do cursor.
+    Retorna True se o banco ficou na versão pedida.
+    """
+    migrations = load_migrations(directory)
+    ensure_migrations_table(cursor)
+
+    with migration_lock(cursor, lock_timeout):
+        applied = applied_migrations(cursor)
+        changed = changed_migrations(migrations, applied)
+        if changed:
+            for migration in changed:
+                print(f"❌ {migration} foi alterada depois de aplicada (checksum diferente)")
+            print("   Crie uma nova migração em vez de editar uma já aplicada.")
+            return False
+
+        pending = [m for m in migrations if m.version not in applied and (not target or m.version <= target)]
+        if not pending:
+            print("✓ Banco de dados já está atualizado.")
+            return True
+
+        total_ms = 0
+        for migration in pending:
+            print(f"\n▶ {migration}{' (simulação)' if dry_run else ''}")
+            checks_before = measure_checks(cursor, migration.checks)
+            duration_ms = run_migration(cursor, conn, migration, dry_run)
+            total_ms += duration_ms
+            if not dry_run:
+                record_migration(cursor, conn, migration, duration_ms)
+                print(f"   ✓ {migration} aplicada em {duration_ms} ms")
+            if migration.checks:
+                print_checks(migration.checks, checks_before,
+                             None if dry_run else measure_checks(cursor, migration.checks))
+
+        print()
+        if dry_run:
+            print(f"✓ Simulação: {len(pending)} migração(ões) pendente(s). Nada foi alterado.")
+        else:
+            print(f"✓ {len(pending)} migração(ões) aplicada(s) em {total_ms / 1000:.1f}s")
+        return True
+
+def show_status(cursor, directory=MIGRATIONS_DIR):
+    migrations = load_migrations(directory)
+    ensure_migrations_table(cursor)
+    applied = applied_migrations(cursor)
+    changed = {m.version for m in changed_migrations(migrations, applied)}
+
+    print(f"\n{'Versão':<8}{'Nome':<36}{'Situação':<12}{'Duração':>10}  Executada em")
+    print("-" * 90)
+    for migration in migrations:
+        if migration.version in applied:
+            _, _, duration_ms, executed_at = applied[migration.version]
+            status = 'ALTERADA' if migration.version in changed else 'aplicada'
+            print(f"{migration.version:<8}{migration.name:<36}{status:<12}{duration_ms:>8} ms  {executed_at}")
+        else:
+            print(f"{migration.version:<8}{migration.name:<36}{'pendente':<12}")
+
+    missing = sorted(set(applied) - {m.version for m in migrations})
+    for version in missing:
+        print(f"{version:<8}{applied[version][0]:<36}{'sem arquivo':<12}")
+    return not changed
+
+def baseline(cursor, conn, version, directory=MIGRATIONS_DIR):
+    """Registra as migrações até version como aplicadas, sem executá-las"""
+    migrations = load_migrations(directory)
+    ensure_migrations_table(cursor)
+    with migration_lock(cursor):
+        applied = applied_migrations(cursor)
+        for migration in migrations:
+            if migration.version <= version and migration.version not in applied:
+                record_migration(cursor, conn, migration, 0)
+                print(f"✓ {migration} marcada como aplicada")
+    return True
+
+
+# ============================================================================
+# ENTRY POINT
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrações versionadas do banco de dados")
+    subparsers = parser.add_subparsers(dest='comando')
+
+    up = subparsers.add_parser('up', help="Aplica as migrações pendentes (padrão)")
+    up.add_argument('--ate', default=None, metavar='VERSAO', help="Aplica até esta versão (ex.: 0003)")
+    up.add_argument('--simular', action='store_true', help="Mostra os passos sem executar")
+    up.add_argument('--espera', type=int, default=LOCK_TIMEOUT, help="Segundos aguardando o lock")
+
+    subparsers.add_parser('status', help="Lista migrações aplicadas, pendentes e alteradas")
+
+    marcar = subparsers.add_parser('baseline', help="Marca migrações como aplicadas sem executá-las")
+    marcar.add_argument('versao', help="Última versão já presente no banco")
+
+    args = parser.parse_args(argv)
+
+    print("=" * 50)
+    print("Migrações do Banco de Dados")
+    print("=" * 50)
+
+    try:
+        connection = db.get_connection()
+        cursor = connection.cursor()
+        print(f"✓ Conectado ao banco '{db.DB_CONFIG['database']}'")
+
+        if args.comando == 'status':
+            ok = show_status(cursor)
+        elif args.comando == 'baseline':
+            ok = baseline(cursor, connection, args.versao)
+        else:
+            ok = migrate(
+                cursor, connection,
+                target=getattr(args, 'ate', None),
+                dry_run=getattr(args, 'simular', False),
+                lock_timeout=getattr(args, 'espera', LOCK_TIMEOUT)
+            )
+        return 0 if ok else 2
+
+    except (Error, RuntimeError, ValueError) as e:
+        print(f"✗ Erro durante a migração: {e}")
+        return 1
+
+    finally:
+        if 'connection' in locals() and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
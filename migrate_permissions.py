@@ -0,0 +1,15 @@
+"""
+Script de migração: Uma linha de permissões por usuário (índice único)
+Mantido por compatibilidade; a migração agora está em
+migrations/0003_permissoes_unicas.py e é aplicada pelo executor versionado junto
+com as demais pendentes.
+
+Uso: python migrate.py (ou python migrate_permissions.py)
+"""
+
+import sys
+
+import migrate
+
+if __name__ == "__main__":
+    sys.exit(migrate.main(['up']))
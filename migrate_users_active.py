@@ -0,0 +1,15 @@
+"""
+Script de migração: Coluna 'ativo' em 'users'
+Mantido por compatibilidade; a migração agora está em
+migrations/0004_usuarios_ativo.py e é aplicada pelo executor versionado junto
+com as demais pendentes.
+
+Uso: python migrate.py (ou python migrate_users_active.py)
+"""
+
+import sys
+
+import migrate
+
+if __name__ == "__main__":
+    sys.exit(migrate.main(['up']))
@@ -0,0 +1,35 @@
+"""
+Sistemas dentro de cada módulo (antigo migrate_systems.py)
+"""
+
+from migrate import Step, column_exists, foreign_key_exists
+
+STEPS = [
+    Step("Tabela 'systems'", """
+    CREATE TABLE IF NOT EXISTS systems (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        module_id INT NOT NULL,
+        nome VARCHAR(255) NOT NULL,
+        descricao TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (module_id) REFERENCES modules(id) ON DELETE CASCADE,
+        UNIQUE KEY unique_system_module (nome, module_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """),
+    Step("Coluna 'system_id' em 'knowledge_base'",
+         "ALTER TABLE knowledge_base ADD COLUMN system_id INT NULL AFTER module_id",
+         skip_if=column_exists('knowledge_base', 'system_id')),
+    Step("Foreign key de 'knowledge_base.system_id'", """
+    ALTER TABLE knowledge_base
+    ADD CONSTRAINT fk_kb_system
+    FOREIGN KEY (system_id) REFERENCES systems(id) ON DELETE SET NULL
+    """, skip_if=foreign_key_exists('knowledge_base', 'system_id')),
+    Step("Coluna 'system_id' em 'chat_conversations'",
+         "ALTER TABLE chat_conversations ADD COLUMN system_id INT NULL AFTER module_id",
+         skip_if=column_exists('chat_conversations', 'system_id')),
+    Step("Foreign key de 'chat_conversations.system_id'", """
+    ALTER TABLE chat_conversations
+    ADD CONSTRAINT fk_conv_system
+    FOREIGN KEY (system_id) REFERENCES systems(id) ON DELETE SET NULL
+    """, skip_if=foreign_key_exists('chat_conversations', 'system_id')),
+]
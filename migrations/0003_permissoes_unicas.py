@@ -0,0 +1,16 @@
+"""
+Uma linha de permissões por usuário (antigo migrate_permissions.py)
+Necessário para a sincronização em lote (python app.py sincronizar-acessos).
+"""
+
+from migrate import Step, index_exists
+
+STEPS = [
+    Step("Remover permissões duplicadas (mantém a de maior id)", """
+    DELETE p1 FROM permissions p1
+    INNER JOIN permissions p2 ON p1.user_id = p2.user_id AND p1.id < p2.id
+    """, skip_if=index_exists('permissions', 'unique_user_permission')),
+    Step("Índice 'unique_user_permission'",
+         "ALTER TABLE permissions ADD UNIQUE KEY unique_user_permission (user_id)",
+         skip_if=index_exists('permissions', 'unique_user_permission')),
+]
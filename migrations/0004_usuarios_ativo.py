@@ -0,0 +1,12 @@
+"""
+Coluna 'ativo' em 'users' (antigo migrate_users_active.py)
+Permite bloquear o login antes da exclusão em lote (python app.py desligar).
+"""
+
+from migrate import Step, column_exists
+
+STEPS = [
+    Step("Coluna 'ativo' em 'users'",
+         "ALTER TABLE users ADD COLUMN ativo BOOLEAN NOT NULL DEFAULT TRUE AFTER grupo",
+         skip_if=column_exists('users', 'ativo')),
+]
@@ -0,0 +1,68 @@
+"""
+Índices compostos para as consultas mais frequentes da aplicação
+- knowledge_base por módulo/sistema (chat/send, knowledge, anexos da conversa)
+- últimas mensagens da conversa (ORDER BY created_at DESC LIMIT 20)
+- lista de conversas do usuário por atividade recente
+- feedbacks do painel admin por data
+
+Criados com DDL online (ALGORITHM=INPLACE, LOCK=NONE): leituras e escritas
+continuam durante a criação. Se o servidor não suportar, o MySQL recusa o
+comando em vez de bloquear a tabela. O lock de metadados, preso apenas no
+início e no fim, tem espera limitada para não enfileirar a aplicação atrás
+de uma transação longa; nesse caso a migração falha e pode ser repetida.
+"""
+
+from migrate import Step, Check, index_exists
+
+STEPS = [
+    Step("Limitar espera por lock de metadados (10s)", "SET SESSION lock_wait_timeout = 10"),
+    Step("Índice knowledge_base (module_id, system_id, data_criacao)", """
+    ALTER TABLE knowledge_base
+    ADD INDEX idx_kb_module_system (module_id, system_id, data_criacao),
+    ALGORITHM=INPLACE, LOCK=NONE
+    """, skip_if=index_exists('knowledge_base', 'idx_kb_module_system')),
+    Step("Índice chat_messages (conversation_id, created_at)", """
+    ALTER TABLE chat_messages
+    ADD INDEX idx_messages_conversation_created (conversation_id, created_at),
+    ALGORITHM=INPLACE, LOCK=NONE
+    """, skip_if=index_exists('chat_messages', 'idx_messages_conversation_created')),
+    Step("Índice chat_conversations (user_id, updated_at)", """
+    ALTER TABLE chat_conversations
+    ADD INDEX idx_conversations_user_updated (user_id, updated_at),
+    ALGORITHM=INPLACE, LOCK=NONE
+    """, skip_if=index_exists('chat_conversations', 'idx_conversations_user_updated')),
+    Step("Índice chat_feedback (created_at)", """
+    ALTER TABLE chat_feedback
+    ADD INDEX idx_feedback_created (created_at),
+    ALGORITHM=INPLACE, LOCK=NONE
+    """, skip_if=index_exists('chat_feedback', 'idx_feedback_created')),
+]
+
+CHECKS = [
+    Check(
+        "Base do módulo/sistema",
+        "SELECT id, titulo FROM knowledge_base WHERE module_id = %s AND system_id = %s ORDER BY data_criacao DESC",
+        "SELECT module_id, system_id FROM knowledge_base WHERE system_id IS NOT NULL ORDER BY id DESC LIMIT 1"
+    ),
+    Check(
+        "Anexos do módulo/sistema",
+        "SELECT a.id, kb.titulo FROM attachments a INNER JOIN knowledge_base kb ON a.knowledge_id = kb.id "
+        "WHERE kb.module_id = %s AND kb.system_id = %s",
+        "SELECT kb.module_id, kb.system_id FROM attachments a INNER JOIN knowledge_base kb ON a.knowledge_id = kb.id "
+        "WHERE kb.system_id IS NOT NULL ORDER BY a.id DESC LIMIT 1"
+    ),
+    Check(
+        "Últimas 20 mensagens da conversa",
+        "SELECT role, content FROM chat_messages WHERE conversation_id = %s ORDER BY created_at DESC LIMIT 20",
+        "SELECT conversation_id FROM chat_messages ORDER BY id DESC LIMIT 1"
+    ),
+    Check(
+        "Conversas do usuário",
+        "SELECT id, titulo FROM chat_conversations WHERE user_id = %s ORDER BY updated_at DESC",
+        "SELECT user_id FROM chat_conversations ORDER BY id DESC LIMIT 1"
+    ),
+    Check(
+        "Feedbacks recentes (admin)",
+        "SELECT id, feedback FROM chat_feedback ORDER BY created_at DESC LIMIT 20"
+    ),
+]
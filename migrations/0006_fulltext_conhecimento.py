@@ -0,0 +1,32 @@
+"""
+Índice FULLTEXT em knowledge_base (titulo, conteudo, tags)
+Usado pelo chat (src/lib/knowledge.ts) para ranquear os documentos do
+módulo/sistema com MATCH ... AGAINST e buscar o conteúdo só dos top-k, em vez
+de trazer a base inteira a cada pergunta.
+
+O primeiro FULLTEXT de uma tabela InnoDB a reconstrói (coluna interna
+FTS_DOC_ID) e não aceita LOCK=NONE: durante a criação as leituras continuam,
+mas as escritas em knowledge_base esperam. Rode fora do horário de pico.
+Palavras com menos de 3 letras (innodb_ft_min_token_size) não são indexadas.
+
+A coluna conteudo_texto (usada a partir da 0007) é criada aqui, antes do
+índice: depois de um FULLTEXT o InnoDB não adiciona colunas em uma tabela
+sem copiá-la inteira (erro 1846, só ALGORITHM=COPY).
+"""
+
+from migrate import Step, column_exists, index_exists
+
+STEPS = [
+    Step("Limitar espera por lock de metadados (10s)", "SET SESSION lock_wait_timeout = 10"),
+    Step("Coluna 'conteudo_texto' em 'knowledge_base'", """
+    ALTER TABLE knowledge_base
+    ADD COLUMN conteudo_texto LONGTEXT NULL AFTER conteudo,
+    ALGORITHM=INPLACE, LOCK=NONE
+    """, skip_if=column_exists('knowledge_base', 'conteudo_texto')),
+    Step("Índice FULLTEXT knowledge_base (titulo, conteudo, tags)", """
+    ALTER TABLE knowledge_base
+    ADD FULLTEXT INDEX ft_kb_busca (titulo, conteudo, tags),
+    ALGORITHM=INPLACE, LOCK=SHARED
+    """, skip_if=index_exists('knowledge_base', 'ft_kb_busca')),
+]
+
@@ -0,0 +1,37 @@
+"""
+Texto pré-processado e manifesto de imagens dos documentos de conhecimento
+O chat (src/pages/api/chat/send.ts) deixa de rodar as regex sobre o HTML de
+cada documento a cada pergunta: conteudo_texto guarda o texto já pronto para o
+prompt (imagens em Markdown com URL relativa ao site) e knowledge_images guarda
+as imagens na ordem em que aparecem.
+
+As APIs de cadastro/edição mantêm as duas coisas. Documentos existentes ficam
+com conteudo_texto NULL (o chat usa o caminho antigo) até rodar:
+    python knowledge.py preparar-texto
+
+A coluna conteudo_texto é criada pela 0006, antes do índice FULLTEXT. O passo
+abaixo só roda em bancos que aplicaram uma versão anterior da 0006: com o
+FULLTEXT já criado, o InnoDB só adiciona a coluna copiando a tabela
+(ALGORITHM=COPY), e as escritas em knowledge_base ficam bloqueadas até o fim.
+"""
+
+from migrate import Step, column_exists
+
+STEPS = [
+    Step("Limitar espera por lock de metadados (10s)", "SET SESSION lock_wait_timeout = 10"),
+    Step("Coluna 'conteudo_texto' em 'knowledge_base'", """
+    ALTER TABLE knowledge_base
+    ADD COLUMN conteudo_texto LONGTEXT NULL AFTER conteudo,
+    ALGORITHM=COPY, LOCK=SHARED
+    """, skip_if=column_exists('knowledge_base', 'conteudo_texto')),
+    Step("Tabela 'knowledge_images'", """
+    CREATE TABLE IF NOT EXISTS knowledge_images (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        knowledge_id INT NOT NULL,
+        posicao INT NOT NULL,
+        url VARCHAR(1000) NOT NULL,
+        FOREIGN KEY (knowledge_id) REFERENCES knowledge_base(id) ON DELETE CASCADE,
+        UNIQUE KEY unique_knowledge_posicao (knowledge_id, posicao)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """),
+]
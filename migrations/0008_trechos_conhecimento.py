@@ -0,0 +1,28 @@
+"""
+Trechos dos documentos de conhecimento (knowledge_chunks)
+Cada documento é dividido nas seções (<h1>..<h6>) e, se uma seção passa de
+KNOWLEDGE_CHUNK_TOKENS, em grupos de frases. Cada trecho guarda o título da
+seção, a posição no documento e a contagem estimada de tokens, para a busca e
+a montagem do prompt trabalharem por trecho em vez do documento inteiro.
+
+As APIs de cadastro/edição mantêm os trechos. Para documentos existentes
+(ou depois de mudar KNOWLEDGE_CHUNK_TOKENS no .env):
+    python knowledge.py fragmentar [--todos]
+"""
+
+from migrate import Step
+
+STEPS = [
+    Step("Tabela 'knowledge_chunks'", """
+    CREATE TABLE IF NOT EXISTS knowledge_chunks (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        knowledge_id INT NOT NULL,
+        posicao INT NOT NULL,
+        secao VARCHAR(255) NULL,
+        conteudo MEDIUMTEXT NOT NULL,
+        tokens INT NOT NULL,
+        FOREIGN KEY (knowledge_id) REFERENCES knowledge_base(id) ON DELETE CASCADE,
+        UNIQUE KEY unique_chunk_posicao (knowledge_id, posicao)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """),
+]
@@ -0,0 +1,82 @@
+"""
+Tags normalizadas dos documentos de conhecimento (tags / knowledge_tags)
+knowledge_base.tags é um VARCHAR livre separado por vírgulas: filtrar por tag
+só dava para fazer com LIKE '%x%' (varredura da tabela). Cada nome passa a
+existir uma vez em 'tags' (único, normalizado) e 'knowledge_tags' liga os
+documentos às tags, com índice (tag_id, knowledge_id) para a busca por tag em
+todos os módulos ser uma leitura por índice.
+
+knowledge_base.tags continua sendo gravado (exibição e FULLTEXT); as APIs de
+cadastro/edição gravam as duas coisas. O último passo preenche knowledge_tags
+a partir do VARCHAR em lotes. Documentos gravados depois por código que só
+conhece o VARCHAR são acertados com:
+    python knowledge.py indexar-tags
+
+A normalização abaixo é uma cópia congelada de parse_tags (knowledge.py) na
+data desta migração: a migração não importa o código da aplicação, que pode
+mudar depois dela.
+"""
+
+import re
+
+from migrate import Step
+
+TAG_MAX = 100
+BATCH_SIZE = 500
+JS_SPACE_CHARS = '\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff'
+SPACES = re.compile(f'[{JS_SPACE_CHARS}]+')
+JS_TRIM = re.compile(f'^[{JS_SPACE_CHARS}]+|[{JS_SPACE_CHARS}]+$')
+
+def parse_tags(tags):
+    names = []
+    for part in (tags or '').split(','):
+        name = JS_TRIM.sub('', JS_TRIM.sub('', SPACES.sub(' ', part)).lower()[:TAG_MAX])
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def backfill_tags(cursor, conn):
+    """Lotes por keyset, um commit por lote; INSERT IGNORE deixa o passo seguro para repetir"""
+    last_id = 0
+    while True:
+        cursor.execute(
+            "SELECT id, tags FROM knowledge_base WHERE id > %s ORDER BY id LIMIT %s FOR UPDATE",
+            (last_id, BATCH_SIZE)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        pairs = [(knowledge_id, name) for knowledge_id, tags in rows for name in parse_tags(tags)]
+        if pairs:
+            cursor.executemany("INSERT IGNORE INTO tags (nome) VALUES (%s)", sorted({(name,) for _, name in pairs}))
+            cursor.execute(
+                f"""INSERT IGNORE INTO knowledge_tags (knowledge_id, tag_id)
+                    SELECT p.knowledge_id, t.id
+                    FROM ({' UNION ALL '.join(['SELECT %s AS knowledge_id, %s AS nome'] * len(pairs))}) p
+                    JOIN tags t ON t.nome = p.nome""",
+                [value for pair in pairs for value in pair]
+            )
+        conn.commit()
+
+STEPS = [
+    Step("Tabela 'tags'", """
+    CREATE TABLE IF NOT EXISTS tags (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        nome VARCHAR(100) NOT NULL,
+        UNIQUE KEY unique_tag_nome (nome)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """),
+    Step("Tabela 'knowledge_tags'", """
+    CREATE TABLE IF NOT EXISTS knowledge_tags (
+        knowledge_id INT NOT NULL,
+        tag_id INT NOT NULL,
+        PRIMARY KEY (knowledge_id, tag_id),
+        KEY idx_knowledge_tags_tag (tag_id, knowledge_id),
+        FOREIGN KEY (knowledge_id) REFERENCES knowledge_base(id) ON DELETE CASCADE,
+        FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE CASCADE
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """),
+    Step("Preencher 'knowledge_tags' a partir de knowledge_base.tags (lotes)",
+         backfill_tags),
+]
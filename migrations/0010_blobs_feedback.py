@@ -0,0 +1,36 @@
+"""
+Conteúdo do chat_feedback endereçado por hash e comprimido (feedback_blobs)
+Cada feedback guardava conversation_history e knowledge_base_sent como cópias
+LONGTEXT: o mesmo conhecimento e o mesmo início de conversa se repetiam em
+milhares de linhas. O conteúdo passa a ficar uma vez em feedback_blobs (chave
+SHA-256, zlib) e chat_feedback guarda só os hashes. O histórico é um
+manifesto com o hash de cada mensagem, então feedbacks da mesma conversa
+compartilham as mensagens em comum.
+
+A API do chat grava no formato novo. As linhas antigas continuam legíveis
+(quem lê usa o texto quando o hash é NULL) e são convertidas em lotes com:
+    python feedback.py compactar
+"""
+
+from migrate import Step, column_exists
+
+STEPS = [
+    Step("Limitar espera por lock de metadados (10s)", "SET SESSION lock_wait_timeout = 10"),
+    Step("Tabela 'feedback_blobs'", """
+    CREATE TABLE IF NOT EXISTS feedback_blobs (
+        hash BINARY(32) NOT NULL PRIMARY KEY,
+        tamanho INT UNSIGNED NOT NULL,
+        conteudo LONGBLOB NOT NULL
+    ) ENGINE=InnoDB
+    """),
+    Step("Coluna 'conversation_history_hash' em 'chat_feedback'", """
+    ALTER TABLE chat_feedback
+    ADD COLUMN conversation_history_hash BINARY(32) NULL AFTER conversation_history,
+    ALGORITHM=INPLACE, LOCK=NONE
+    """, skip_if=column_exists('chat_feedback', 'conversation_history_hash')),
+    Step("Coluna 'knowledge_base_sent_hash' em 'chat_feedback'", """
+    ALTER TABLE chat_feedback
+    ADD COLUMN knowledge_base_sent_hash BINARY(32) NULL AFTER knowledge_base_sent,
+    ALGORITHM=INPLACE, LOCK=NONE
+    """, skip_if=column_exists('chat_feedback', 'knowledge_base_sent_hash')),
+]
@@ -0,0 +1,52 @@
+"""
+Arquivo de mensagens do chat (chat_messages_archive)
+As mensagens das conversas paradas há mais de ARCHIVE_IDLE_DAYS dias saem de
+chat_messages para chat_messages_archive (mesmas colunas e ids), em lotes,
+com python archive.py arquivar. A aplicação lê as duas tabelas, então a
+tabela ativa fica do tamanho das conversas recentes.
+
+Particionamento por mês (PARTITION BY RANGE) não serve aqui: o InnoDB não
+aceita FOREIGN KEY em tabela particionada, e chat_messages e chat_feedback
+dependem de chat_conversations. As conversas continuam na tabela ativa
+(linhas pequenas, referenciadas por chat_feedback).
+
+archive_checkpoints guarda até onde o arquivamento chegou, na ordem
+(updated_at, id) das conversas; o índice em updated_at faz cada execução
+ler só as conversas que ficaram paradas desde a anterior.
+"""
+
+from migrate import Step, index_exists
+
+STEPS = [
+    Step("Limitar espera por lock de metadados (10s)", "SET SESSION lock_wait_timeout = 10"),
+    Step("Tabela 'chat_messages_archive'", """
+    CREATE TABLE IF NOT EXISTS chat_messages_archive (
+        id INT NOT NULL PRIMARY KEY,
+        conversation_id INT NOT NULL,
+        role ENUM('user', 'assistant', 'system') NOT NULL,
+        content LONGTEXT NOT NULL,
+        image_url VARCHAR(500),
+        file_url VARCHAR(500),
+        file_name VARCHAR(255),
+        created_at TIMESTAMP NULL DEFAULT NULL,
+        INDEX idx_archive_conversation_created (conversation_id, created_at),
+        FOREIGN KEY (conversation_id) REFERENCES chat_conversations(id) ON DELETE CASCADE
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """),
+    Step("Tabela 'archive_checkpoints'", """
+    CREATE TABLE IF NOT EXISTS archive_checkpoints (
+        tarefa VARCHAR(50) NOT NULL PRIMARY KEY,
+        ultimo_updated_at TIMESTAMP NULL DEFAULT NULL,
+        ultimo_id INT NOT NULL DEFAULT 0,
+        mensagens BIGINT NOT NULL DEFAULT 0,
+        atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """),
+    Step("Ponto de parada do arquivamento de mensagens",
+         "INSERT IGNORE INTO archive_checkpoints (tarefa) VALUES ('chat_messages')"),
+    Step("Índice chat_conversations (updated_at)", """
+    ALTER TABLE chat_conversations
+    ADD INDEX idx_conversations_updated (updated_at),
+    ALGORITHM=INPLACE, LOCK=NONE
+    """, skip_if=index_exists('chat_conversations', 'idx_conversations_updated')),
+]
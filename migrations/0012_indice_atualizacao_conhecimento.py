@@ -0,0 +1,21 @@
+"""
+Índice knowledge_base (data_atualizacao, id)
+O serviço de busca (retrieval_server.py) procura a cada poucos segundos os
+documentos alterados desde a última sincronização. Sem índice em
+data_atualizacao, cada consulta varria a tabela inteira; com ele, o serviço
+percorre por keyset (data_atualizacao, id) só as linhas novas.
+
+Índice secundário com DDL online (ALGORITHM=INPLACE, LOCK=NONE): não
+reconstrói a tabela, então o FULLTEXT ft_kb_busca não impede a criação.
+"""
+
+from migrate import Step, index_exists
+
+STEPS = [
+    Step("Limitar espera por lock de metadados (10s)", "SET SESSION lock_wait_timeout = 10"),
+    Step("Índice knowledge_base (data_atualizacao, id)", """
+    ALTER TABLE knowledge_base
+    ADD INDEX idx_kb_atualizacao (data_atualizacao, id),
+    ALGORITHM=INPLACE, LOCK=NONE
+    """, skip_if=index_exists('knowledge_base', 'idx_kb_atualizacao')),
+]
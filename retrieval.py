@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice local de busca (BM25) da base de conhecimento
+
+Um índice por módulo em RETRIEVAL_INDEX_DIR/modulo_<id>/, com os pesos BM25
+já calculados em uma matriz esparsa (documentos x termos, formato CSC) salva
+como arrays .npy. Os arrays são abertos com mmap (np.load(mmap_mode='r')):
+carregar um índice não lê a matriz inteira e vários processos compartilham as
+mesmas páginas do sistema operacional. O filtro por sistema é feito na busca.
+
+Uso:
+    python retrieval.py indexar                    # todos os módulos
+    python retrieval.py indexar --modulo 3
+    python retrieval.py buscar --modulo 3 --sistema 5 "como emitir nota fiscal"
+    python retrieval.py benchmark --k 8            # BM25 x FULLTEXT (MySQL)
+
+O benchmark usa como gabarito os feedbacks positivos do chat: a pergunta do
+usuário e os documentos que foram enviados ao modelo (knowledge_base_sent).
+Feedbacks anteriores à busca FULLTEXT guardam a seleção feita pelo LLM; use
+--antes AAAA-MM-DD para comparar só com eles.
+
+Requer: pip install numpy scipy
+"""
+
+from mysql.connector import Error
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import statistics
+import unicodedata
+from array import array
+from collections import Counter
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    print("❌ A busca local precisa de NumPy e SciPy. Instale com: pip install numpy scipy")
+    raise
+
+import db
+from feedback import FeedbackReader
+from knowledge import build_knowledge_text
+
+INDEX_DIR = os.getenv('RETRIEVAL_INDEX_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'indices')
+INDEX_FORMAT = 1
+
+# Parâmetros do BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Peso dos campos (repetição dos termos): o título diz mais sobre o documento que o corpo
+TITLE_WEIGHT = 3
+TAGS_WEIGHT = 2
+
+DEFAULT_TOP_K = int(os.getenv('KNOWLEDGE_TOP_K') or 8)
+MAX_TERM_LENGTH = 40
+FETCH_BATCH_SIZE = 500
+
+TOKEN = re.compile(r'[a-z0-9]+')
+MARKDOWN_IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+STOPWORDS = frozenset("""
+a ao aos as ate com como da das de dela dele deles do dos e ela elas ele eles em entre era essa esse
+esta este eu foi for ha isso isto ja la lhe mais mas me mesmo meu minha muito na nao nas nem no nos
+nossa nosso num numa o os ou para pela pelas pelo pelos por qual quando que quem se sem ser seu sua
+sao so tambem te tem tu um uma umas uns voce voces vos
+""".split())
+
+
+# ============================================================================
+# TEXTO
+# ============================================================================
+
+def normalize(text):
+    """Minúsculas e sem acentos (ação -> acao)"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+def tokenize(text):
+    """Termos indexáveis: sem acentos, sem stopwords e com 2+ caracteres"""
+    return [term[:MAX_TERM_LENGTH] for term in TOKEN.findall(normalize(text))
+            if len(term) > 1 and term not in STOPWORDS]
+
+def document_terms(titulo, tags, texto):
+    """Termos do documento com o peso de cada campo; as imagens Markdown não entram"""
+    body = MARKDOWN_IMAGE.sub(' ', texto or '')
+    return (tokenize(titulo or '') * TITLE_WEIGHT
+            + tokenize(tags or '') * TAGS_WEIGHT
+            + tokenize(body))
+
+
+# ============================================================================
+# CONSTRUÇÃO
+# ============================================================================
+
+def module_index_path(module_id, index_dir=INDEX_DIR):
+    return os.path.join(index_dir, f"modulo_{module_id}")
+
+def iter_module_documents(cursor, module_id):
+    """(id, system_id, termos) dos documentos do módulo, lidos em lotes por keyset"""
+    last_id = 0
+    while True:
+        cursor.execute(
+            """SELECT id, system_id, titulo, tags, conteudo_texto,
+                      CASE WHEN conteudo_texto IS NULL THEN conteudo END
+               FROM knowledge_base
+               WHERE module_id = %s AND id > %s
+               ORDER BY id LIMIT %s""",
+            (module_id, last_id, FETCH_BATCH_SIZE)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        for knowledge_id, system_id, titulo, tags, texto, conteudo in rows:
+            if texto is None:
+                texto, _ = build_knowledge_text(titulo or '', conteudo or '')
+            yield knowledge_id, system_id, document_terms(titulo, tags, texto)
+        last_id = rows[-1][0]
+
+def bm25_matrix(documents):
+    """
+    Monta a matriz de pesos BM25 (documentos x termos, CSC) a partir de
+    [(id, system_id, termos)]. Retorna (matriz, termos ordenados, ids,
+    sistemas, meta).
+    """
+    vocabulary = {}
+    rows, cols, counts = array('i'), array('i'), array('f')
+    doc_ids, systems, lengths = array('i'), array('i'), array('f')
+
+    for row, (knowledge_id, system_id, terms) in enumerate(documents):
+        doc_ids.append(knowledge_id)
+        systems.append(system_id or 0)
+        lengths.append(len(terms))
+        for term, count in Counter(terms).items():
+            rows.append(row)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(count)
+
+    n_docs = len(doc_ids)
+    terms = np.array(sorted(vocabulary), dtype=f'<U{MAX_TERM_LENGTH}')
+    # Colunas na ordem alfabética dos termos (busca por np.searchsorted no índice salvo)
+    remap = np.empty(len(vocabulary), dtype=np.int32)
+    remap[[vocabulary[term] for term in terms]] = np.arange(len(terms), dtype=np.int32)
+
+    rows = np.frombuffer(rows, dtype=np.int32)
+    cols = remap[np.frombuffer(cols, dtype=np.int32)] if len(cols) else np.frombuffer(cols, dtype=np.int32)
+    tf = np.frombuffer(counts, dtype=np.float32)
+    lengths = np.frombuffer(lengths, dtype=np.float32)
+    avgdl = float(lengths.mean()) if n_docs else 0.0
+
+    df = np.bincount(cols, minlength=len(terms)).astype(np.float32)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[rows] / (avgdl or 1))
+    weights = (idf[cols] * tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32)
+
+    matrix = sparse.csc_matrix((weights, (rows, cols)), shape=(n_docs, len(terms)), dtype=np.float32)
+    matrix.sort_indices()
+    meta = {
+        'formato': INDEX_FORMAT,
+        'documentos': n_docs,
+        'termos': len(terms),
+        'avgdl': avgdl,
+        'k1': BM25_K1,
+        'b': BM25_B,
+    }
+    return matrix, terms, np.frombuffer(doc_ids, dtype=np.int32), np.frombuffer(systems, dtype=np.int32), meta
+
+def save_index(path, matrix, terms, doc_ids, systems, meta):
+    """Grava em um diretório temporário e troca de uma vez (leitores nunca veem um índice pela metade)"""
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    np.save(os.path.join(tmp_path, 'data.npy'), matrix.data)
+    np.save(os.path.join(tmp_path, 'indices.npy'), matrix.indices)
+    np.save(os.path.join(tmp_path, 'indptr.npy'), matrix.indptr)
+    np.save(os.path.join(tmp_path, 'terms.npy'), terms)
+    np.save(os.path.join(tmp_path, 'docs.npy'), doc_ids)
+    np.save(os.path.join(tmp_path, 'systems.npy'), systems)
+    with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    old_path = f"{path}.old"
+    if os.path.exists(path):
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def build_module_index(cursor, module_id, index_dir=INDEX_DIR):
+    """Reconstrói o índice de um módulo; retorna o meta gravado"""
+    started_at = time.perf_counter()
+    matrix, terms, doc_ids, systems, meta = bm25_matrix(iter_module_documents(cursor, module_id))
+    meta['module_id'] = module_id
+    meta['construido_em'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    meta['construcao_ms'] = round((time.perf_counter() - started_at) * 1000, 1)
+    save_index(module_index_path(module_id, index_dir), matrix, terms, doc_ids, systems, meta)
+    return meta
+
+
+# ============================================================================
+# BUSCA
+# ============================================================================
+
+class RetrievalIndex:
+    """Índice BM25 de um módulo aberto com mmap"""
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('formato') != INDEX_FORMAT:
+            raise ValueError(f"Índice em {path} tem formato antigo. Execute: python retrieval.py indexar")
+
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode='r')
+        self.terms = load('terms.npy')
+        self.doc_ids = load('docs.npy')
+        self.systems = load('systems.npy')
+        self.matrix = sparse.csc_matrix(
+            (load('data.npy'), load('indices.npy'), load('indptr.npy')),
+            shape=(self.meta['documentos'], self.meta['termos'])
+        )
+
+    @classmethod
+    def load(cls, module_id, index_dir=INDEX_DIR):
+        """Índice do módulo, ou None se ainda não foi construído"""
+        path = module_index_path(module_id, index_dir)
+        return cls(path) if os.path.exists(os.path.join(path, 'meta.json')) else None
+
+    def term_columns(self, text):
+        """Colunas dos termos da consulta presentes no vocabulário"""
+        query_terms = np.array(sorted(set(tokenize(text))), dtype=self.terms.dtype)
+        if len(query_terms) == 0 or len(self.terms) == 0:
+            return np.empty(0, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.terms, query_terms), len(self.terms) - 1)
+        return positions[self.terms[positions] == query_terms]
+
+    def scores(self, text, system_id=None):
+        """Pontuação BM25 de todos os documentos do módulo (0 fora do sistema)"""
+        columns = self.term_columns(text)
+        if len(columns) == 0:
+            return np.zeros(len(self.doc_ids), dtype=np.float32)
+        scores = np.asarray(self.matrix[:, columns].sum(axis=1)).ravel()
+        if system_id:
+            scores[self.systems != system_id] = 0
+        return scores
+
+    def search(self, text, k=DEFAULT_TOP_K, system_id=None):
+        """Top-k [(knowledge_id, score)] com score > 0, do maior para o menor"""
+        scores = self.scores(text, system_id)
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > k:
+            hits = hits[np.argpartition(scores[hits], -k)[-k:]]
+        hits = hits[np.argsort(-scores[hits], kind='stable')]
+        return [(int(self.doc_ids[i]), float(scores[i])) for i in hits]
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def fulltext_search(cursor, module_id, system_id, text, k):
+    """Mesma consulta de searchKnowledge (src/lib/knowledge.ts), sem o fallback"""
+    scope, params = ("module_id = %s AND system_id = %s", [module_id, system_id]) if system_id \
+        else ("module_id = %s", [module_id])
+    cursor.execute(
+        f"""SELECT id FROM knowledge_base
+            WHERE {scope} AND MATCH(titulo, conteudo, tags) AGAINST (%s IN NATURAL LANGUAGE MODE)
+            ORDER BY MATCH(titulo, conteudo, tags) AGAINST (%s IN NATURAL LANGUAGE MODE) DESC
+            LIMIT {int(k)}""",
+        params + [text, text]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+def load_feedback_cases(cursor, module_id=None, before=None, limit=500, k=DEFAULT_TOP_K):
+    """
+    Perguntas com feedback positivo e os documentos enviados ao modelo.
+    Ignora feedbacks sem seleção (base inteira enviada) ou com mais de k documentos.
+    """
+    filters = ["f.feedback = 'positive'", "(f.knowledge_base_sent IS NOT NULL OR f.knowledge_base_sent_hash IS NOT NULL)"]
+    params = []
+    if module_id:
+        filters.append("c.module_id = %s")
+        params.append(module_id)
+    if before:
+        filters.append("f.created_at < %s")
+        params.append(before)
+    cases = []
+    for row in FeedbackReader(cursor).rows(filters, params, limit):
+        try:
+            relevant = {int(doc['id']) for doc in json.loads(row.knowledge_base_sent) if 'id' in doc}
+        except (ValueError, TypeError, KeyError):
+            continue
+        if 0 < len(relevant) <= k:
+            cases.append((row.user_message, relevant, row.module_id, row.system_id))
+    return cases
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+def summarize(results, latencies):
+    """hit@k, recall@k e MRR a partir de [(ids retornados, ids relevantes)]"""
+    hits = recall = reciprocal = 0.0
+    for returned, relevant in results:
+        found = [i for i, knowledge_id in enumerate(returned) if knowledge_id in relevant]
+        hits += bool(found)
+        recall += len(found) / len(relevant)
+        reciprocal += 1 / (found[0] + 1) if found else 0
+    total = len(results) or 1
+    return {
+        'hit': hits / total,
+        'recall': recall / total,
+        'mrr': reciprocal / total,
+        'p50_ms': statistics.median(latencies) if latencies else 0.0,
+        'p95_ms': percentile(latencies, 0.95),
+    }
+
+def run_benchmark(cursor, module_id=None, before=None, limit=500, k=DEFAULT_TOP_K, index_dir=INDEX_DIR):
+    """Compara BM25 local e FULLTEXT do MySQL na mesma amostra de perguntas"""
+    print(f"\n--- BENCHMARK DE BUSCA (top-{k}) ---\n")
+    cases = load_feedback_cases(cursor, module_id, before, limit, k)
+    if not cases:
+        print("⚠️  Nenhum feedback positivo com documentos selecionados para usar como gabarito")
+        return False
+
+    indexes = {}
+    methods = {'BM25 local': ([], []), 'FULLTEXT MySQL': ([], [])}
+    fulltext_available = True
+    for message, relevant, case_module, case_system in cases:
+        if case_module not in indexes:
+            indexes[case_module] = RetrievalIndex.load(case_module, index_dir)
+        index = indexes[case_module]
+        if index is None:
+            continue
+
+        started_at = time.perf_counter()
+        returned = [knowledge_id for knowledge_id, _ in index.search(message, k, case_system)]
+        methods['BM25 local'][1].append((time.perf_counter() - started_at) * 1000)
+        methods['BM25 local'][0].append((returned, relevant))
+
+        if fulltext_available:
+            started_at = time.perf_counter()
+            try:
+                returned = fulltext_search(cursor, case_module, case_system, message, k)
+            except Error as e:
+                print(f"⚠️  FULLTEXT indisponível ({e}); comparando só o BM25")
+                fulltext_available = False
+                continue
+            methods['FULLTEXT MySQL'][1].append((time.perf_counter() - started_at) * 1000)
+            methods['FULLTEXT MySQL'][0].append((returned, relevant))
+
+    missing = sorted(module for module, index in indexes.items() if index is None)
+    if missing:
+        print(f"⚠️  Módulo(s) sem índice ignorado(s): {', '.join(map(str, missing))} (python retrieval.py indexar)")
+
+    print(f"{len(methods['BM25 local'][0])} pergunta(s) de {len(cases)} feedback(s) positivo(s)"
+          f"{f' anteriores a {before}' if before else ''}\n")
+    print(f"{'Método':<16} {'hit@k':>7} {'recall@k':>9} {'MRR':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    print("-" * 58)
+    for name, (results, latencies) in methods.items():
+        if not results:
+            continue
+        stats = summarize(results, latencies)
+        print(f"{name:<16} {stats['hit']:>7.1%} {stats['recall']:>9.1%} {stats['mrr']:>6.3f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f}")
+    print("\nGabarito: documentos enviados ao modelo em respostas com feedback positivo.")
+    print("A seleção pelo LLM custava uma chamada extra ao modelo (segundos) por mensagem.")
+    return True
+
+
+# ============================================================================
+# COMANDOS
+# ============================================================================
+
+def index_modules(cursor, module_id=None, index_dir=INDEX_DIR):
+    """Reconstrói o índice de um módulo ou de todos"""
+    print(f"\n--- INDEXAR BASE DE CONHECIMENTO ({index_dir}) ---\n")
+    if module_id:
+        modules = [(module_id,)]
+    else:
+        cursor.execute("SELECT id FROM modules ORDER BY id")
+        modules = cursor.fetchall()
+
+    for (current_module,) in modules:
+        meta = build_module_index(cursor, current_module, index_dir)
+        print(f"✓ Módulo {current_module}: {meta['documentos']} documento(s), "
+              f"{meta['termos']} termo(s) em {meta['construcao_ms']:.0f} ms")
+    print(f"\n✅ {len(modules)} índice(s) atualizado(s)")
+    return True
+
+def search_command(module_id, system_id, text, k, index_dir=INDEX_DIR):
+    index = RetrievalIndex.load(module_id, index_dir)
+    if index is None:
+        print(f"❌ Módulo {module_id} sem índice. Execute: python retrieval.py indexar --modulo {module_id}")
+        return False
+
+    started_at = time.perf_counter()
+    results = index.search(text, k, system_id)
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    print(f"\n{len(results)} documento(s) em {elapsed_ms:.2f} ms "
+          f"(índice de {index.meta['construido_em']}, {index.meta['documentos']} documento(s))\n")
+    for position, (knowledge_id, score) in enumerate(results, 1):
+        print(f"{position:>3}. #{knowledge_id:<8} {score:.3f}")
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índice local de busca (BM25) da base de conhecimento")
+    parser.add_argument('--diretorio', default=INDEX_DIR, help=f"Diretório dos índices (padrão: {INDEX_DIR})")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    indexar = subparsers.add_parser('indexar', help="Constrói/reconstrói os índices")
+    indexar.add_argument('--modulo', type=int, help="Só este módulo")
+
+    buscar = subparsers.add_parser('buscar', help="Consulta o índice de um módulo")
+    buscar.add_argument('texto')
+    buscar.add_argument('--modulo', type=int, required=True)
+    buscar.add_argument('--sistema', type=int)
+    buscar.add_argument('--k', type=int, default=DEFAULT_TOP_K)
+
+    benchmark = subparsers.add_parser('benchmark', help="Compara o BM25 local com o FULLTEXT do MySQL")
+    benchmark.add_argument('--modulo', type=int)
+    benchmark.add_argument('--antes', metavar='AAAA-MM-DD', help="Só feedbacks anteriores a esta data")
+    benchmark.add_argument('--limite', type=int, default=500, help="Feedbacks usados (mais recentes)")
+    benchmark.add_argument('--k', type=int, default=DEFAULT_TOP_K)
+
+    args = parser.parse_args(argv)
+
+    if args.comando == 'buscar':
+        return 0 if search_command(args.modulo, args.sistema, args.texto, max(1, args.k), args.diretorio) else 2
+
+    try:
+        connection = db.get_connection()
+        cursor = connection.cursor()
+
+        if args.comando == 'indexar':
+            ok = index_modules(cursor, args.modulo, args.diretorio)
+        else:
+            ok = run_benchmark(cursor, args.modulo, args.antes, max(1, args.limite), max(1, args.k), args.diretorio)
+        return 0 if ok else 2
+
+    except Error as e:
+        print(f"❌ Erro no banco de dados: {e}")
+        return 1
+
+    finally:
+        if 'connection' in locals():
+            cursor.close()
+            connection.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
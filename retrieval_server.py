@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serviço local de busca da base de conhecimento
+
+Mantém em memória um índice BM25 por módulo, com os trechos
+(knowledge_chunks) como unidade de busca, e responde:
+
+    GET /retrieve?module_id=1&system_id=2&q=texto&k=8
+        {"documents": [{"id", "titulo", "tags", "score",
+                        "chunks": [{"id", "score"}, ...]}, ...], "elapsed_ms"}
+    GET /health
+        documentos indexados, horário e duração da última sincronização
+
+Cada /retrieve também traz "classification": se a pergunta precisa da base
+(saudação, agradecimento e perguntas sem relação com o módulo não precisam)
+e se o classificador tem confiança para decidir sozinho. Sem confiança, o chat
+pergunta ao LLM como antes. O classificador é uma regressão logística pequena
+sobre sinais de sobreposição léxica; os pesos padrão podem ser substituídos
+por pesos treinados com o histórico de chat_feedback (--treinar).
+
+O chat (src/lib/knowledge.ts) usa o serviço quando RETRIEVAL_URL está no
+.env e volta para o FULLTEXT do MySQL se ele não responder.
+
+Sincronização incremental, sem reconstruir o índice: a cada --intervalo
+segundos relê os documentos com data_atualizacao a partir da última vista
+(com uma folga de alguns segundos, para pegar trechos gravados logo depois
+do documento), pelo índice da migração 0012, e os documentos com trechos
+novos. A cada minuto compara os ids para remover os excluídos.
+
+Uso:
+    python retrieval_server.py --port 8765
+    python retrieval_server.py --sqlite fixture.db     # banco SQLite de teste
+    python retrieval_server.py --treinar               # treina o classificador e sai
+
+Requer: pip install numpy scipy (usa a tokenização de retrieval.py)
+"""
+
+from mysql.connector import Error
+import os
+import sys
+import json
+import math
+import time
+import sqlite3
+import argparse
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+import db
+from feedback import FeedbackReader
+from knowledge import build_knowledge_text
+from retrieval import (BM25_K1, BM25_B, DEFAULT_TOP_K, INDEX_DIR, TOKEN,
+                       document_terms, normalize, tokenize)
+
+POLL_INTERVAL = float(os.getenv('RETRIEVAL_POLL_SECONDS') or 2)
+RECONCILE_INTERVAL = 60  # Segundos entre comparações completas de ids (exclusões)
+SYNC_OVERLAP = timedelta(seconds=5)  # Folga ao reler documentos alterados
+SYNC_BATCH_SIZE = 500
+CHUNK_OVERLAP = 10000  # Folga, em ids, ao procurar trechos gravados (commits fora de ordem)
+CHUNKS_PER_DOCUMENT = 3  # Trechos devolvidos por documento
+MAX_TOP_K = 50
+
+# Classificador "precisa da base?"
+CLASSIFIER_PATH = os.path.join(INDEX_DIR, 'classificador.json')
+CLASSIFIER_FEATURES = ('conversa', 'cobertura', 'pontuacao', 'termos')
+DEFAULT_WEIGHTS = {'bias': -3.0, 'conversa': -6.0, 'cobertura': 4.0, 'pontuacao': 4.0, 'termos': 0.5}
+CONFIDENT_YES = 0.8  # Probabilidade a partir da qual decide "precisa" sem o LLM
+CONFIDENT_NO = 0.2  # ... e até a qual decide "não precisa"
+SELECT_RATIO = 0.35  # Documentos selecionados: pontuação >= 35% da do primeiro
+
+# Mensagens formadas só por estas palavras são conversa (saudação, agradecimento, confirmação)
+SMALL_TALK = frozenset("""
+oi ola ei opa eai hey hello hi bom boa bons boas dia dias tarde tardes noite noites tudo bem beleza blz
+tchau ate logo mais breve flw falou abraco abracos obrigado obrigada obrigadao valeu vlw grato grata
+agradeco muito ok okay certo entendi perfeito otimo legal show joia sim nao pode claro combinado
+e a o voce vc como vai esta ta td tranquilo
+""".split())
+
+
+# ============================================================================
+# ÍNDICE
+# ============================================================================
+
+class LexicalIndex:
+    """
+    BM25 incremental de um módulo. Unidade = trecho (knowledge_id, chunk_id);
+    documentos ainda sem trechos entram inteiros com chunk_id None. A
+    pontuação do documento é a do seu melhor trecho.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)  # termo -> {unidade: tf}
+        self.unit_terms = {}  # unidade -> Counter (para remover)
+        self.unit_lengths = {}
+        self.total_length = 0
+        self.documents = {}  # knowledge_id -> (system_id, titulo, tags, [unidades])
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add_document(self, knowledge_id, system_id, titulo, tags, units):
+        """Indexa (ou reindexa) um documento; units = [(chunk_id, termos)]"""
+        self.remove_document(knowledge_id)
+        keys = []
+        for chunk_id, terms in units:
+            key = (knowledge_id, chunk_id)
+            counts = Counter(terms)
+            for term, count in counts.items():
+                self.postings[term][key] = count
+            self.unit_terms[key] = counts
+            self.unit_lengths[key] = len(terms)
+            self.total_length += len(terms)
+            keys.append(key)
+        self.documents[knowledge_id] = (system_id, titulo, tags, keys)
+
+    def remove_document(self, knowledge_id):
+        document = self.documents.pop(knowledge_id, None)
+        if document is None:
+            return
+        for key in document[3]:
+            for term in self.unit_terms.pop(key):
+                postings = self.postings[term]
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[term]
+            self.total_length -= self.unit_lengths.pop(key)
+
+    def idf(self, term):
+        units = len(self.unit_lengths)
+        matches = len(self.postings.get(term, ()))
+        return math.log1p((units - matches + 0.5) / (matches + 0.5))
+
+    def search(self, text, k=DEFAULT_TOP_K, system_id=None):
+        """Top-k documentos [(knowledge_id, score, [(chunk_id, score)])] por BM25"""
+        units = len(self.unit_lengths)
+        if not units:
+            return []
+        avgdl = self.total_length / units or 1
+        scores = defaultdict(float)
+        for term in set(tokenize(text)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for key, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.unit_lengths[key] / avgdl)
+                scores[key] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        by_document = defaultdict(list)
+        for (knowledge_id, chunk_id), score in scores.items():
+            if system_id and self.documents[knowledge_id][0] != system_id:
+                continue
+            by_document[knowledge_id].append((chunk_id, score))
+
+        results = []
+        for knowledge_id, chunks in by_document.items():
+            chunks.sort(key=lambda chunk: -chunk[1])
+            results.append((knowledge_id, chunks[0][1], chunks[:CHUNKS_PER_DOCUMENT]))
+        results.sort(key=lambda result: (-result[1], result[0]))
+        return results[:k]
+
+    def query_features(self, text, top_score):
+        """Sinais de sobreposição léxica entre a pergunta e o módulo (entrada do classificador)"""
+        terms = set(tokenize(text))
+        matched = [term for term in terms if term in self.postings]
+        # Pontuação máxima possível de um trecho para estes termos (tf -> infinito)
+        upper_bound = sum(self.idf(term) for term in matched) * (BM25_K1 + 1)
+        return {
+            'conversa': float(is_small_talk(text)),
+            'cobertura': len(matched) / len(terms) if terms else 0.0,
+            'pontuacao': top_score / upper_bound if upper_bound else 0.0,
+            'termos': math.log1p(len(terms)),
+        }
+
+
+def is_small_talk(text):
+    """Saudação, despedida, agradecimento ou confirmação simples"""
+    words = TOKEN.findall(normalize(text))
+    return bool(words) and all(word in SMALL_TALK for word in words)
+
+
+class NeedsKnowledgeClassifier:
+    """Regressão logística sobre query_features: probabilidade de a pergunta precisar da base"""
+
+    def __init__(self, weights=None, source='padrão'):
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.source = source
+        self.trained = weights is not None
+
+    @classmethod
+    def load(cls, path=CLASSIFIER_PATH):
+        """Pesos treinados (--treinar) se existirem; senão os padrão"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['pesos'], f"treinado em {data['treinado_em']}")
+
+    def probability(self, features):
+        z = self.weights['bias'] + sum(self.weights[name] * features[name] for name in CLASSIFIER_FEATURES)
+        return 1 / (1 + math.exp(-max(min(z, 30), -30)))
+
+    def classify(self, features):
+        """
+        Com os pesos padrão, só conversa dá um "não precisa" confiante: sem
+        termos em comum com o módulo (sinônimo, erro de digitação, sigla) a
+        pergunta segue para o FULLTEXT e a verificação pelo LLM.
+        """
+        probability = self.probability(features)
+        confident_no = probability <= CONFIDENT_NO and (self.trained or features['conversa'] > 0)
+        return {
+            'needs_knowledge': probability >= 0.5,
+            'probability': round(probability, 4),
+            'confident': probability >= CONFIDENT_YES or confident_no,
+            'model': self.source,
+        }
+
+
+class KnowledgeStore:
+    """Índices de todos os módulos, sincronizados com o banco por polling"""
+
+    def __init__(self, connect):
+        self.connect = connect
+        self.indexes = defaultdict(LexicalIndex)
+        self.module_of = {}  # knowledge_id -> module_id
+        self.lock = threading.RLock()
+        self.watermark = None  # Maior data_atualizacao já vista
+        self.chunk_watermark = None  # Maior knowledge_chunks.id já visto
+        self.chunk_head = {}  # knowledge_id -> maior id de trecho indexado
+        self.last_sync = None
+        self.last_reconcile = 0.0
+        self.sync_ms = 0.0
+        self.verbose = False
+        self.classifier = NeedsKnowledgeClassifier.load()
+
+    # ----- Leitura do banco -----
+
+    def load_documents(self, cursor, rows):
+        """Indexa [(id, module_id, system_id, titulo, tags, texto, conteudo, data_atualizacao)] com seus trechos"""
+        chunks = defaultdict(list)
+        ids = [row[0] for row in rows]
+        for start in range(0, len(ids), SYNC_BATCH_SIZE):
+            batch = ids[start:start + SYNC_BATCH_SIZE]
+            cursor.execute(
+                f"""SELECT id, knowledge_id, conteudo FROM knowledge_chunks
+                    WHERE knowledge_id IN ({', '.join(['%s'] * len(batch))})
+                    ORDER BY knowledge_id, posicao""",
+                batch
+            )
+            for chunk_id, knowledge_id, conteudo in cursor.fetchall():
+                chunks[knowledge_id].append((chunk_id, conteudo))
+
+        with self.lock:
+            for knowledge_id, module_id, system_id, titulo, tags, texto, conteudo, updated_at in rows:
+                units = [(chunk_id, document_terms(titulo, tags, chunk_text))
+                         for chunk_id, chunk_text in chunks[knowledge_id]]
+                if not units:
+                    if texto is None:
+                        texto, _ = build_knowledge_text(titulo or '', conteudo or '')
+                    units = [(None, document_terms(titulo, tags, texto))]
+
+                previous_module = self.module_of.get(knowledge_id)
+                if previous_module is not None and previous_module != module_id:
+                    self.indexes[previous_module].remove_document(knowledge_id)
+                self.indexes[module_id].add_document(knowledge_id, system_id, titulo, tags or '', units)
+                self.module_of[knowledge_id] = module_id
+                self.chunk_head[knowledge_id] = max((chunk_id for chunk_id, _ in chunks[knowledge_id]), default=0)
+
+                updated_at = as_datetime(updated_at)
+                if updated_at and (self.watermark is None or updated_at > self.watermark):
+                    self.watermark = updated_at
+
+    def fetch_changed(self, cursor, since):
+        """
+        Documentos alterados desde since, em lotes. A carga inicial (since
+        None) percorre a tabela pela chave primária; as seguintes, pelo
+        índice (data_atualizacao, id) da migração 0012, lendo só as linhas
+        novas.
+        """
+        columns = """id, module_id, system_id, titulo, tags, conteudo_texto,
+                     CASE WHEN conteudo_texto IS NULL THEN conteudo END, data_atualizacao"""
+        last_id = 0
+        while True:
+            if since is None:
+                cursor.execute(
+                    f"SELECT {columns} FROM knowledge_base WHERE id > %s ORDER BY id LIMIT {SYNC_BATCH_SIZE}",
+                    (last_id,)
+                )
+            else:
+                cursor.execute(
+                    f"""SELECT {columns} FROM knowledge_base
+                        WHERE data_atualizacao > %s OR (data_atualizacao = %s AND id > %s)
+                        ORDER BY data_atualizacao, id LIMIT {SYNC_BATCH_SIZE}""",
+                    (since, since, last_id)
+                )
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+            if since is not None:
+                since = rows[-1][7]
+
+    def fetch_rechunked(self, cursor, head):
+        """
+        Documentos cujos trechos mudaram sem alterar knowledge_base (python
+        knowledge.py fragmentar): trechos novos têm id maior que o último
+        visto. A folga de CHUNK_OVERLAP ids cobre lotes que fazem commit fora
+        de ordem; só voltam ao índice os documentos cujo maior id de trecho
+        difere do indexado.
+        """
+        cursor.execute(
+            """SELECT knowledge_id, MAX(id) FROM knowledge_chunks
+               WHERE id > %s AND id <= %s GROUP BY knowledge_id""",
+            (max(self.chunk_watermark - CHUNK_OVERLAP, 0), head)
+        )
+        with self.lock:
+            ids = sorted(knowledge_id for knowledge_id, chunk_id in cursor.fetchall()
+                         if knowledge_id in self.module_of and self.chunk_head.get(knowledge_id) != chunk_id)
+        for start in range(0, len(ids), SYNC_BATCH_SIZE):
+            batch = ids[start:start + SYNC_BATCH_SIZE]
+            cursor.execute(
+                f"""SELECT id, module_id, system_id, titulo, tags, conteudo_texto,
+                           CASE WHEN conteudo_texto IS NULL THEN conteudo END, data_atualizacao
+                    FROM knowledge_base
+                    WHERE id IN ({', '.join(['%s'] * len(batch))})""",
+                batch
+            )
+            rows = cursor.fetchall()
+            if rows:
+                yield rows
+
+    def reconcile(self, cursor):
+        """Remove do índice os documentos excluídos do banco"""
+        cursor.execute("SELECT id FROM knowledge_base")
+        existing = {row[0] for row in cursor.fetchall()}
+        with self.lock:
+            removed = [knowledge_id for knowledge_id in self.module_of if knowledge_id not in existing]
+            for knowledge_id in removed:
+                self.indexes[self.module_of.pop(knowledge_id)].remove_document(knowledge_id)
+                self.chunk_head.pop(knowledge_id, None)
+        self.last_reconcile = time.monotonic()
+        return len(removed)
+
+    def sync(self):
+        """Aplica as alterações desde a última sincronização; retorna (indexados, removidos)"""
+        started_at = time.perf_counter()
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            since = self.watermark - SYNC_OVERLAP if self.watermark else None
+            # Lido antes dos documentos: trechos gravados durante a carga ficam para a próxima
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM knowledge_chunks")
+            chunk_head = cursor.fetchone()[0]
+            indexed = 0
+            for rows in self.fetch_changed(cursor, since):
+                self.load_documents(cursor, rows)
+                indexed += len(rows)
+            if self.chunk_watermark is not None:
+                for rows in self.fetch_rechunked(cursor, chunk_head):
+                    self.load_documents(cursor, rows)
+                    indexed += len(rows)
+            self.chunk_watermark = chunk_head
+
+            # Exclusões só aparecem na comparação periódica de ids (o chat ignora ids que já não existem)
+            removed = 0
+            if time.monotonic() - self.last_reconcile >= RECONCILE_INTERVAL:
+                removed = self.reconcile(cursor)
+            cursor.close()
+        finally:
+            connection.close()
+        self.last_sync = datetime.now()
+        self.sync_ms = (time.perf_counter() - started_at) * 1000
+        return indexed, removed
+
+    # ----- Consulta -----
+
+    def search_with_features(self, module_id, text, k=DEFAULT_TOP_K, system_id=None):
+        """(resultados da busca, sinais para o classificador)"""
+        with self.lock:
+            index = self.indexes.get(module_id) or LexicalIndex()
+            results = index.search(text, k, system_id)
+            return results, index.query_features(text, results[0][1] if results else 0.0)
+
+    def retrieve(self, module_id, text, k=DEFAULT_TOP_K, system_id=None):
+        """(documentos, classificação) no formato da resposta de /retrieve"""
+        with self.lock:
+            results, features = self.search_with_features(module_id, text, k, system_id)
+            classification = self.classifier.classify(features)
+            cutoff = results[0][1] * SELECT_RATIO if results else 0.0
+            index = self.indexes[module_id] if results else None
+            documents = [
+                {
+                    'id': knowledge_id,
+                    'titulo': index.documents[knowledge_id][1],
+                    'tags': index.documents[knowledge_id][2],
+                    'score': round(score, 4),
+                    'selected': score >= cutoff,
+                    'chunks': [{'id': chunk_id, 'score': round(chunk_score, 4)} for chunk_id, chunk_score in chunks],
+                }
+                for knowledge_id, score, chunks in results
+            ]
+        return documents, classification
+
+    def health(self):
+        with self.lock:
+            return {
+                'status': 'ok' if self.last_sync else 'sincronizando',
+                'modulos': sum(1 for index in self.indexes.values() if len(index)),
+                'documentos': len(self.module_of),
+                'ultima_sincronizacao': self.last_sync.isoformat(timespec='seconds') if self.last_sync else None,
+                'sincronizacao_ms': round(self.sync_ms, 1),
+            }
+
+
+def as_datetime(value):
+    """data_atualizacao do MySQL (datetime) ou do SQLite (texto)"""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+class SQLiteConnection:
+    """Conexão SQLite com a interface usada pelo serviço (placeholders %s do mysql.connector)"""
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+
+    def cursor(self):
+        return SQLiteCursor(self._connection.cursor())
+
+    def close(self):
+        self._connection.close()
+
+
+class SQLiteCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        params = [value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime) else value
+                  for value in params or ()]
+        return self._cursor.execute(sql.replace('%s', '?'), params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# ============================================================================
+# TREINO DO CLASSIFICADOR
+# ============================================================================
+
+def load_training_samples(cursor, limit=5000, k=DEFAULT_TOP_K):
+    """
+    (pergunta, module_id, system_id, precisa) a partir de chat_feedback:
+    - resposta com documentos selecionados (1 a k) e feedback positivo: precisa
+    - resposta sem seleção (nenhum documento ou a base inteira) e feedback positivo: não precisa
+    - resposta sem seleção e feedback negativo: precisava
+    Respostas com documentos e feedback negativo não dizem nada sobre a decisão e ficam de fora.
+    """
+    samples = []
+    for row in FeedbackReader(cursor).rows(limit=limit):
+        sent = row.knowledge_base_sent
+        try:
+            documents = len(json.loads(sent)) if sent else 0
+        except (ValueError, TypeError):
+            continue
+        used = 0 < documents <= k
+        if used and row.feedback == 'negative':
+            continue
+        samples.append((row.user_message, row.module_id, row.system_id,
+                        1.0 if used == (row.feedback == 'positive') else 0.0))
+    return samples
+
+def fit_logistic(features, labels, iterations=3000, learning_rate=0.5, l2=1e-3):
+    """Regressão logística por gradiente (poucas amostras e 4 sinais: numpy basta)"""
+    weights = np.zeros(features.shape[1])
+    bias = 0.0
+    for _ in range(iterations):
+        error = 1 / (1 + np.exp(-(features @ weights + bias))) - labels
+        weights -= learning_rate * (features.T @ error / len(labels) + l2 * weights)
+        bias -= learning_rate * error.mean()
+    return {'bias': float(bias), **{name: float(w) for name, w in zip(CLASSIFIER_FEATURES, weights)}}
+
+def evaluate(classifier, samples):
+    """(acurácia, fração decidida sem o LLM, acurácia nas decididas)"""
+    correct = decided = decided_correct = 0
+    for features, label in samples:
+        result = classifier.classify(features)
+        hit = result['needs_knowledge'] == bool(label)
+        correct += hit
+        if result['confident']:
+            decided += 1
+            decided_correct += hit
+    total = len(samples) or 1
+    return correct / total, decided / total, decided_correct / decided if decided else 0.0
+
+def train_classifier(store, cursor, path=CLASSIFIER_PATH):
+    """Treina com o histórico de feedback, compara com os pesos padrão e grava em path"""
+    print("\n--- TREINAR CLASSIFICADOR (precisa da base?) ---\n")
+    samples = []
+    for message, module_id, system_id, label in load_training_samples(cursor):
+        _, features = store.search_with_features(module_id, message, DEFAULT_TOP_K, system_id)
+        samples.append((features, label))
+
+    positives = sum(label for _, label in samples)
+    if len(samples) < 30 or positives in (0, len(samples)):
+        print(f"⚠️  Histórico insuficiente ({len(samples)} feedback(s), {positives:.0f} precisando da base). "
+              "Mantidos os pesos padrão.")
+        return False
+
+    # Avalia em 1 de cada 5 amostras, treinando nas demais
+    train = [sample for i, sample in enumerate(samples) if i % 5]
+    test = [sample for i, sample in enumerate(samples) if not i % 5]
+    matrix = lambda rows: np.array([[features[name] for name in CLASSIFIER_FEATURES] for features, _ in rows])
+    labels = lambda rows: np.array([label for _, label in rows])
+
+    candidate = NeedsKnowledgeClassifier(fit_logistic(matrix(train), labels(train)), 'treinado')
+    print(f"{len(samples)} amostra(s), {positives:.0f} precisando da base; avaliação em {len(test)}\n")
+    print(f"{'Pesos':<10} {'acurácia':>9} {'sem LLM':>8} {'acurácia sem LLM':>17}")
+    print("-" * 47)
+    for name, classifier in (('padrão', NeedsKnowledgeClassifier()), ('treinados', candidate)):
+        accuracy, decided, decided_accuracy = evaluate(classifier, test)
+        print(f"{name:<10} {accuracy:>9.1%} {decided:>8.1%} {decided_accuracy:>17.1%}")
+
+    weights = fit_logistic(matrix(samples), labels(samples))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'pesos': weights, 'amostras': len(samples),
+                   'treinado_em': time.strftime('%Y-%m-%d %H:%M:%S')}, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Pesos gravados em {path} (reinicie o serviço para usá-los)")
+    return True
+
+
+# ============================================================================
+# HTTP
+# ============================================================================
+
+class RetrievalHandler(BaseHTTPRequestHandler):
+    """GET /retrieve e GET /health"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'AskForgeRetrieval/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body):
+        body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if url.path == '/health':
+            return self._send(200, self.server.store.health())
+        if url.path != '/retrieve':
+            return self._send(404, {'error': 'Não encontrado'})
+
+        try:
+            module_id = int(query['module_id'])
+            system_id = int(query['system_id']) if query.get('system_id') else None
+            k = min(max(int(query.get('k') or DEFAULT_TOP_K), 1), MAX_TOP_K)
+        except (KeyError, ValueError):
+            return self._send(400, {'error': 'module_id é obrigatório; module_id, system_id e k devem ser números'})
+
+        started_at = time.perf_counter()
+        documents, classification = self.server.store.retrieve(module_id, query.get('q', ''), k, system_id)
+        self._send(200, {
+            'module_id': module_id,
+            'system_id': system_id,
+            'k': k,
+            'documents': documents,
+            'classification': classification,
+            'elapsed_ms': round((time.perf_counter() - started_at) * 1000, 3),
+        })
+
+
+def poll_changes(store, interval, stop):
+    """Thread de sincronização: erros de banco não derrubam o serviço (tenta de novo no próximo ciclo)"""
+    while not stop.wait(interval):
+        try:
+            indexed, removed = store.sync()
+            if store.verbose and (indexed or removed):
+                print(f"[sync] {indexed} documento(s) reindexado(s), {removed} removido(s) "
+                      f"em {store.sync_ms:.0f} ms")
+        except (Error, sqlite3.Error) as e:
+            print(f"⚠️  Falha ao sincronizar o índice: {e}")
+
+def start_server(store, host='127.0.0.1', port=0, interval=POLL_INTERVAL, verbose=False):
+    """
+    Faz a carga inicial, sobe o servidor e a sincronização em threads;
+    retorna (server, base_url). port=0 escolhe uma porta livre.
+    """
+    store.verbose = verbose
+    store.sync()
+    server = ThreadingHTTPServer((host, port), RetrievalHandler)
+    server.daemon_threads = True
+    server.store = store
+    server.verbose = verbose
+    server.stop_polling = threading.Event()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    threading.Thread(target=poll_changes, args=(store, interval, server.stop_polling), daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço local de busca da base de conhecimento")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--intervalo', type=float, default=POLL_INTERVAL, help="Segundos entre sincronizações")
+    parser.add_argument('--sqlite', metavar='ARQUIVO', help="Usa um banco SQLite (testes) em vez do MySQL do .env")
+    parser.add_argument('--verbose', action='store_true', help="Loga requisições e sincronizações")
+    parser.add_argument('--treinar', action='store_true', help="Treina o classificador com chat_feedback e sai")
+    args = parser.parse_args()
+
+    connect = (lambda: SQLiteConnection(args.sqlite)) if args.sqlite else db.get_connection
+    store = KnowledgeStore(connect)
+
+    if args.treinar:
+        try:
+            store.sync()
+            connection = connect()
+            try:
+                return 0 if train_classifier(store, connection.cursor()) else 2
+            finally:
+                connection.close()
+        except (Error, sqlite3.Error) as e:
+            print(f"❌ Erro no banco de dados: {e}")
+            return 1
+
+    try:
+        server, base_url = start_server(store, args.host, args.port, args.intervalo, args.verbose)
+    except (Error, sqlite3.Error) as e:
+        print(f"❌ Erro no banco de dados: {e}")
+        return 1
+
+    health = store.health()
+    print(f"✓ Serviço de busca em {base_url} ({health['documentos']} documento(s), "
+          f"{health['modulos']} módulo(s), carga em {health['sincronizacao_ms']:.0f} ms)")
+    print(f"  Sincronização a cada {args.intervalo:g}s, classificador: pesos {store.classifier.source}")
+    print(f"  No .env do Next.js: RETRIEVAL_URL={base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nEncerrando...")
+        server.stop_polling.set()
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
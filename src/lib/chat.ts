@@ -0,0 +1,21 @@
+import { query } from '@/lib/db';
+
+// Mensagens de uma conversa lidas da tabela ativa e do arquivo (chat_messages_archive, preenchido
+// por python archive.py), cada lado pelo índice (conversation_id, created_at). Uma conversa
+// arquivada que volta a receber mensagens tem as antigas no arquivo e as novas na tabela ativa.
+// columns precisa incluir created_at (ordenação da união).
+export async function fetchConversationMessages<T>(
+  conversationId: number | string,
+  columns: string,
+  options: { order?: 'ASC' | 'DESC'; limit?: number } = {}
+): Promise<T[]> {
+  const order = options.order === 'DESC' ? 'DESC' : 'ASC';
+  const limit = options.limit ? ` LIMIT ${Math.max(1, Math.floor(options.limit))}` : '';
+  const select = (table: string) =>
+    `(SELECT ${columns} FROM ${table} WHERE conversation_id = ? ORDER BY created_at ${order}${limit})`;
+
+  return query<T[]>(
+    `${select('chat_messages')} UNION ALL ${select('chat_messages_archive')} ORDER BY created_at ${order}${limit}`,
+    [conversationId, conversationId]
+  );
+}
@@ -33,3 +33,26 @@ export async function query<T>(sql: string, params?: any[]): Promise<T> {
   const [rows] = await pool.execute(sql, params);
   return rows as T;
 }
+
+export type QueryFn = <T>(sql: string, params?: any[]) => Promise<T>;
+
+// Executa fn em uma transação (uma conexão do pool): commit ao final, rollback em erro.
+// fn recebe um query() que roda nessa conexão.
+export async function transaction<T>(fn: (run: QueryFn) => Promise<T>): Promise<T> {
+  const connection = await pool.getConnection();
+  const run: QueryFn = async <R>(sql: string, params?: any[]) => {
+    const [rows] = await connection.execute(sql, params);
+    return rows as R;
+  };
+  try {
+    await connection.beginTransaction();
+    const result = await fn(run);
+    await connection.commit();
+    return result;
+  } catch (error) {
+    await connection.rollback();
+    throw error;
+  } finally {
+    connection.release();
+  }
+}
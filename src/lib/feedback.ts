@@ -0,0 +1,105 @@
+import { createHash } from 'crypto';
+import { deflateSync, inflateSync } from 'zlib';
+import { query } from '@/lib/db';
+
+// Conteúdo do chat_feedback em feedback_blobs: chave SHA-256 do texto, conteúdo em zlib (mesmo
+// formato de feedback.py). O blob do histórico é um manifesto com o hash de cada mensagem, para
+// feedbacks da mesma conversa compartilharem as mensagens em comum.
+const HASH_SIZE = 32;
+const BLOB_BATCH_SIZE = 500;
+
+type Payloads = Map<string, { hash: Buffer; data: Buffer }>;
+
+function addPayload(payloads: Payloads, data: Buffer): Buffer {
+  const hash = createHash('sha256').update(data).digest();
+  payloads.set(hash.toString('hex'), { hash, data });
+  return hash;
+}
+
+// Grava os conteúdos ainda ausentes em feedback_blobs (só estes são comprimidos)
+async function storeBlobs(payloads: Payloads): Promise<void> {
+  const entries = Array.from(payloads.values());
+  for (let start = 0; start < entries.length; start += BLOB_BATCH_SIZE) {
+    const batch = entries.slice(start, start + BLOB_BATCH_SIZE);
+    const existing = await query<{ hash: Buffer }[]>(
+      `SELECT hash FROM feedback_blobs WHERE hash IN (${batch.map(() => '?').join(', ')})`,
+      batch.map(entry => entry.hash)
+    );
+    const known = new Set(existing.map(row => row.hash.toString('hex')));
+    const missing = batch.filter(entry => !known.has(entry.hash.toString('hex')));
+    if (missing.length > 0) {
+      await query(
+        `INSERT IGNORE INTO feedback_blobs (hash, tamanho, conteudo) VALUES ${missing.map(() => '(?, ?, ?)').join(', ')}`,
+        missing.flatMap(entry => [entry.hash, entry.data.length, deflateSync(entry.data)])
+      );
+    }
+  }
+}
+
+// Grava o histórico (mensagens da conversa) e o conhecimento enviado; retorna os hashes para
+// chat_feedback. O histórico lido de volta é igual a JSON.stringify(messages).
+export async function storeFeedbackPayloads(
+  messages: any[],
+  knowledgeBaseSent: string | null
+): Promise<{ historyHash: Buffer; knowledgeHash: Buffer | null }> {
+  const payloads: Payloads = new Map();
+  const messageHashes = messages.map(message => addPayload(payloads, Buffer.from(JSON.stringify(message), 'utf8')));
+  const historyHash = addPayload(payloads, Buffer.concat(messageHashes));
+  const knowledgeHash = knowledgeBaseSent === null ? null : addPayload(payloads, Buffer.from(knowledgeBaseSent, 'utf8'));
+  await storeBlobs(payloads);
+  return { historyHash, knowledgeHash };
+}
+
+async function loadBlobs(hashes: Buffer[], blobs: Map<string, Buffer>): Promise<void> {
+  const missing = Array.from(new Map(hashes.map(hash => [hash.toString('hex'), hash])).entries())
+    .filter(([key]) => !blobs.has(key))
+    .map(([, hash]) => hash);
+  for (let start = 0; start < missing.length; start += BLOB_BATCH_SIZE) {
+    const batch = missing.slice(start, start + BLOB_BATCH_SIZE);
+    const rows = await query<{ hash: Buffer; conteudo: Buffer }[]>(
+      `SELECT hash, conteudo FROM feedback_blobs WHERE hash IN (${batch.map(() => '?').join(', ')})`,
+      batch
+    );
+    for (const row of rows) {
+      blobs.set(row.hash.toString('hex'), inflateSync(row.conteudo));
+    }
+  }
+}
+
+function manifestHashes(manifest: Buffer): Buffer[] {
+  const hashes: Buffer[] = [];
+  for (let i = 0; i < manifest.length; i += HASH_SIZE) {
+    hashes.push(manifest.subarray(i, i + HASH_SIZE));
+  }
+  return hashes;
+}
+
+// Preenche conversation_history e knowledge_base_sent das linhas que guardam só os hashes
+// (linhas antigas mantêm o texto) e remove as colunas de hash do resultado
+export async function resolveFeedbackPayloads(rows: any[]): Promise<void> {
+  const blobs = new Map<string, Buffer>();
+  const text = (hash: Buffer) => blobs.get(hash.toString('hex'))?.toString('utf8') ?? '';
+
+  await loadBlobs(
+    rows.flatMap(row => [row.conversation_history_hash, row.knowledge_base_sent_hash].filter(Boolean)),
+    blobs
+  );
+  const histories = new Map<any, Buffer[]>();
+  for (const row of rows) {
+    if (row.conversation_history_hash) {
+      histories.set(row, manifestHashes(blobs.get(row.conversation_history_hash.toString('hex')) ?? Buffer.alloc(0)));
+    }
+  }
+  await loadBlobs(Array.from(histories.values()).flat(), blobs);
+
+  for (const row of rows) {
+    if (row.knowledge_base_sent_hash) {
+      row.knowledge_base_sent = text(row.knowledge_base_sent_hash);
+    }
+    if (histories.has(row)) {
+      row.conversation_history = `[${histories.get(row)!.map(text).join(',')}]`;
+    }
+    delete row.conversation_history_hash;
+    delete row.knowledge_base_sent_hash;
+  }
+}
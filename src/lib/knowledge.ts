@@ -0,0 +1,369 @@
+import { query, QueryFn } from '@/lib/db';
+import { KnowledgeBase, KnowledgeImage, KnowledgeChunk } from '@/types';
+
+// Quantidade de documentos enviados ao modelo por pergunta
+export const KNOWLEDGE_TOP_K = parseInt(process.env.KNOWLEDGE_TOP_K || '8', 10) || 8;
+
+// Tamanho máximo de um trecho em tokens estimados (mesmo valor em knowledge.py, lido do .env).
+// Trechos menores que 1/8 disso são juntados ao anterior.
+export const KNOWLEDGE_CHUNK_TOKENS = parseInt(process.env.KNOWLEDGE_CHUNK_TOKENS || '400', 10) || 400;
+
+// Serviço local de busca (python retrieval_server.py). Sem RETRIEVAL_URL, ou se ele não
+// responder a tempo, a busca usa o FULLTEXT do MySQL.
+const RETRIEVAL_URL = process.env.RETRIEVAL_URL;
+const RETRIEVAL_TIMEOUT_MS = parseInt(process.env.RETRIEVAL_TIMEOUT_MS || '300', 10) || 300;
+
+// Índice FULLTEXT ainda não criado (python migrate.py)
+const ER_FT_MATCHING_KEY_NOT_FOUND = 1191;
+
+// Colunas de knowledge_base para listagens (sem conteudo_texto, usado só pelo chat)
+export const KNOWLEDGE_COLUMNS =
+  'kb.id, kb.module_id, kb.system_id, kb.created_by, kb.titulo, kb.conteudo, kb.tags, kb.data_criacao, kb.data_atualizacao';
+
+const IMAGE_TAG_REGEX = /<img[^>]+src=["']([^"']+)["'][^>]*>/gi;
+const HEADING_REGEX = /<h[1-6][^>]*>([\s\S]*?)<\/h[1-6]>/gi;
+const SENTENCE_SPLIT_REGEX = /((?<=[.!?]) +|\n\n)/;
+// Estimativa de tokens sem tokenizer: palavras contam 1 a cada 4 letras, pontuação/símbolos contam 1
+const TOKEN_REGEX = /[0-9A-Za-z\u00C0-\u024F]+|[^0-9A-Za-z\u00C0-\u024F\s]/gu;
+const SECTION_TITLE_MAX = 255;
+// Tags normalizadas (tags/knowledge_tags): mesmas regras de parse_tags em knowledge.py
+const TAG_MAX = 100;
+
+export interface KnowledgeCandidate {
+  id: number;
+  titulo: string;
+  tags?: string;
+  score: number;
+  chunks?: { id: number | null; score: number }[];
+}
+
+export interface KnowledgeSearch {
+  candidates: KnowledgeCandidate[];
+  // Decisão do classificador local (serviço de busca) quando ele tem confiança; sem ela, undefined
+  needsKnowledge?: boolean;
+}
+
+function scopeFilter(moduleId: number, systemId?: number | null): { sql: string; params: any[] } {
+  return systemId
+    ? { sql: 'module_id = ? AND system_id = ?', params: [moduleId, systemId] }
+    : { sql: 'module_id = ?', params: [moduleId] };
+}
+
+// Documentos mais recentes do módulo/sistema (sem conteúdo) - usado quando a busca não encontra nada
+async function recentCandidates(moduleId: number, systemId: number | null | undefined, limit: number): Promise<KnowledgeCandidate[]> {
+  const scope = scopeFilter(moduleId, systemId);
+  return query<KnowledgeCandidate[]>(
+    `SELECT id, titulo, tags, 0 as score FROM knowledge_base
+     WHERE ${scope.sql}
+     ORDER BY data_criacao DESC
+     LIMIT ${limit}`,
+    scope.params
+  );
+}
+
+// Top-k do serviço local de busca; null se ele não estiver configurado ou não responder.
+// Se o classificador do serviço decidir que a pergunta precisa da base, só os documentos
+// selecionados por ele seguem como candidatos.
+async function retrieveFromService(
+  moduleId: number,
+  systemId: number | null | undefined,
+  text: string,
+  limit: number
+): Promise<KnowledgeSearch | null> {
+  if (!RETRIEVAL_URL) {
+    return null;
+  }
+
+  const params = new URLSearchParams({ module_id: String(moduleId), q: text, k: String(limit) });
+  if (systemId) {
+    params.set('system_id', String(systemId));
+  }
+  const controller = new AbortController();
+  const timer = setTimeout(() => controller.abort(), RETRIEVAL_TIMEOUT_MS);
+
+  try {
+    const response = await fetch(`${RETRIEVAL_URL}/retrieve?${params}`, { signal: controller.signal });
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}`);
+    }
+    const data = await response.json();
+    const documents = data.documents as (KnowledgeCandidate & { selected: boolean })[];
+    const classification = data.classification;
+
+    if (!classification?.confident) {
+      return { candidates: documents };
+    }
+    if (!classification.needs_knowledge) {
+      return { candidates: documents, needsKnowledge: false };
+    }
+    // "Precisa" sem documento selecionado (termos só de outro sistema, módulo sem índice):
+    // sem decisão, para a lista vazia não virar "não precisa" e o fallback (FULLTEXT/recentes/LLM) rodar
+    const selected = documents.filter(doc => doc.selected);
+    return selected.length > 0 ? { candidates: selected, needsKnowledge: true } : { candidates: documents };
+  } catch (error) {
+    console.error('Serviço de busca indisponível, usando FULLTEXT:', error);
+    return null;
+  } finally {
+    clearTimeout(timer);
+  }
+}
+
+// Ranqueia os documentos do módulo/sistema (serviço local ou MATCH ... AGAINST) e retorna só
+// id/título/tags dos top-k
+export async function searchKnowledge(
+  moduleId: number,
+  systemId: number | null | undefined,
+  text: string,
+  limit: number = KNOWLEDGE_TOP_K
+): Promise<KnowledgeSearch> {
+  const scope = scopeFilter(moduleId, systemId);
+  const safeLimit = Math.max(1, Math.floor(limit));
+
+  // Serviço sem nenhum candidato e sem decisão: segue para o FULLTEXT (e depois os recentes)
+  const retrieved = await retrieveFromService(moduleId, systemId, text, safeLimit);
+  if (retrieved && (retrieved.candidates.length > 0 || retrieved.needsKnowledge !== undefined)) {
+    return retrieved;
+  }
+
+  try {
+    const candidates = await query<KnowledgeCandidate[]>(
+      `SELECT id, titulo, tags, MATCH(titulo, conteudo, tags) AGAINST (? IN NATURAL LANGUAGE MODE) as score
+       FROM knowledge_base
+       WHERE ${scope.sql} AND MATCH(titulo, conteudo, tags) AGAINST (? IN NATURAL LANGUAGE MODE)
+       ORDER BY score DESC
+       LIMIT ${safeLimit}`,
+      [text, ...scope.params, text]
+    );
+
+    if (candidates.length > 0) {
+      return { candidates };
+    }
+  } catch (error: any) {
+    if (error?.errno !== ER_FT_MATCHING_KEY_NOT_FOUND) {
+      throw error;
+    }
+    console.error('Índice FULLTEXT de knowledge_base não encontrado. Execute: python migrate.py');
+  }
+
+  return { candidates: await recentCandidates(moduleId, systemId, safeLimit) };
+}
+
+// Busca o conteúdo apenas dos documentos escolhidos, na ordem do ranking.
+// O HTML bruto só vem para documentos ainda sem conteudo_texto (antes do backfill).
+export async function fetchKnowledgeDocuments(ids: number[]): Promise<(KnowledgeBase & { id: number })[]> {
+  if (ids.length === 0) {
+    return [];
+  }
+
+  const placeholders = ids.map(() => '?').join(',');
+  const documents = await query<(KnowledgeBase & { id: number })[]>(
+    `SELECT id, titulo, tags, conteudo_texto,
+            CASE WHEN conteudo_texto IS NULL THEN conteudo END as conteudo
+     FROM knowledge_base WHERE id IN (${placeholders})`,
+    ids
+  );
+
+  const order = new Map(ids.map((id, index) => [id, index]));
+  return documents.sort((a, b) => (order.get(a.id) ?? 0) - (order.get(b.id) ?? 0));
+}
+
+// Manifesto de imagens dos documentos, agrupado por documento e na ordem em que aparecem
+export async function fetchKnowledgeImages(ids: number[]): Promise<Map<number, KnowledgeImage[]>> {
+  const manifest = new Map<number, KnowledgeImage[]>();
+  if (ids.length === 0) {
+    return manifest;
+  }
+
+  const rows = await query<(KnowledgeImage & { knowledge_id: number })[]>(
+    `SELECT knowledge_id, posicao, url FROM knowledge_images
+     WHERE knowledge_id IN (${ids.map(() => '?').join(',')})
+     ORDER BY knowledge_id, posicao`,
+    ids
+  );
+  for (const row of rows) {
+    const images = manifest.get(row.knowledge_id) || [];
+    images.push({ posicao: row.posicao, url: row.url });
+    manifest.set(row.knowledge_id, images);
+  }
+  return manifest;
+}
+
+// Texto pronto para o prompt, calculado na gravação do documento: imagens viram Markdown
+// com URL relativa ao site (o chat só acrescenta o host) e o restante do HTML vira texto corrido.
+// A mesma transformação está em knowledge.py (backfill: python knowledge.py preparar-texto).
+export function buildKnowledgeText(titulo: string, conteudo: string): { texto: string; images: KnowledgeImage[] } {
+  const images: KnowledgeImage[] = [];
+  return { texto: htmlToText(conteudo, titulo, images), images };
+}
+
+// Converte um trecho de HTML; as imagens encontradas entram em images (numeração contínua)
+function htmlToText(html: string, titulo: string, images: KnowledgeImage[]): string {
+  const withImages = html.replace(IMAGE_TAG_REGEX, (match, src: string) => {
+    const url = src.startsWith('/') || src.startsWith('http') ? src : `/${src}`;
+    images.push({ posicao: images.length + 1, url });
+    return `\n![Imagem ${images.length} - ${titulo}](${url})\n`;
+  });
+
+  return withImages
+    .replace(/<[^>]*>/g, ' ')
+    .replace(/\s+/g, ' ')
+    .replace(/\s*(!\[)/g, '\n\n$1') // Garante quebra de linha antes das imagens
+    .replace(/(\))\s*/g, '$1\n\n') // Garante quebra de linha depois das imagens
+    .trim();
+}
+
+export function estimateTokens(text: string): number {
+  let tokens = 0;
+  for (const match of text.matchAll(TOKEN_REGEX)) {
+    tokens += Math.ceil(match[0].length / 4);
+  }
+  return tokens;
+}
+
+// Divide o HTML nos títulos (<h1>..<h6>): [título da seção em HTML | null, corpo em HTML]
+function splitSections(conteudo: string): [string | null, string][] {
+  const sections: [string | null, string][] = [];
+  let heading: string | null = null;
+  let lastIndex = 0;
+
+  for (const match of conteudo.matchAll(HEADING_REGEX)) {
+    sections.push([heading, conteudo.slice(lastIndex, match.index)]);
+    heading = match[1];
+    lastIndex = (match.index ?? 0) + match[0].length;
+  }
+  sections.push([heading, conteudo.slice(lastIndex)]);
+  return sections;
+}
+
+// Junta frases (ou palavras, se uma frase sozinha passa do limite) em pedaços de até maxTokens
+function packText(text: string, maxTokens: number): string[] {
+  const pieces: string[] = [];
+  let current = '';
+  let currentTokens = 0;
+
+  const add = (unit: string) => {
+    const tokens = estimateTokens(unit);
+    if (currentTokens + tokens > maxTokens && current.trim()) {
+      pieces.push(current.trim());
+      current = '';
+      currentTokens = 0;
+    }
+    current += unit;
+    currentTokens += tokens;
+  };
+
+  const parts = text.split(SENTENCE_SPLIT_REGEX);
+  for (let i = 0; i < parts.length; i += 2) {
+    const unit = parts[i] + (parts[i + 1] || '');
+    if (estimateTokens(unit) > maxTokens) {
+      unit.split(' ').forEach((word, index, words) => add(index < words.length - 1 ? `${word} ` : word));
+    } else {
+      add(unit);
+    }
+  }
+  if (current.trim()) {
+    pieces.push(current.trim());
+  }
+  return pieces;
+}
+
+// Trechos do documento por seção, com o título da seção no início de cada um e a contagem de
+// tokens já calculada, para montar o prompt por orçamento de contexto.
+// A mesma divisão está em knowledge.py (python knowledge.py fragmentar).
+export function chunkKnowledge(titulo: string, conteudo: string, maxTokens: number = KNOWLEDGE_CHUNK_TOKENS): KnowledgeChunk[] {
+  const images: KnowledgeImage[] = [];
+  const minTokens = Math.floor(maxTokens / 8);
+  const chunks: KnowledgeChunk[] = [];
+  let pendingHeading: string | null = null; // Título sem corpo (ex.: <h1> seguido de <h2>)
+
+  for (const [headingHtml, bodyHtml] of splitSections(conteudo)) {
+    let heading = headingHtml === null ? null : htmlToText(headingHtml, titulo, images) || null;
+    const body = htmlToText(bodyHtml, titulo, images);
+    if (pendingHeading) {
+      heading = heading ? `${pendingHeading} - ${heading}` : pendingHeading;
+    }
+    if (!body) {
+      pendingHeading = heading;
+      continue;
+    }
+    pendingHeading = null;
+
+    const secao = heading === null ? null : Array.from(heading).slice(0, SECTION_TITLE_MAX).join('');
+    for (const piece of packText(body, maxTokens)) {
+      const text = heading ? `${heading}\n\n${piece}` : piece;
+      const tokens = estimateTokens(text);
+      const previous = chunks[chunks.length - 1];
+      if (previous && tokens < minTokens && previous.tokens + tokens <= maxTokens) {
+        previous.conteudo += `\n\n${text}`;
+        previous.tokens = estimateTokens(previous.conteudo);
+      } else {
+        chunks.push({ posicao: chunks.length + 1, secao, conteudo: text, tokens });
+      }
+    }
+  }
+  return chunks;
+}
+
+// Substitui o manifesto de imagens de um documento (após criar/editar). Os save* recebem o
+// query() da transação da API (src/lib/db.ts transaction) para gravar junto com o documento.
+export async function saveKnowledgeImages(knowledgeId: number, images: KnowledgeImage[], run: QueryFn = query): Promise<void> {
+  await run('DELETE FROM knowledge_images WHERE knowledge_id = ?', [knowledgeId]);
+  if (images.length > 0) {
+    await run(
+      `INSERT INTO knowledge_images (knowledge_id, posicao, url) VALUES ${images.map(() => '(?, ?, ?)').join(', ')}`,
+      images.flatMap(img => [knowledgeId, img.posicao, img.url])
+    );
+  }
+}
+
+// Substitui os trechos de um documento (após criar/editar)
+export async function saveKnowledgeChunks(knowledgeId: number, chunks: KnowledgeChunk[], run: QueryFn = query): Promise<void> {
+  await run('DELETE FROM knowledge_chunks WHERE knowledge_id = ?', [knowledgeId]);
+  for (let start = 0; start < chunks.length; start += 500) {
+    const batch = chunks.slice(start, start + 500);
+    await run(
+      `INSERT INTO knowledge_chunks (knowledge_id, posicao, secao, conteudo, tokens) VALUES ${batch.map(() => '(?, ?, ?, ?, ?)').join(', ')}`,
+      batch.flatMap(chunk => [knowledgeId, chunk.posicao, chunk.secao, chunk.conteudo, chunk.tokens])
+    );
+  }
+}
+
+// Nomes normalizados de knowledge_base.tags (separadas por vírgula): espaços colapsados,
+// minúsculas, até TAG_MAX caracteres, sem repetição
+export function parseTags(tags: string | null | undefined): string[] {
+  const names: string[] = [];
+  for (const part of (tags || '').split(',')) {
+    const name = Array.from(part.replace(/\s+/g, ' ').trim().toLowerCase()).slice(0, TAG_MAX).join('').trim();
+    if (name && !names.includes(name)) {
+      names.push(name);
+    }
+  }
+  return names;
+}
+
+// Substitui as tags normalizadas de um documento (após criar/editar). knowledge_base.tags
+// continua sendo gravado; INSERT IGNORE reaproveita nomes já existentes em tags.
+export async function saveKnowledgeTags(knowledgeId: number, tags: string | null | undefined, run: QueryFn = query): Promise<void> {
+  const names = parseTags(tags);
+  await run('DELETE FROM knowledge_tags WHERE knowledge_id = ?', [knowledgeId]);
+  if (names.length > 0) {
+    const placeholders = names.map(() => '?').join(', ');
+    await run(`INSERT IGNORE INTO tags (nome) VALUES ${names.map(() => '(?)').join(', ')}`, names);
+    await run(
+      `INSERT IGNORE INTO knowledge_tags (knowledge_id, tag_id) SELECT ?, id FROM tags WHERE nome IN (${placeholders})`,
+      [knowledgeId, ...names]
+    );
+  }
+}
+
+// JOIN para filtrar knowledge_base (alias kb) por uma tag: seek no índice único de tags.nome
+// e em knowledge_tags (tag_id, knowledge_id). Sem tag, não filtra.
+export function tagFilter(tag: unknown): { sql: string; params: any[] } {
+  const name = typeof tag === 'string' ? parseTags(tag)[0] : undefined;
+  return name
+    ? {
+        sql: 'INNER JOIN tags t ON t.nome = ? INNER JOIN knowledge_tags kt ON kt.tag_id = t.id AND kt.knowledge_id = kb.id',
+        params: [name]
+      }
+    : { sql: '', params: [] };
+}
@@ -0,0 +1,30 @@
+import bcrypt from 'bcryptjs';
+
+// Custo do bcrypt calibrado para este servidor (python app.py calibrar-bcrypt).
+// Sem BCRYPT_COST no .env, mantém o custo 10 e não re-hasheia no login.
+const configuredCost = process.env.BCRYPT_COST ? parseInt(process.env.BCRYPT_COST, 10) : undefined;
+
+export const BCRYPT_COST = configuredCost || 10;
+
+export function hashPassword(password: string): Promise<string> {
+  return bcrypt.hash(password, BCRYPT_COST);
+}
+
+export function verifyPassword(password: string, hash: string): Promise<boolean> {
+  return bcrypt.compare(password, hash);
+}
+
+// Custo gravado no próprio hash ($2a$10$..., $2b$12$...)
+export function getHashCost(hash: string): number | null {
+  const match = /^\$2[abxy]?\$(\d{2})\$/.exec(hash);
+  return match ? parseInt(match[1], 10) : null;
+}
+
+// Hash gerado com um custo diferente do configurado (mais caro ou fraco demais)
+export function needsRehash(hash: string): boolean {
+  if (!configuredCost) {
+    return false;
+  }
+  const cost = getHashCost(hash);
+  return cost !== null && cost !== configuredCost;
+}
@@ -2,6 +2,7 @@ import type { NextApiRequest, NextApiResponse } from 'next';
 import { getServerSession } from 'next-auth/next';
 import { authOptions } from '../auth/[...nextauth]';
 import { query } from '@/lib/db';
+import { resolveFeedbackPayloads } from '@/lib/feedback';
 
 export default async function handler(
   req: NextApiRequest,
@@ -40,7 +41,9 @@ export default async function handler(
           cf.user_message,
           cf.assistant_response,
           cf.conversation_history,
+          cf.conversation_history_hash,
           cf.knowledge_base_sent,
+          cf.knowledge_base_sent_hash,
           cf.feedback,
           cf.created_at,
           u.nome as user_name,
@@ -106,6 +109,8 @@ export default async function handler(
       sql += ` ORDER BY cf.created_at DESC LIMIT ${limitNum} OFFSET ${offset}`;
 
       const feedbacks = await query<any[]>(sql, params);
+      // Histórico e conhecimento guardados em feedback_blobs (só os hashes na linha)
+      await resolveFeedbackPayloads(feedbacks);
 
       // Estatísticas gerais
       const statsResult = await query<any[]>(`
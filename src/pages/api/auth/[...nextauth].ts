@@ -1,9 +1,23 @@
 import NextAuth, { NextAuthOptions } from 'next-auth';
 import CredentialsProvider from 'next-auth/providers/credentials';
-import bcrypt from 'bcryptjs';
 import { query } from '@/lib/db';
+import { hashPassword, verifyPassword, needsRehash } from '@/lib/password';
 import { User, Permission, ModuleAccess, Module } from '@/types';
 
+// Intervalo entre verificações de users.ativo nas sessões já abertas
+const ACTIVE_CHECK_INTERVAL_MS = 60 * 1000;
+
+// false se o usuário foi desativado (python app.py desligar) ou excluído; erro de banco mantém a sessão
+async function isUserActive(userId: unknown): Promise<boolean> {
+  try {
+    const users = await query<{ ativo: number | boolean }[]>('SELECT ativo FROM users WHERE id = ?', [userId]);
+    return users.length > 0 && users[0].ativo !== 0 && users[0].ativo !== false;
+  } catch (error) {
+    console.error('Erro ao verificar usuário ativo:', error);
+    return true;
+  }
+}
+
 export const authOptions: NextAuthOptions = {
   providers: [
     CredentialsProvider({
@@ -28,12 +42,28 @@ export const authOptions: NextAuthOptions = {
           }
 
           const user = users[0];
-          const isValid = await bcrypt.compare(credentials.password, user.senha || '');
+
+          // Usuário desativado (python app.py desligar) aguardando exclusão
+          if (user.ativo === 0 || user.ativo === false) {
+            return null;
+          }
+
+          const isValid = await verifyPassword(credentials.password, user.senha || '');
 
           if (!isValid) {
             return null;
           }
 
+          // Atualiza hashes com custo diferente do calibrado (BCRYPT_COST) sem atrasar o login
+          if (needsRehash(user.senha || '')) {
+            const password = credentials.password;
+            hashPassword(password)
+              .then((novoHash) =>
+                query('UPDATE users SET senha = ? WHERE id = ? AND senha = ?', [novoHash, user.id, user.senha])
+              )
+              .catch((error) => console.error('Erro ao atualizar hash da senha:', error));
+          }
+
           // Busca permissões
           const permissions = await query<Permission[]>(
             'SELECT * FROM permissions WHERE user_id = ?',
@@ -70,6 +100,16 @@ export const authOptions: NextAuthOptions = {
         token.grupo = (user as any).grupo;
         token.permissions = (user as any).permissions;
         token.modules = (user as any).modules;
+        token.ativoVerificadoEm = Date.now();
+        return token;
+      }
+      // Com sessão JWT o login não é refeito: o usuário desativado perde a sessão em até
+      // ACTIVE_CHECK_INTERVAL_MS (o erro faz o NextAuth descartar a sessão e limpar o cookie)
+      if (Date.now() - ((token.ativoVerificadoEm as number) || 0) >= ACTIVE_CHECK_INTERVAL_MS) {
+        if (!(await isUserActive(token.id))) {
+          throw new Error('Usuário desativado');
+        }
+        token.ativoVerificadoEm = Date.now();
       }
       return token;
     },
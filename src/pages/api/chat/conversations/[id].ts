@@ -2,6 +2,7 @@ import type { NextApiRequest, NextApiResponse } from 'next';
 import { getServerSession } from 'next-auth/next';
 import { authOptions } from '../../auth/[...nextauth]';
 import { query } from '@/lib/db';
+import { fetchConversationMessages } from '@/lib/chat';
 import { ChatConversation, ChatMessage } from '@/types';
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
@@ -30,10 +31,8 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
   // GET - Buscar conversa com mensagens
   if (req.method === 'GET') {
     try {
-      const messages = await query(
-        'SELECT * FROM chat_messages WHERE conversation_id = ? ORDER BY created_at ASC',
-        [id]
-      ) as ChatMessage[];
+      // Inclui as mensagens arquivadas (conversas antigas)
+      const messages = await fetchConversationMessages<ChatMessage>(id as string, '*');
 
       const conversation = conversations[0];
       
@@ -2,6 +2,8 @@ import type { NextApiRequest, NextApiResponse } from 'next';
 import { getServerSession } from 'next-auth/next';
 import { authOptions } from '../auth/[...nextauth]';
 import { query } from '@/lib/db';
+import { storeFeedbackPayloads } from '@/lib/feedback';
+import { fetchConversationMessages } from '@/lib/chat';
 
 export default async function handler(
   req: NextApiRequest,
@@ -44,16 +46,8 @@ export default async function handler(
 
       const { module_id, system_id } = conversations[0];
 
-      // Busca toda a conversa até o momento
-      const messages = await query<any[]>(
-        `SELECT role, content, created_at FROM chat_messages 
-         WHERE conversation_id = ? 
-         ORDER BY created_at ASC`,
-        [conversation_id]
-      );
-
-      // Formata o histórico da conversa como JSON
-      const conversationHistory = JSON.stringify(messages);
+      // Busca toda a conversa até o momento (inclui mensagens arquivadas)
+      const messages = await fetchConversationMessages<any>(conversation_id, 'role, content, created_at');
 
       // Busca a base de conhecimento que foi realmente enviada ao modelo
       let knowledgeBaseSent: string | null = null;
@@ -62,7 +56,7 @@ export default async function handler(
       if (used_knowledge_ids && Array.isArray(used_knowledge_ids) && used_knowledge_ids.length > 0) {
         const placeholders = used_knowledge_ids.map(() => '?').join(',');
         const knowledgeBase = await query<any[]>(
-          `SELECT id, titulo, conteudo, tags FROM knowledge_base WHERE id IN (${placeholders})`,
+          `SELECT id, titulo, LEFT(conteudo, 501) as conteudo, tags FROM knowledge_base WHERE id IN (${placeholders})`,
           used_knowledge_ids
         );
 
@@ -76,8 +70,8 @@ export default async function handler(
           knowledgeBaseSent = JSON.stringify(kbSummary);
         }
       } else {
-        // Fallback: busca toda a base do módulo/sistema (comportamento antigo)
-        let knowledgeQuery = `SELECT id, titulo, conteudo, tags FROM knowledge_base WHERE module_id = ?`;
+        // Fallback: busca toda a base do módulo/sistema (comportamento antigo), só com o início do conteúdo
+        let knowledgeQuery = `SELECT id, titulo, LEFT(conteudo, 501) as conteudo, tags FROM knowledge_base WHERE module_id = ?`;
         let knowledgeParams: any[] = [module_id];
         
         if (system_id) {
@@ -98,6 +92,9 @@ export default async function handler(
         }
       }
 
+      // Histórico e conhecimento vão para feedback_blobs (por hash, comprimidos); chat_feedback guarda só os hashes
+      const { historyHash, knowledgeHash } = await storeFeedbackPayloads(messages, knowledgeBaseSent);
+
       // Verifica se já existe feedback para esta combinação de mensagem/resposta
       const existingFeedback = await query<any[]>(
         `SELECT id FROM chat_feedback 
@@ -110,18 +107,19 @@ export default async function handler(
         // Atualiza o feedback existente (incluindo histórico atualizado)
         await query(
           `UPDATE chat_feedback 
-           SET feedback = ?, conversation_history = ?, knowledge_base_sent = ?, created_at = CURRENT_TIMESTAMP 
+           SET feedback = ?, conversation_history = NULL, conversation_history_hash = ?,
+               knowledge_base_sent = NULL, knowledge_base_sent_hash = ?, created_at = CURRENT_TIMESTAMP 
            WHERE id = ?`,
-          [feedback, conversationHistory, knowledgeBaseSent, existingFeedback[0].id]
+          [feedback, historyHash, knowledgeHash, existingFeedback[0].id]
         );
         return res.status(200).json({ message: 'Feedback atualizado com sucesso' });
       }
 
       // Insere o novo feedback com histórico completo
       await query(
-        `INSERT INTO chat_feedback (conversation_id, user_id, user_message, assistant_response, conversation_history, knowledge_base_sent, feedback)
+        `INSERT INTO chat_feedback (conversation_id, user_id, user_message, assistant_response, conversation_history_hash, knowledge_base_sent_hash, feedback)
          VALUES (?, ?, ?, ?, ?, ?, ?)`,
-        [conversation_id, user.id, user_message, assistant_response, conversationHistory, knowledgeBaseSent, feedback]
+        [conversation_id, user.id, user_message, assistant_response, historyHash, knowledgeHash, feedback]
       );
 
       return res.status(201).json({ message: 'Feedback salvo com sucesso' });
@@ -2,7 +2,9 @@ import type { NextApiRequest, NextApiResponse } from 'next';
 import { getServerSession } from 'next-auth/next';
 import { authOptions } from '../auth/[...nextauth]';
 import { query } from '@/lib/db';
-import { LLMModel, ChatMessage, LLMConfig, KnowledgeBase, Attachment } from '@/types';
+import { searchKnowledge, fetchKnowledgeDocuments, fetchKnowledgeImages } from '@/lib/knowledge';
+import { fetchConversationMessages } from '@/lib/chat';
+import { LLMModel, ChatMessage, LLMConfig, KnowledgeBase, KnowledgeImage, Attachment } from '@/types';
 
 // Configuração para aumentar limite do body (para imagens base64)
 export const config = {
@@ -74,6 +76,29 @@ function extractImagesFromContent(content: string, docTitle: string, startIndex:
   return { cleanContent: textContent, images };
 }
 
+// Documento com texto já preparado na gravação (conteudo_texto): só torna absolutas as URLs do manifesto
+function resolvePreparedImages(texto: string, docTitle: string, manifest: KnowledgeImage[], startIndex: number, baseUrl: string): {
+  cleanContent: string;
+  images: ExtractedImage[];
+} {
+  let cleanContent = texto;
+  
+  const images = manifest.map((image, index) => {
+    const fullUrl = image.url.startsWith('/') ? `${baseUrl}${image.url}` : image.url;
+    if (fullUrl !== image.url) {
+      cleanContent = cleanContent.split(`](${image.url})`).join(`](${fullUrl})`);
+    }
+    return {
+      id: `[IMAGEM_${startIndex + index}]`,
+      url: fullUrl,
+      docTitle: docTitle,
+      position: startIndex + index
+    };
+  });
+  
+  return { cleanContent, images };
+}
+
 // Função para processar resposta do LLM - agora apenas extrai URLs das imagens para referência
 function processResponseWithImages(response: string, images: ExtractedImage[]): {
   content: string;
@@ -96,11 +121,44 @@ function processResponseWithImages(response: string, images: ExtractedImage[]):
 // Função auxiliar para delay
 const delay = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
 
-// Função para chamar a API do provedor com retry para rate limiting
+// Lê o corpo da resposta linha a linha (SSE ou NDJSON dos provedores em modo stream)
+async function readLines(response: Response, onLine: (line: string) => void): Promise<void> {
+  const reader = response.body!.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    buffer += decoder.decode(value, { stream: !done });
+    const lines = buffer.split('\n');
+    buffer = done ? '' : lines.pop()!;
+    lines.forEach(line => line.trim() && onLine(line.trim()));
+    if (done) return;
+  }
+}
+
+// Trecho de texto de uma linha do stream, no formato de cada provedor
+function streamDelta(provider: string, line: string): string {
+  if (provider === 'ollama') {
+    return JSON.parse(line).message?.content || '';
+  }
+  // Demais provedores: Server-Sent Events ("data: {...}"; comentários e "event:" são ignorados)
+  if (!line.startsWith('data:')) return '';
+  const payload = line.slice(5).trim();
+  if (payload === '[DONE]') return '';
+  const data = JSON.parse(payload);
+  if (provider === 'anthropic') {
+    return data.type === 'content_block_delta' ? data.delta?.text || '' : '';
+  }
+  return data.choices?.[0]?.delta?.content || '';
+}
+
+// Função para chamar a API do provedor com retry para rate limiting.
+// Com onDelta, pede a resposta em stream ao provedor e repassa cada trecho conforme chega.
 async function callLLMProvider(
   model: LLMModel, 
   messages: { role: string; content: string | any[] }[],
   hasImages: boolean = false,
+  onDelta?: (delta: string) => void,
   retryCount: number = 0,
   maxRetries: number = 3
 ): Promise<string> {
@@ -213,6 +271,10 @@ async function callLLMProvider(
       throw new Error(`Provedor não suportado: ${provider}`);
   }
 
+  if (onDelta) {
+    body.stream = true;
+  }
+
   try {
     console.log('=== CHAMADA LLM ===');
     console.log('Provider:', provider);
@@ -239,7 +301,7 @@ async function callLLMProvider(
         const waitTime = Math.pow(2, retryCount + 1) * 1000; // 2s, 4s, 8s
         console.log(`Rate limited (429). Aguardando ${waitTime}ms antes de tentar novamente... (tentativa ${retryCount + 1}/${maxRetries})`);
         await delay(waitTime);
-        return callLLMProvider(model, messages, hasImages, retryCount + 1, maxRetries);
+        return callLLMProvider(model, messages, hasImages, onDelta, retryCount + 1, maxRetries);
       }
       
       // Mensagem de erro mais amigável para 429
@@ -250,6 +312,23 @@ async function callLLMProvider(
       throw new Error(`Erro da API: ${response.status} - ${errorText}`);
     }
 
+    if (onDelta) {
+      let text = '';
+      await readLines(response, line => {
+        const delta = streamDelta(provider, line);
+        if (delta) {
+          text += delta;
+          onDelta(delta);
+        }
+      });
+      console.log('=== RESPOSTA LLM (stream) ===');
+      console.log('Response:', text.substring(0, 500));
+      if (!text) {
+        onDelta('Sem resposta');
+      }
+      return text || 'Sem resposta';
+    }
+
     const data = await response.json();
     console.log('=== RESPOSTA LLM ===');
     console.log('Response:', JSON.stringify(data, null, 2).substring(0, 500));
@@ -318,81 +397,6 @@ Responda SOMENTE "SIM" ou "NAO", sem explicações.`;
   }
 }
 
-// Função para selecionar documentos relevantes baseado nos títulos
-async function selectRelevantDocuments(
-  model: LLMModel,
-  userMessage: string,
-  knowledgeTitles: string[]
-): Promise<string[]> {
-  const selectPrompt = `Você é um assistente que seleciona documentos relevantes. Analise a pergunta do usuário e selecione APENAS os documentos que são relevantes para responder.
-
-DOCUMENTOS DISPONÍVEIS (títulos):
-${knowledgeTitles.map((t, i) => `${i + 1}. ${t}`).join('\n')}
-
-PERGUNTA DO USUÁRIO: "${userMessage}"
-
-INSTRUÇÕES:
-- Analise cuidadosamente a pergunta e os títulos dos documentos
-- Selecione APENAS os documentos cujo conteúdo provavelmente ajudará a responder a pergunta
-- Seja criterioso: não selecione documentos que não têm relação clara com a pergunta
-- Se nenhum documento parecer relevante, retorne "NENHUM"
-
-RESPONDA APENAS com os títulos dos documentos relevantes, um por linha, EXATAMENTE como aparecem na lista acima.
-Não adicione números, explicações ou qualquer outro texto.`;
-
-  const messages = [
-    { role: 'user', content: selectPrompt }
-  ];
-
-  try {
-    const response = await callLLMProvider(model, messages, false);
-    const answer = response.trim();
-    
-    console.log('=== SELEÇÃO DE DOCUMENTOS ===');
-    console.log('Resposta do LLM:', answer);
-    
-    // Se retornou "NENHUM", retorna array vazio
-    if (answer.toUpperCase() === 'NENHUM') {
-      return [];
-    }
-    
-    // Extrai os títulos da resposta
-    const selectedTitles = answer
-      .split('\n')
-      .map(line => line.trim())
-      .filter(line => line.length > 0)
-      // Remove possíveis números no início (ex: "1. Título" -> "Título")
-      .map(line => line.replace(/^\d+\.\s*/, '').trim())
-      // Filtra apenas títulos que existem na lista original
-      .filter(title => knowledgeTitles.some(kt => 
-        kt.toLowerCase() === title.toLowerCase() ||
-        kt.toLowerCase().includes(title.toLowerCase()) ||
-        title.toLowerCase().includes(kt.toLowerCase())
-      ));
-    
-    // Mapeia para os títulos originais (mantendo case correto)
-    const matchedTitles = selectedTitles.map(selected => {
-      const match = knowledgeTitles.find(kt => 
-        kt.toLowerCase() === selected.toLowerCase() ||
-        kt.toLowerCase().includes(selected.toLowerCase()) ||
-        selected.toLowerCase().includes(kt.toLowerCase())
-      );
-      return match || selected;
-    });
-    
-    // Remove duplicatas
-    const uniqueTitles = Array.from(new Set(matchedTitles));
-    
-    console.log('Títulos selecionados:', uniqueTitles);
-    
-    return uniqueTitles;
-  } catch (error) {
-    console.error('Erro ao selecionar documentos relevantes:', error);
-    // Em caso de erro, retorna todos os títulos (comportamento seguro)
-    return knowledgeTitles;
-  }
-}
-
 // Função para gerar título da conversa baseado na primeira mensagem
 async function generateConversationTitle(
   model: LLMModel,
@@ -526,6 +530,22 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
 
   const userId = (session.user as any).id;
 
+  // Clientes que aceitam NDJSON recebem a resposta em trechos ({"delta": ...}) e uma linha
+  // final {"done": true, ...} com os mesmos campos da resposta JSON; os demais recebem o JSON.
+  const wantsStream = (req.headers.accept || '').includes('application/x-ndjson');
+  const writeLine = (data: any) => {
+    if (!res.headersSent) {
+      res.writeHead(200, {
+        'Content-Type': 'application/x-ndjson; charset=utf-8',
+        'Cache-Control': 'no-cache',
+        'Content-Encoding': 'none', // Evita que a compressão do Next segure os trechos
+        'X-Accel-Buffering': 'no',
+      });
+    }
+    res.write(JSON.stringify(data) + '\n');
+  };
+  const onDelta = wantsStream ? (delta: string) => writeLine({ delta }) : undefined;
+
   try {
     const { conversation_id, module_id, system_id, message, image_base64, file_url, file_name } = req.body;
 
@@ -625,62 +645,41 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
       [conversationId, 'user', message, imageUrl, file_url || null, file_name || null]
     );
 
-    // Busca toda a base de conhecimento do módulo/sistema
-    let knowledgeQuery = `SELECT id, titulo, conteudo, tags FROM knowledge_base WHERE module_id = ?`;
-    let knowledgeParams: any[] = [moduleId];
-    
-    if (systemId) {
-      knowledgeQuery += ` AND system_id = ?`;
-      knowledgeParams.push(systemId);
-    }
-    
-    const knowledgeBase = await query(knowledgeQuery, knowledgeParams) as (KnowledgeBase & { id: number })[];
-
-    // Busca anexos de todos os documentos do módulo/sistema
-    let attachmentsQuery = `SELECT a.*, kb.titulo as doc_titulo 
-       FROM attachments a 
-       INNER JOIN knowledge_base kb ON a.knowledge_id = kb.id 
-       WHERE kb.module_id = ?`;
-    let attachmentsParams: any[] = [moduleId];
-    
-    if (systemId) {
-      attachmentsQuery += ` AND kb.system_id = ?`;
-      attachmentsParams.push(systemId);
-    }
-    
-    const allAttachmentsFromDB = await query(attachmentsQuery, attachmentsParams) as (Attachment & { doc_titulo: string })[];
-
-    // Extrai títulos para verificação
-    const knowledgeTitles = knowledgeBase.map(kb => kb.titulo);
+    // Ranqueia a base do módulo/sistema (serviço local de busca ou FULLTEXT) e traz só id/título dos mais relevantes
+    const search = await searchKnowledge(moduleId, systemId, message);
+    const candidates = search.candidates;
+    const knowledgeTitles = candidates.map(kb => kb.titulo);
 
-    // ETAPA 1: Verifica se a pergunta precisa da base de conhecimento
-    const needsKnowledge = knowledgeBase.length > 0 
-      ? await checkIfNeedsKnowledge(activeModel, message, knowledgeTitles)
-      : false;
+    // ETAPA 1: Verifica se a pergunta precisa da base de conhecimento.
+    // O classificador local decide quando tem confiança; senão pergunta ao LLM.
+    const decidedLocally = search.needsKnowledge !== undefined;
+    const needsKnowledge = candidates.length === 0
+      ? false
+      : decidedLocally
+        ? search.needsKnowledge === true
+        : await checkIfNeedsKnowledge(activeModel, message, knowledgeTitles);
 
-    console.log(`Pergunta: "${message}" - Precisa da base: ${needsKnowledge}`);
+    console.log(`Pergunta: "${message}" - Precisa da base: ${needsKnowledge} (${decidedLocally ? 'classificador local' : 'LLM'})`);
 
-    // ETAPA 2: Se precisa da base, seleciona apenas os documentos relevantes
-    let relevantTitles: string[] = [];
+    // ETAPA 2: Se precisa da base, busca o conteúdo e os anexos apenas dos documentos ranqueados
     let filteredKnowledgeBase: (KnowledgeBase & { id: number })[] = [];
+    let allAttachmentsFromDB: (Attachment & { doc_titulo: string })[] = [];
+    let knowledgeImages = new Map<number, KnowledgeImage[]>();
     
-    if (needsKnowledge && knowledgeBase.length > 0) {
-      relevantTitles = await selectRelevantDocuments(activeModel, message, knowledgeTitles);
-      console.log(`Documentos relevantes selecionados: ${relevantTitles.length} de ${knowledgeBase.length}`);
+    if (needsKnowledge) {
+      filteredKnowledgeBase = await fetchKnowledgeDocuments(candidates.map(kb => kb.id));
+      console.log(`Documentos relevantes (FULLTEXT): ${filteredKnowledgeBase.map(kb => kb.titulo).join(', ')}`);
       
-      // Filtra a base de conhecimento para incluir apenas os documentos relevantes
-      if (relevantTitles.length > 0) {
-        filteredKnowledgeBase = knowledgeBase.filter(kb => 
-          relevantTitles.some(title => 
-            kb.titulo.toLowerCase() === title.toLowerCase() ||
-            kb.titulo.toLowerCase().includes(title.toLowerCase()) ||
-            title.toLowerCase().includes(kb.titulo.toLowerCase())
-          )
-        );
-      } else {
-        // Se nenhum documento foi selecionado, usa todos (fallback seguro)
-        filteredKnowledgeBase = knowledgeBase;
-        console.log('Nenhum documento específico selecionado, usando toda a base.');
+      if (filteredKnowledgeBase.length > 0) {
+        const knowledgeIds = filteredKnowledgeBase.map(kb => kb.id);
+        knowledgeImages = await fetchKnowledgeImages(knowledgeIds);
+        allAttachmentsFromDB = await query(
+          `SELECT a.*, kb.titulo as doc_titulo 
+           FROM attachments a 
+           INNER JOIN knowledge_base kb ON a.knowledge_id = kb.id 
+           WHERE a.knowledge_id IN (${knowledgeIds.map(() => '?').join(',')})`,
+          knowledgeIds
+        ) as (Attachment & { doc_titulo: string })[];
       }
     }
 
@@ -706,13 +705,10 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
           knowledgeDescriptions += `Tags: ${kb.tags}\n`;
         }
         
-        // Extrai imagens e converte para formato Markdown com URLs absolutas
-        const { cleanContent, images } = extractImagesFromContent(
-          kb.conteudo || '', 
-          kb.titulo, 
-          imageCounter,
-          baseUrl
-        );
+        // Texto preparado na gravação; documentos ainda sem backfill passam pela extração do HTML
+        const { cleanContent, images } = kb.conteudo_texto != null
+          ? resolvePreparedImages(kb.conteudo_texto, kb.titulo, knowledgeImages.get(kb.id) || [], imageCounter, baseUrl)
+          : extractImagesFromContent(kb.conteudo || '', kb.titulo, imageCounter, baseUrl);
         
         allImages = [...allImages, ...images];
         imageCounter += images.length;
@@ -765,10 +761,9 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
       : buildSimplePrompt(config);
 
     // Busca histórico de mensagens para contexto (últimas 20 mensagens)
-    const history = await query(
-      'SELECT role, content, image_url FROM chat_messages WHERE conversation_id = ? ORDER BY created_at DESC LIMIT 20',
-      [conversationId]
-    ) as ChatMessage[];
+    const history = await fetchConversationMessages<ChatMessage>(
+      conversationId, 'role, content, image_url, created_at', { order: 'DESC', limit: 20 }
+    );
 
     // Inverte para ordem cronológica
     history.reverse();
@@ -838,10 +833,11 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
     
     let rawResponse: string;
     try {
-      rawResponse = await callLLMProvider(activeModel, llmMessages, hasImages);
+      rawResponse = await callLLMProvider(activeModel, llmMessages, hasImages, onDelta);
     } catch (error: any) {
       // Se o erro for relacionado a imagens não suportadas, tenta novamente sem imagens
-      if (error.message?.includes('image') || error.message?.includes('No endpoints found')) {
+      // (só antes de algum trecho ter sido enviado ao cliente)
+      if (!res.headersSent && (error.message?.includes('image') || error.message?.includes('No endpoints found'))) {
         console.log('Modelo não suporta imagens, tentando novamente sem imagens...');
         
         // Remove imagens das mensagens
@@ -856,7 +852,7 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
           return m;
         });
         
-        rawResponse = await callLLMProvider(activeModel, messagesWithoutImages, false);
+        rawResponse = await callLLMProvider(activeModel, messagesWithoutImages, false, onDelta);
       } else {
         throw error;
       }
@@ -904,7 +900,7 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
     // IDs dos documentos que foram realmente enviados ao modelo
     const usedKnowledgeIds = filteredKnowledgeBase.map(kb => kb.id);
 
-    return res.status(200).json({
+    const result = {
       conversation_id: conversationId,
       response: assistantResponse,
       image_url: imageUrl,
@@ -915,10 +911,21 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
       all_knowledge_attachments: allAttachments.map(att => ({ id: att.id, url: att.url, name: att.name })),
       used_knowledge_ids: usedKnowledgeIds,
       generated_title: generatedTitle
-    });
+    };
+
+    if (wantsStream) {
+      writeLine({ done: true, ...result });
+      return res.end();
+    }
+    return res.status(200).json(result);
 
   } catch (error: any) {
     console.error('Erro ao processar mensagem:', error);
+    if (res.headersSent) {
+      // Stream já iniciado: o erro vai como última linha
+      writeLine({ error: 'Erro ao processar mensagem', details: error.message });
+      return res.end();
+    }
     return res.status(500).json({ 
       error: 'Erro ao processar mensagem', 
       details: error.message 
@@ -0,0 +1,13 @@
+import type { NextApiRequest, NextApiResponse } from 'next';
+
+// Endpoint leve para verificar se o servidor está no ar.
+// Não consulta sessão nem banco de dados: é usado pelo cliente desktop
+// no teste de conexão e para manter a conexão HTTP aquecida.
+export default function handler(req: NextApiRequest, res: NextApiResponse) {
+  if (req.method !== 'GET' && req.method !== 'HEAD') {
+    return res.status(405).json({ error: 'Método não permitido' });
+  }
+
+  res.setHeader('Cache-Control', 'no-store');
+  return res.status(200).json({ status: 'ok', timestamp: Date.now() });
+}
@@ -1,7 +1,8 @@
 import type { NextApiRequest, NextApiResponse } from 'next';
 import { getServerSession } from 'next-auth';
 import { authOptions } from '../auth/[...nextauth]';
-import { query } from '@/lib/db';
+import { query, transaction } from '@/lib/db';
+import { KNOWLEDGE_COLUMNS, buildKnowledgeText, chunkKnowledge, saveKnowledgeImages, saveKnowledgeChunks, saveKnowledgeTags } from '@/lib/knowledge';
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   const session = await getServerSession(req, res, authOptions);
@@ -16,7 +17,7 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
   if (req.method === 'GET') {
     try {
       const knowledge = await query<any[]>(
-        `SELECT kb.*, m.nome as module_nome, s.nome as system_nome, u.nome as autor_nome
+        `SELECT ${KNOWLEDGE_COLUMNS}, m.nome as module_nome, s.nome as system_nome, u.nome as autor_nome
          FROM knowledge_base kb
          LEFT JOIN modules m ON kb.module_id = m.id
          LEFT JOIN systems s ON kb.system_id = s.id
@@ -59,7 +60,7 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
 
       // Busca documento
       const knowledge = await query<any[]>(
-        'SELECT * FROM knowledge_base WHERE id = ?',
+        'SELECT id, created_by FROM knowledge_base WHERE id = ?',
         [id]
       );
 
@@ -74,12 +75,33 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
         return res.status(403).json({ error: 'Sem permissão para editar' });
       }
 
-      await query(
-        `UPDATE knowledge_base 
-         SET titulo = ?, conteudo = ?, tags = ?, system_id = ?, data_atualizacao = NOW()
-         WHERE id = ?`,
-        [titulo, conteudo || '', tags || '', system_id || null, id]
-      );
+      // Texto pronto para o chat, manifesto de imagens, trechos e tags normalizadas, recalculados a cada edição
+      const { texto, images } = buildKnowledgeText(titulo, conteudo || '');
+
+      const chunks = chunkKnowledge(titulo, conteudo || '');
+
+      // Documento, imagens, trechos e tags na mesma transação. O FOR UPDATE enfileira edições
+      // simultâneas do mesmo documento (e o backfill de knowledge.py), que gravam uma depois da outra.
+      const updated = await transaction(async (run) => {
+        const locked = await run<any[]>('SELECT id FROM knowledge_base WHERE id = ? FOR UPDATE', [doc.id]);
+        if (locked.length === 0) {
+          return false;
+        }
+        await run(
+          `UPDATE knowledge_base 
+           SET titulo = ?, conteudo = ?, conteudo_texto = ?, tags = ?, system_id = ?, data_atualizacao = NOW()
+           WHERE id = ?`,
+          [titulo, conteudo || '', texto, tags || '', system_id || null, doc.id]
+        );
+        await saveKnowledgeImages(doc.id, images, run);
+        await saveKnowledgeChunks(doc.id, chunks, run);
+        await saveKnowledgeTags(doc.id, tags, run);
+        return true;
+      });
+
+      if (!updated) {
+        return res.status(404).json({ error: 'Documento não encontrado' });
+      }
 
       res.status(200).json({ message: 'Documento atualizado com sucesso' });
     } catch (error) {
@@ -90,7 +112,7 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
     try {
       // Busca documento
       const knowledge = await query<any[]>(
-        'SELECT * FROM knowledge_base WHERE id = ?',
+        'SELECT id, created_by FROM knowledge_base WHERE id = ?',
         [id]
       );
 
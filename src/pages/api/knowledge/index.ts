@@ -1,7 +1,8 @@
 import type { NextApiRequest, NextApiResponse } from 'next';
 import { getServerSession } from 'next-auth';
 import { authOptions } from '../auth/[...nextauth]';
-import { query } from '@/lib/db';
+import { query, transaction } from '@/lib/db';
+import { KNOWLEDGE_COLUMNS, buildKnowledgeText, chunkKnowledge, saveKnowledgeImages, saveKnowledgeChunks, saveKnowledgeTags, tagFilter } from '@/lib/knowledge';
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   const session = await getServerSession(req, res, authOptions);
@@ -14,18 +15,21 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
 
   if (req.method === 'GET') {
     try {
-      const { module_id, system_id } = req.query;
+      const { module_id, system_id, tag } = req.query;
+      // ?tag=nome filtra pela tabela knowledge_tags (em todos os módulos se não houver module_id)
+      const byTag = tagFilter(tag);
 
       let knowledge;
       if (user.grupo === 'adm') {
         if (module_id) {
-          let queryStr = `SELECT kb.*, m.nome as module_nome, s.nome as system_nome, u.nome as autor_nome
+          let queryStr = `SELECT ${KNOWLEDGE_COLUMNS}, m.nome as module_nome, s.nome as system_nome, u.nome as autor_nome
              FROM knowledge_base kb
+             ${byTag.sql}
              LEFT JOIN modules m ON kb.module_id = m.id
              LEFT JOIN systems s ON kb.system_id = s.id
              LEFT JOIN users u ON kb.created_by = u.id
              WHERE kb.module_id = ?`;
-          const params: any[] = [module_id];
+          const params: any[] = [...byTag.params, module_id];
           
           if (system_id) {
             queryStr += ` AND kb.system_id = ?`;
@@ -36,12 +40,14 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
           knowledge = await query<any[]>(queryStr, params);
         } else {
           knowledge = await query<any[]>(
-            `SELECT kb.*, m.nome as module_nome, s.nome as system_nome, u.nome as autor_nome
+            `SELECT ${KNOWLEDGE_COLUMNS}, m.nome as module_nome, s.nome as system_nome, u.nome as autor_nome
              FROM knowledge_base kb
+             ${byTag.sql}
              LEFT JOIN modules m ON kb.module_id = m.id
              LEFT JOIN systems s ON kb.system_id = s.id
              LEFT JOIN users u ON kb.created_by = u.id
-             ORDER BY kb.data_criacao DESC`
+             ORDER BY kb.data_criacao DESC`,
+            byTag.params
           );
         }
       } else {
@@ -55,13 +61,14 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
             return res.status(403).json({ error: 'Acesso negado' });
           }
 
-          let queryStr = `SELECT kb.*, m.nome as module_nome, s.nome as system_nome, u.nome as autor_nome
+          let queryStr = `SELECT ${KNOWLEDGE_COLUMNS}, m.nome as module_nome, s.nome as system_nome, u.nome as autor_nome
              FROM knowledge_base kb
+             ${byTag.sql}
              LEFT JOIN modules m ON kb.module_id = m.id
              LEFT JOIN systems s ON kb.system_id = s.id
              LEFT JOIN users u ON kb.created_by = u.id
              WHERE kb.module_id = ?`;
-          const params: any[] = [module_id];
+          const params: any[] = [...byTag.params, module_id];
           
           if (system_id) {
             queryStr += ` AND kb.system_id = ?`;
@@ -72,15 +79,16 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
           knowledge = await query<any[]>(queryStr, params);
         } else {
           knowledge = await query<any[]>(
-            `SELECT kb.*, m.nome as module_nome, s.nome as system_nome, u.nome as autor_nome
+            `SELECT ${KNOWLEDGE_COLUMNS}, m.nome as module_nome, s.nome as system_nome, u.nome as autor_nome
              FROM knowledge_base kb
+             ${byTag.sql}
              INNER JOIN module_access ma ON kb.module_id = ma.module_id
              LEFT JOIN modules m ON kb.module_id = m.id
              LEFT JOIN systems s ON kb.system_id = s.id
              LEFT JOIN users u ON kb.created_by = u.id
              WHERE ma.user_id = ?
              ORDER BY kb.data_criacao DESC`,
-            [user.id]
+            [...byTag.params, user.id]
           );
         }
       }
@@ -114,13 +122,25 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
         }
       }
 
-      const result = await query<any>(
-        `INSERT INTO knowledge_base (module_id, system_id, created_by, titulo, conteudo, tags)
-         VALUES (?, ?, ?, ?, ?, ?)`,
-        [module_id, system_id || null, user.id, titulo, conteudo || '', tags || '']
-      );
+      // Texto pronto para o chat, manifesto de imagens, trechos e tags normalizadas, calculados uma vez na gravação
+      const { texto, images } = buildKnowledgeText(titulo, conteudo || '');
+
+      const chunks = chunkKnowledge(titulo, conteudo || '');
+
+      // Documento, imagens, trechos e tags na mesma transação: uma falha não deixa metade gravada
+      const knowledgeId = await transaction(async (run) => {
+        const result = await run<any>(
+          `INSERT INTO knowledge_base (module_id, system_id, created_by, titulo, conteudo, conteudo_texto, tags)
+           VALUES (?, ?, ?, ?, ?, ?, ?)`,
+          [module_id, system_id || null, user.id, titulo, conteudo || '', texto, tags || '']
+        );
+        await saveKnowledgeImages(result.insertId, images, run);
+        await saveKnowledgeChunks(result.insertId, chunks, run);
+        await saveKnowledgeTags(result.insertId, tags, run);
+        return result.insertId;
+      });
 
-      res.status(201).json({ id: result.insertId, message: 'Documento criado com sucesso' });
+      res.status(201).json({ id: knowledgeId, message: 'Documento criado com sucesso' });
     } catch (error) {
       console.error('Error creating knowledge:', error);
       res.status(500).json({ error: 'Erro ao criar documento' });
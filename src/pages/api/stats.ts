@@ -2,6 +2,7 @@ import type { NextApiRequest, NextApiResponse } from 'next';
 import { getServerSession } from 'next-auth';
 import { authOptions } from './auth/[...nextauth]';
 import { query } from '@/lib/db';
+import { KNOWLEDGE_COLUMNS } from '@/lib/knowledge';
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   const session = await getServerSession(req, res, authOptions);
@@ -47,7 +48,7 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
       totalKnowledge = knowledgeResult[0].count;
 
       recentKnowledge = await query<any[]>(`
-        SELECT kb.*, m.nome as module_nome, u.nome as autor_nome
+        SELECT ${KNOWLEDGE_COLUMNS}, m.nome as module_nome, u.nome as autor_nome
         FROM knowledge_base kb
         LEFT JOIN modules m ON kb.module_id = m.id
         LEFT JOIN users u ON kb.created_by = u.id
@@ -64,7 +65,7 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
       totalKnowledge = knowledgeResult[0].count;
 
       recentKnowledge = await query<any[]>(
-        `SELECT kb.*, m.nome as module_nome, u.nome as autor_nome
+        `SELECT ${KNOWLEDGE_COLUMNS}, m.nome as module_nome, u.nome as autor_nome
          FROM knowledge_base kb
          INNER JOIN module_access ma ON kb.module_id = ma.module_id
          LEFT JOIN modules m ON kb.module_id = m.id
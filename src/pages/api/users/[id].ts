@@ -2,7 +2,7 @@ import type { NextApiRequest, NextApiResponse } from 'next';
 import { getServerSession } from 'next-auth';
 import { authOptions } from '../auth/[...nextauth]';
 import { query } from '@/lib/db';
-import bcrypt from 'bcryptjs';
+import { hashPassword } from '@/lib/password';
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   const session = await getServerSession(req, res, authOptions);
@@ -69,7 +69,7 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
 
       // Atualiza usuário
       if (senha) {
-        const senhaHash = await bcrypt.hash(senha, 10);
+        const senhaHash = await hashPassword(senha);
         await query(
           'UPDATE users SET nome = ?, email = ?, senha = ?, grupo = ? WHERE id = ?',
           [nome, email, senhaHash, grupo, id]
@@ -2,7 +2,7 @@ import type { NextApiRequest, NextApiResponse } from 'next';
 import { getServerSession } from 'next-auth/next';
 import { authOptions } from '../auth/[...nextauth]';
 import { query } from '@/lib/db';
-import bcrypt from 'bcryptjs';
+import { hashPassword, verifyPassword } from '@/lib/password';
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   if (req.method !== 'POST') {
@@ -36,14 +36,14 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
     }
 
     // Verifica a senha atual
-    const isValidPassword = await bcrypt.compare(currentPassword, users[0].senha);
+    const isValidPassword = await verifyPassword(currentPassword, users[0].senha);
 
     if (!isValidPassword) {
       return res.status(400).json({ error: 'Senha atual incorreta' });
     }
 
     // Hash da nova senha
-    const hashedPassword = await bcrypt.hash(newPassword, 10);
+    const hashedPassword = await hashPassword(newPassword);
 
     // Atualiza a senha
     await query('UPDATE users SET senha = ? WHERE id = ?', [hashedPassword, userId]);
@@ -4,6 +4,7 @@ export interface User {
   email: string;
   senha?: string;
   grupo: 'adm' | 'user';
+  ativo?: boolean | number;
   created_at?: Date;
   updated_at?: Date;
 }
@@ -45,6 +46,7 @@ export interface KnowledgeBase {
   created_by: number;
   titulo: string;
   conteudo?: string;
+  conteudo_texto?: string | null;
   tags?: string;
   data_criacao?: Date;
   data_atualizacao?: Date;
@@ -65,6 +67,18 @@ export interface Attachment {
   created_at?: Date;
 }
 
+export interface KnowledgeImage {
+  posicao: number;
+  url: string;
+}
+
+export interface KnowledgeChunk {
+  posicao: number;
+  secao: string | null;
+  conteudo: string;
+  tokens: number;
+}
+
 export interface UserWithPermissions extends User {
   permissions?: Permission;
   modules?: Module[];